@@ -0,0 +1,75 @@
+"""Shared helpers for the benchmark scripts."""
+
+import json
+import platform
+import statistics
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+# Make claude_sandbox importable when run as a script
+if str(REPO_DIR) not in sys.path:
+    sys.path.insert(0, str(REPO_DIR))
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Reduce samples to median and spread.
+
+    Args:
+        samples: Measurements (any unit)
+
+    Returns:
+        Dictionary with n, median, min, max, p10, p90 and stdev
+    """
+    ordered = sorted(samples)
+    n = len(ordered)
+    if n == 0:
+        return {"n": 0}
+
+    def pct(p: float) -> float:
+        return ordered[min(n - 1, int(round(p * (n - 1))))]
+
+    return {
+        "n": n,
+        "median": round(statistics.median(ordered), 3),
+        "min": round(ordered[0], 3),
+        "max": round(ordered[-1], 3),
+        "p10": round(pct(0.10), 3),
+        "p90": round(pct(0.90), 3),
+        "stdev": round(statistics.stdev(ordered), 3) if n > 1 else 0.0,
+    }
+
+
+def write_results(name: str, results: Dict[str, Any], output: Path = None) -> Path:
+    """Write benchmark results as JSON with host metadata.
+
+    Args:
+        name: Benchmark name, used in the default file name
+        results: Benchmark-specific results
+        output: Output path (default: results/<name>-<timestamp>.json)
+
+    Returns:
+        Path written
+    """
+    now = datetime.now(timezone.utc)
+    if output is None:
+        output = RESULTS_DIR / f"{name}-{now:%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    document = {
+        "benchmark": name,
+        "timestamp": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "host": {
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+        },
+        **results,
+    }
+    output.write_text(json.dumps(document, indent=2) + "\n")
+    return output
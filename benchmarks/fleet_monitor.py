@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Fleet Monitor Cost Benchmark
+
+Measures what the fleet monitor (python3 -m claude_sandbox --top) costs the
+host as the number of running sandboxes grows, against polling `docker stats
+--no-stream` the way sandbox-monitor.sh does for one container.
+
+For each fleet size, idle sandbox containers (sleep) are started, then the
+monitor runs in-process for --duration seconds, drawing the table every
+--interval seconds. Reported per size: the monitor's CPU time as % of one
+core, the time to draw one table, and the wall time of one `docker stats
+--no-stream` call covering the same containers.
+
+Usage:
+    ./benchmarks/fleet_monitor.py [--sizes N ...] [--duration SECS] [--runtime RT]
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchlib import RESULTS_DIR, summarize, write_results
+
+from claude_sandbox import Sandbox, SandboxConfig
+from claude_sandbox.fleet import FleetMonitor, render
+
+PREFIX = "claude-sandbox-fleetbench-"
+
+
+def start_fleet(sandbox: Sandbox, workspace: Path, count: int, runtime: str) -> List[str]:
+    """Start count idle containers; return their ids."""
+    ids = []
+    for index in range(count):
+        config = sandbox.container_config(workspace, ["sleep", "infinity"], runtime,
+                                          memory="64m", cpus="0.1")
+        container_id = sandbox.create_container(f"{PREFIX}{index:04d}", config)
+        sandbox.client.start_container(container_id)
+        ids.append(container_id)
+    return ids
+
+
+def measure_monitor(sandbox: Sandbox, duration: float, interval: float) -> Dict[str, object]:
+    """Run the monitor for duration seconds.
+
+    Returns:
+        Dictionary with cpu_percent (of one core), render_ms samples and the
+        number of containers it reported
+    """
+    with FleetMonitor(sandbox.client, PREFIX) as fleet:
+        # Let every stream deliver its first documents before measuring
+        fleet.poll(3.0)
+        renders = []
+        cpu_start, wall_start = time.process_time(), time.monotonic()
+        while time.monotonic() - wall_start < duration:
+            fleet.poll(interval)
+            start = time.perf_counter()
+            rows = fleet.rows()
+            render(rows)
+            renders.append((time.perf_counter() - start) * 1000)
+        cpu = time.process_time() - cpu_start
+        wall = time.monotonic() - wall_start
+    return {"cpu_percent": round(cpu * 100 / wall, 3), "render_ms": renders, "rows": len(rows)}
+
+
+def measure_docker_stats(ids: List[str]) -> float:
+    """Return the wall time in ms of one `docker stats --no-stream` over the containers."""
+    start = time.perf_counter()
+    subprocess.run(["docker", "stats", "--no-stream", *ids], stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, check=False)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the fleet monitor's cost.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 50, 100, 200],
+                        help="Fleet sizes to measure (default: 10 50 100 200)")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="Seconds to run the monitor per size (default: 30)")
+    parser.add_argument("--interval", type=float, default=2.0,
+                        help="Table refresh interval (default: 2)")
+    parser.add_argument("--runtime", default="runc", help="Runtime of the idle containers")
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON path")
+    args = parser.parse_args()
+
+    runs = []
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="fleet-monitor-", dir=RESULTS_DIR) as scratch, \
+            Sandbox(SandboxConfig(runtime=args.runtime, capture=False)) as sandbox:
+        sandbox.ensure_image()
+        for size in sorted(args.sizes):
+            print(f"Starting {size} idle sandboxes...", file=sys.stderr)
+            ids = start_fleet(sandbox, Path(scratch), size, args.runtime)
+            try:
+                result = measure_monitor(sandbox, args.duration, args.interval)
+                runs.append({"containers": size, "cpu_percent": result["cpu_percent"],
+                             "rows": result["rows"],
+                             "render_ms": summarize(result["render_ms"]),
+                             "docker_stats_ms": round(measure_docker_stats(ids), 1)})
+            finally:
+                for container_id in ids:
+                    sandbox.client.remove_container(container_id)
+
+    path = write_results("fleet-monitor", {
+        "duration_s": args.duration,
+        "interval_s": args.interval,
+        "runtime": args.runtime,
+        "runs": runs,
+    }, args.output)
+
+    print(f"\n{'containers':>10} {'monitor CPU':>12} {'render':>10} {'docker stats':>13}")
+    for run in runs:
+        print(f"{run['containers']:>10} {run['cpu_percent']:>11.2f}% "
+              f"{run['render_ms']['median']:>8.1f}ms {run['docker_stats_ms']:>11.0f}ms")
+    print("\nmonitor CPU: % of one core while watching the fleet; docker stats: one "
+          "--no-stream call over the same containers")
+
+    print(f"\n✅ Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
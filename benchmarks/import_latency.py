@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Import Latency Benchmark
+
+Compares cold import time of the heavy pre-installed packages between the
+standard sandbox image and the startup-optimized one, under runc and runsc.
+
+Each (image, runtime) pair gets one sandbox container in which
+probes/import_probe.py starts a fresh interpreter per sample.
+
+Usage:
+    ./benchmarks/import_latency.py [--repeat N] [--images IMG ...] [--runtimes RT ...]
+"""
+
+import argparse
+import io
+import json
+import sys
+from pathlib import Path
+
+from benchlib import BENCH_DIR, REPO_DIR, summarize, write_results
+
+from claude_sandbox import Sandbox, SandboxConfig
+from claude_sandbox.sandbox import warn
+
+MODULES = ["-", "pandas", "jinja2", "markdown", "pytest", "PIL.Image"]
+
+DOCKERFILES = {
+    "claude-sandbox:latest": REPO_DIR / "Dockerfile.claude-sandbox",
+    "claude-sandbox:optimized": REPO_DIR / "Dockerfile.claude-sandbox-optimized",
+}
+
+
+def run_probe(image: str, runtime: str, repeat: int) -> dict:
+    """Run the import probe in one sandbox.
+
+    Args:
+        image: Image to benchmark
+        runtime: Container runtime
+        repeat: Samples per module
+
+    Returns:
+        Dictionary of module -> summary (ms)
+    """
+    config = SandboxConfig(image=image, runtime=runtime, log_dir=BENCH_DIR / "results" / "logs")
+    if image in DOCKERFILES:
+        config.dockerfile = DOCKERFILES[image]
+
+    stdout = io.BytesIO()
+    with Sandbox(config) as sandbox:
+        result = sandbox.run(BENCH_DIR / "probes",
+                             ["python3", "import_probe.py", str(repeat), *MODULES],
+                             stdout=stdout)
+        size = sandbox.client.call("GET", f"/images/{image}/json").get("Size", 0)
+
+    if not result.success:
+        raise RuntimeError(f"probe failed in {image} under {runtime} (exit {result.exit_code})")
+
+    samples = json.loads(stdout.getvalue().decode().strip().splitlines()[-1])
+    return {
+        "image_size_mb": round(size / (1024 * 1024), 1),
+        "modules": {("interpreter" if m == "-" else m): summarize(s) for m, s in samples.items()},
+    }
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark cold import latency per image/runtime.")
+    parser.add_argument("--repeat", type=int, default=10, help="Samples per module (default: 10)")
+    parser.add_argument("--images", nargs="+", default=list(DOCKERFILES),
+                        help="Images to compare (first is the baseline)")
+    parser.add_argument("--runtimes", nargs="+", default=["runc", "runsc"])
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON path")
+    args = parser.parse_args()
+
+    with Sandbox(SandboxConfig()) as sandbox:
+        available = sandbox.runtimes()
+
+    runs = []
+    for runtime in args.runtimes:
+        if runtime not in available:
+            warn(f"Runtime {runtime} not available, skipping")
+            continue
+        for image in args.images:
+            print(f"Benchmarking {image} under {runtime}...", file=sys.stderr)
+            runs.append({"image": image, "runtime": runtime,
+                         **run_probe(image, runtime, args.repeat)})
+
+    if not runs:
+        print("❌ No runtimes available")
+        return 1
+
+    path = write_results("import-latency", {"repeat": args.repeat, "runs": runs}, args.output)
+
+    # Median table, with speedup against the baseline image per runtime
+    print()
+    print(f"{'runtime':<8} {'image':<28} {'size(MB)':>9} " +
+          " ".join(f"{m if m != '-' else 'python':>10}" for m in MODULES))
+    baseline = {}
+    for run in runs:
+        medians = [run["modules"][m if m != "-" else "interpreter"]["median"] for m in MODULES]
+        baseline.setdefault(run["runtime"], medians)
+        base = baseline[run["runtime"]]
+        cells = " ".join((f"{v:.0f}ms" if b == v else f"{v:.0f}ms/{b / v:.1f}x").rjust(10)
+                         for v, b in zip(medians, base))
+        print(f"{run['runtime']:<8} {run['image']:<28} {run['image_size_mb']:>9} {cells}")
+
+    print(f"\n✅ Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Workspace I/O Profile Benchmark
+
+Measures /workspace throughput under runc and under runsc with each gVisor
+I/O profile (SANDBOX_IO_PROFILE, see claude_sandbox/io_profiles.py):
+small-file create/stat/read and directory walks, the access pattern of the
+doc and static site generators, and large sequential reads.
+
+Each configuration gets one sandbox container in which probes/io_probe.py
+runs on a fresh scratch workspace. Profiles whose runtime is not registered
+with the daemon are skipped (python3 -m claude_sandbox --io-profiles shows
+how to register them).
+
+Usage:
+    ./benchmarks/io_throughput.py [--repeat N] [--files N] [--large-mb N]
+                                 [--profiles NAME ...] [--no-runc]
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from benchlib import BENCH_DIR, RESULTS_DIR, summarize, write_results
+
+from claude_sandbox import Sandbox, SandboxConfig
+from claude_sandbox.io_profiles import PROFILES
+from claude_sandbox.sandbox import warn
+
+LARGE_FILE = "large.bin"
+
+
+def prepare_workspace(directory: Path, large_mb: int) -> None:
+    """Copy the probe and write the large file into a scratch directory."""
+    shutil.copy(BENCH_DIR / "probes" / "io_probe.py", directory)
+    block = os.urandom(1024 * 1024)
+    with open(directory / LARGE_FILE, "wb") as f:
+        for _ in range(large_mb):
+            f.write(block)
+
+    # The sandbox user (uid 1000) creates the small files here
+    os.chmod(directory, 0o777)
+    os.chmod(directory / LARGE_FILE, 0o644)
+
+
+def run_probe(runtime: str, profile: str, repeat: int, files: int, large_mb: int) -> dict:
+    """Run the probe in one sandbox.
+
+    Args:
+        runtime: runc or runsc
+        profile: I/O profile name (ignored under runc)
+        repeat: Samples per benchmark
+        files: Small files per sample
+        large_mb: Size of the sequentially read file
+
+    Returns:
+        Dictionary with the runtime used, launch timings and benchmark -> summary
+    """
+    config = SandboxConfig(runtime=runtime, io_profile=profile, log_dir=RESULTS_DIR / "logs")
+
+    stdout = io.BytesIO()
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="io-throughput-", dir=RESULTS_DIR) as scratch:
+        prepare_workspace(Path(scratch), large_mb)
+        with Sandbox(config) as sandbox:
+            result = sandbox.run(scratch, ["python3", "io_probe.py", str(repeat), str(files),
+                                           LARGE_FILE], stdout=stdout)
+
+    if not result.success:
+        raise RuntimeError(f"probe failed under {runtime} with I/O profile {profile} "
+                           f"(exit {result.exit_code})")
+
+    samples = json.loads(stdout.getvalue().decode().strip().splitlines()[-1])
+    return {
+        "container_runtime": result.runtime,
+        "launch_ms": result.phases_ms,
+        "benchmarks": {name: summarize(values) for name, values in samples.items()},
+    }
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark workspace I/O under runc and gVisor's I/O profiles.")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark (default: 5)")
+    parser.add_argument("--files", type=int, default=2000,
+                        help="Small files per sample (default: 2000)")
+    parser.add_argument("--large-mb", type=int, default=256,
+                        help="Size of the sequentially read file in MB (default: 256)")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES),
+                        help="I/O profiles to measure under runsc (default: all)")
+    parser.add_argument("--no-runc", action="store_true", help="Skip the runc baseline")
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON path")
+    args = parser.parse_args()
+
+    with Sandbox(SandboxConfig()) as sandbox:
+        available = sandbox.runtimes()
+
+    configurations = [] if args.no_runc else [("runc", "default")]
+    if "runsc" in available:
+        for name in args.profiles:
+            if PROFILES[name].runtime in available:
+                configurations.append(("runsc", name))
+            else:
+                warn(f"Runtime {PROFILES[name].runtime} for I/O profile {name} not registered, "
+                     f"skipping ({PROFILES[name].install_command()})")
+    else:
+        warn("Runtime runsc not available, skipping the I/O profiles")
+
+    runs = []
+    for runtime, profile in configurations:
+        label = runtime if runtime == "runc" else f"runsc/{profile}"
+        print(f"Benchmarking {label}...", file=sys.stderr)
+        runs.append({"runtime": runtime, "io_profile": profile, "label": label,
+                     **run_probe(runtime, profile, args.repeat, args.files, args.large_mb)})
+
+    if not runs:
+        print("❌ No runtimes available")
+        return 1
+
+    path = write_results("io-throughput", {
+        "repeat": args.repeat,
+        "files": args.files,
+        "large_mb": args.large_mb,
+        "units": {"small_*": "files per second", "small_walk": "entries per second",
+                  "seq_read*": "MB per second"},
+        "profiles": {name: PROFILES[name].flags for name in args.profiles},
+        "runs": runs,
+    }, args.output)
+
+    # Median table, each configuration relative to the first one (higher is better)
+    width = max(len(run["label"]) for run in runs) + 10
+    print()
+    print(f"{'benchmark':<18}" + "".join(f"{run['label']:>{width}}" for run in runs))
+    baseline = runs[0]["benchmarks"]
+    for name in baseline:
+        cells = []
+        for run in runs:
+            value, base = run["benchmarks"][name]["median"], baseline[name]["median"]
+            cell = f"{value:,.0f}"
+            if run is not runs[0] and base:
+                cell += f" {value / base:.2f}x"
+            cells.append(f"{cell:>{width}}")
+        print(f"{name:<18}" + "".join(cells))
+    print("\nsmall_*: files/s; small_walk: entries/s; seq_read*: MB/s (median; "
+          "higher is better)")
+
+    print(f"\n✅ Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
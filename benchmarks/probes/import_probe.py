@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Import latency probe (runs inside the sandbox).
+
+Times fresh interpreter starts that import one module each, so every sample
+pays the full cold import cost the way a real sandbox run does.
+
+Usage:
+    python3 import_probe.py <repeat> <module> [module ...]
+
+Prints one JSON object: {"<module>": [ms, ms, ...], ...}. The pseudo-module
+"-" measures a bare interpreter start.
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+
+def time_import(module: str) -> float:
+    """Return wall time in ms for a fresh interpreter to import a module."""
+    code = "pass" if module == "-" else f"import {module}"
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> int:
+    """Main entry point."""
+    repeat = int(sys.argv[1])
+    modules = sys.argv[2:]
+
+    # One untimed pass so every module's files are in the page cache
+    for module in modules:
+        time_import(module)
+
+    samples = {module: [] for module in modules}
+    for _ in range(repeat):
+        # Interleave modules so drift affects them all equally
+        for module in modules:
+            samples[module].append(round(time_import(module), 3))
+
+    print(json.dumps(samples))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
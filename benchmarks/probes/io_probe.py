@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Workspace I/O probe (runs inside the sandbox).
+
+Measures small-file metadata and data throughput and large sequential reads
+on the workspace mount, so gVisor's I/O profiles can be compared with each
+other and with runc.
+
+Usage:
+    python3 io_probe.py <repeat> <files> <large-file>
+
+<large-file> is a file in the current directory prepared by the host, read
+back in 1MB blocks.
+
+Prints one JSON object: {"<benchmark>": [sample, ...], ...}. small_* samples
+are files per second, small_walk is directory entries per second, and
+seq_read samples are MB per second. seq_read_first is the first read of the
+large file in the container, before gVisor has cached anything.
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BLOCK = 1024 * 1024
+PAYLOAD = b"x" * 2048
+
+
+def rate(count: float, func: Callable[[], None]) -> float:
+    """Return count divided by the wall time of func() in seconds."""
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def small_files(base: Path, files: int) -> Dict[str, float]:
+    """Create, stat, read and walk files of 2KB spread over 10 directories."""
+    directory = base / f".io-probe-{os.getpid()}"
+    paths = [directory / f"d{i % 10}" / f"f{i}.txt" for i in range(files)]
+    for index in range(10):
+        (directory / f"d{index}").mkdir(parents=True)
+
+    def create() -> None:
+        for path in paths:
+            with open(path, "wb") as f:
+                f.write(PAYLOAD)
+
+    def stat() -> None:
+        for path in paths:
+            os.stat(path)
+
+    def read() -> None:
+        for path in paths:
+            with open(path, "rb") as f:
+                f.read()
+
+    def walk() -> None:
+        for _ in os.walk(directory):
+            pass
+
+    try:
+        return {"small_create": rate(files, create),
+                "small_stat": rate(files, stat),
+                "small_read": rate(files, read),
+                "small_walk": rate(files + 10, walk)}
+    finally:
+        shutil.rmtree(directory)
+
+
+def sequential_read(path: Path) -> float:
+    """Read a file in 1MB blocks; return MB per second."""
+    def read() -> None:
+        with open(path, "rb", buffering=0) as f:
+            while f.read(BLOCK):
+                pass
+    return rate(path.stat().st_size / BLOCK, read)
+
+
+def main() -> int:
+    """Main entry point."""
+    repeat = int(sys.argv[1])
+    files = int(sys.argv[2])
+    large = Path(sys.argv[3])
+
+    samples: Dict[str, List[float]] = {"seq_read_first": [round(sequential_read(large), 1)]}
+    for _ in range(repeat):
+        values = small_files(Path.cwd(), files)
+        values["seq_read"] = sequential_read(large)
+        for name, value in values.items():
+            samples.setdefault(name, []).append(round(value, 1))
+
+    print(json.dumps(samples))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
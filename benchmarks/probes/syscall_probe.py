@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Runtime overhead probe (runs inside the sandbox).
+
+Times syscall-heavy microbenchmarks and the sample project workloads, so the
+same numbers can be compared between runtimes and seccomp profiles.
+
+Usage:
+    python3 syscall_probe.py <repeat> <ops> [workload ...]
+
+Each workload is a "<directory>:<script>" pair under the current directory;
+the script is run with a fresh interpreter from inside its directory.
+
+Prints one JSON object: {"<benchmark>": [sample, ...], ...}. File, fork and
+socket samples are microseconds per operation (averaged over <ops>
+operations); interpreter and workload samples are milliseconds per run.
+"""
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+TMPFS_DIR = Path("/tmp/claude-tmp")
+
+# Pure-Python stdlib modules the interpreter does not load at startup
+IMPORT_MODULES = "json, csv, decimal, email.parser, http.client, logging, argparse"
+
+
+def per_op_us(ops: int, func: Callable[[], None]) -> float:
+    """Return wall time of func() in microseconds per operation."""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1e6 / ops
+
+
+def file_benchmarks(base: Path, ops: int) -> Dict[str, float]:
+    """Create, stat and read ops small files in a fresh directory under base."""
+    directory = base / f"probe-{os.getpid()}"
+    directory.mkdir(parents=True)
+    paths = [directory / f"f{i}" for i in range(ops)]
+    payload = b"x" * 512
+
+    def create() -> None:
+        for path in paths:
+            with open(path, "wb") as f:
+                f.write(payload)
+
+    def stat() -> None:
+        for path in paths:
+            os.stat(path)
+
+    def read() -> None:
+        for path in paths:
+            with open(path, "rb") as f:
+                f.read()
+
+    try:
+        return {"create": per_op_us(ops, create),
+                "stat": per_op_us(ops, stat),
+                "read": per_op_us(ops, read)}
+    finally:
+        shutil.rmtree(directory)
+
+
+def fork_exec(ops: int) -> float:
+    """Spawn /bin/true ops times."""
+    def spawn() -> None:
+        for _ in range(ops):
+            subprocess.run(["/bin/true"], check=True)
+    return per_op_us(ops, spawn)
+
+
+def socketpair_round_trip(ops: int) -> float:
+    """Ping-pong one byte over a socketpair between two threads."""
+    left, right = socket.socketpair()
+
+    def echo() -> None:
+        for _ in range(ops):
+            right.sendall(right.recv(1))
+
+    thread = threading.Thread(target=echo)
+    thread.start()
+
+    def ping() -> None:
+        for _ in range(ops):
+            left.sendall(b"x")
+            left.recv(1)
+
+    try:
+        return per_op_us(ops, ping)
+    finally:
+        thread.join()
+        left.close()
+        right.close()
+
+
+def time_command(command: List[str], cwd: Optional[Path] = None) -> float:
+    """Return wall time of a command in milliseconds."""
+    start = time.perf_counter()
+    subprocess.run(command, cwd=cwd, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> int:
+    """Main entry point."""
+    repeat = int(sys.argv[1])
+    ops = int(sys.argv[2])
+    workloads = [spec.split(":", 1) for spec in sys.argv[3:]]
+
+    # fork/exec is much slower than the other operations
+    fork_ops = max(1, ops // 10)
+
+    def sample() -> Dict[str, float]:
+        values = {}
+        for location, base in (("workspace", Path.cwd() / ".probe"), ("tmpfs", TMPFS_DIR)):
+            for op, value in file_benchmarks(base, ops).items():
+                values[f"file_{op}_{location}"] = value
+        values["fork_exec"] = fork_exec(fork_ops)
+        values["socketpair"] = socketpair_round_trip(ops)
+        values["python_start"] = time_command([sys.executable, "-c", "pass"])
+        values["python_import"] = time_command([sys.executable, "-c",
+                                                f"import {IMPORT_MODULES}"])
+        for directory, script in workloads:
+            values[f"workload_{Path(script).stem}"] = time_command(
+                [sys.executable, script], cwd=Path(directory))
+        return values
+
+    # One untimed pass so files are in the page cache and workloads have
+    # created their output directories
+    sample()
+
+    samples: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        for name, value in sample().items():
+            samples.setdefault(name, []).append(round(value, 3))
+
+    shutil.rmtree(Path.cwd() / ".probe", ignore_errors=True)
+    print(json.dumps(samples))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
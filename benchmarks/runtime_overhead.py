@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Runtime Overhead Benchmark
+
+Measures what gVisor costs our workloads compared to runc, with the
+repository's seccomp-profile.json and with Docker's default profile.
+
+Each (runtime, profile) pair gets one sandbox container in which
+probes/syscall_probe.py runs the microbenchmarks (file create/stat/read on
+the /workspace bind mount and on the tmpfs, fork/exec, Python import,
+socketpair round trips) and the sample project workloads (processor.py,
+doc_generator.py, generator.py) on a scratch copy of their workspaces.
+
+Usage:
+    ./benchmarks/runtime_overhead.py [--repeat N] [--ops N] [--runtimes RT ...]
+                                     [--profiles repo|default ...]
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+from benchlib import BENCH_DIR, REPO_DIR, RESULTS_DIR, summarize, write_results
+
+from claude_sandbox import Sandbox, SandboxConfig
+from claude_sandbox.sandbox import warn
+
+SAMPLES_DIR = REPO_DIR / "sample-projects"
+
+# Workload name -> (workspace directory, script)
+WORKLOADS = {
+    "processor": (SAMPLES_DIR / "2-simple" / "2.1-csv-processing" / "workspace", "processor.py"),
+    "doc_generator": (SAMPLES_DIR / "2-simple" / "2.2-doc-generator" / "workspace",
+                      "doc_generator.py"),
+    "generator": (SAMPLES_DIR / "3-moderate" / "3.1-static-site-generator" / "workspace",
+                  "generator.py"),
+}
+
+# Profile name -> seccomp profile passed to the sandbox (None: Docker's default)
+PROFILES = {
+    "repo": REPO_DIR / "seccomp-profile.json",
+    "default": None,
+}
+
+
+def prepare_workspace(directory: Path) -> List[str]:
+    """Copy the probe and the workload workspaces into a scratch directory.
+
+    Returns:
+        Workload arguments for the probe ("<directory>:<script>")
+    """
+    shutil.copy(BENCH_DIR / "probes" / "syscall_probe.py", directory)
+    specs = []
+    for name, (workspace, script) in WORKLOADS.items():
+        shutil.copytree(workspace, directory / name)
+        specs.append(f"{name}:{script}")
+
+    # The sandbox user (uid 1000) writes outputs and probe files here
+    for root, _, files in os.walk(directory):
+        os.chmod(root, 0o777)
+        for filename in files:
+            os.chmod(os.path.join(root, filename), 0o666)
+    return specs
+
+
+def run_probe(runtime: str, profile: str, repeat: int, ops: int) -> dict:
+    """Run the probe in one sandbox.
+
+    Args:
+        runtime: Container runtime
+        profile: Key of PROFILES
+        repeat: Samples per benchmark
+        ops: Operations per microbenchmark sample
+
+    Returns:
+        Dictionary with launch timings and benchmark -> summary
+    """
+    config = SandboxConfig(runtime=runtime, seccomp_profile=PROFILES[profile],
+                           log_dir=RESULTS_DIR / "logs")
+
+    stdout = io.BytesIO()
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="runtime-overhead-", dir=RESULTS_DIR) as scratch:
+        specs = prepare_workspace(Path(scratch))
+        with Sandbox(config) as sandbox:
+            result = sandbox.run(scratch, ["python3", "syscall_probe.py", str(repeat), str(ops),
+                                           *specs], stdout=stdout)
+
+    if not result.success:
+        raise RuntimeError(f"probe failed under {runtime} with the {profile} seccomp profile "
+                           f"(exit {result.exit_code})")
+
+    samples = json.loads(stdout.getvalue().decode().strip().splitlines()[-1])
+    return {
+        "launch_ms": result.phases_ms,
+        "benchmarks": {name: summarize(values) for name, values in samples.items()},
+    }
+
+
+def print_comparison(runs: List[dict], previous: dict) -> None:
+    """Print each median relative to the same configuration in earlier results."""
+    before = {(run["runtime"], run["seccomp"]): run["benchmarks"] for run in previous["runs"]}
+    print(f"\nChange against {previous['timestamp']} (current / previous median):")
+    for run in runs:
+        old = before.get((run["runtime"], run["seccomp"]))
+        if old is None:
+            print(f"  {run['runtime']}/{run['seccomp']}: not in previous results")
+            continue
+        cells = [f"{name}={summary['median'] / old[name]['median']:.2f}x"
+                 for name, summary in run["benchmarks"].items()
+                 if old.get(name, {}).get("median")]
+        print(f"  {run['runtime']}/{run['seccomp']}: " + ", ".join(cells))
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark runtime and seccomp overhead on syscalls and sample workloads.")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark (default: 5)")
+    parser.add_argument("--ops", type=int, default=1000,
+                        help="Operations per microbenchmark sample (default: 1000)")
+    parser.add_argument("--runtimes", nargs="+", default=["runc", "runsc"],
+                        help="Runtimes to compare (first is the baseline)")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES),
+                        help="Seccomp profiles: repo (seccomp-profile.json) and/or "
+                             "default (Docker's built-in profile)")
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON path")
+    parser.add_argument("--compare", type=Path, default=None, metavar="RESULTS",
+                        help="Earlier results JSON to compare medians against")
+    args = parser.parse_args()
+
+    with Sandbox(SandboxConfig()) as sandbox:
+        available = sandbox.runtimes()
+
+    runs = []
+    for runtime in args.runtimes:
+        if runtime not in available:
+            warn(f"Runtime {runtime} not available, skipping")
+            continue
+        for profile in args.profiles:
+            print(f"Benchmarking {runtime} with the {profile} seccomp profile...",
+                  file=sys.stderr)
+            runs.append({"runtime": runtime, "seccomp": profile,
+                         **run_probe(runtime, profile, args.repeat, args.ops)})
+
+    if not runs:
+        print("❌ No runtimes available")
+        return 1
+
+    path = write_results("runtime-overhead", {
+        "repeat": args.repeat,
+        "ops": args.ops,
+        "units": {"file_*, fork_exec, socketpair": "us per operation",
+                  "python_*, workload_*": "ms per run"},
+        "runs": runs,
+    }, args.output)
+
+    # Median table, each configuration relative to the first one
+    columns = [f"{run['runtime']}/{run['seccomp']}" for run in runs]
+    width = max(len(c) for c in columns) + 8
+    print()
+    print(f"{'benchmark':<24}" + "".join(f"{c:>{width}}" for c in columns))
+    baseline = runs[0]["benchmarks"]
+    for name in baseline:
+        cells = []
+        for run in runs:
+            value, base = run["benchmarks"][name]["median"], baseline[name]["median"]
+            spread = run["benchmarks"][name]["p90"] - run["benchmarks"][name]["p10"]
+            cell = f"{value:.1f}±{spread / 2:.1f}"
+            if run is not runs[0] and base:
+                cell += f" {value / base:.1f}x"
+            cells.append(f"{cell:>{width}}")
+        print(f"{name:<24}" + "".join(cells))
+    print("\nfile_*, fork_exec, socketpair: µs/op; python_*, workload_*: ms/run "
+          "(median ± half the p10-p90 spread)")
+
+    if args.compare:
+        print_comparison(runs, json.loads(args.compare.read_text()))
+
+    print(f"\n✅ Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
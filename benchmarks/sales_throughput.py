@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Sales Aggregation Throughput Benchmark
+
+Measures processor.py (sample project 2.1) on generated sales exports of
+growing size: the row-by-row engine against the pandas engine, with one
+worker and with a process pool. Reported per file size and engine: wall
+time, MB/s, rows/s and the peak RSS of the largest process, which should stay
+flat as the file grows. Every report is compared with the rows engine's:
+over millions of rows the rows engine's float sums drift by a cent or so,
+while the pandas engine's totals are exact.
+
+Runs on the host's Python (pandas and NumPy required, as in the sandbox
+image).
+
+Usage:
+    ./benchmarks/sales_throughput.py [--sizes MB ...] [--repeat N] [--workers N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchlib import REPO_DIR, RESULTS_DIR, summarize, write_results
+
+WORKSPACE = REPO_DIR / "sample-projects" / "2-simple" / "2.1-csv-processing" / "workspace"
+PRODUCTS = ["Widget", "Gadget", "Thingamajig", "Doohickey"]
+PRICES = [9.99, 19.99, 29.99, 49.99]
+BLOCK_ROWS = 1_000_000
+
+# Runs the command and prints the largest RSS (KB) among it and its workers.
+# A small wrapper, since a child forked from this process would report this
+# process's RSS as its own peak.
+PEAK_RSS_WRAPPER = ("import resource, subprocess, sys; "
+                    "code = subprocess.call(sys.argv[1:], stdout=subprocess.DEVNULL); "
+                    "print(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss); "
+                    "sys.exit(code)")
+
+
+def generate(path: Path, megabytes: int, seed: int = 0) -> int:
+    """Write a sales CSV of about megabytes MB like data/sales.csv; return its rows."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2024-01-01", "2024-12-31").strftime("%Y-%m-%d").to_numpy()
+    rows = 0
+    with open(path, "w") as f:
+        f.write("date,product,quantity,price\n")
+        while f.tell() < megabytes * 1024 * 1024:
+            block = pd.DataFrame({
+                "date": days[rng.integers(0, len(days), BLOCK_ROWS)],
+                "product": np.array(PRODUCTS)[rng.integers(0, len(PRODUCTS), BLOCK_ROWS)],
+                "quantity": rng.integers(1, 11, BLOCK_ROWS),
+                "price": np.array(PRICES)[rng.integers(0, len(PRICES), BLOCK_ROWS)],
+            })
+            block.to_csv(f, header=False, index=False)
+            rows += BLOCK_ROWS
+    return rows
+
+
+def run_engine(csv_path: Path, output: Path, args: List[str]) -> Tuple[float, int]:
+    """Run processor.py once.
+
+    Returns:
+        (wall seconds, peak RSS in MB of the largest process)
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", PEAK_RSS_WRAPPER, sys.executable,
+                             "processor.py", str(csv_path), str(output), *args],
+                            cwd=WORKSPACE, stdout=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"processor.py {' '.join(args)} failed ({result.returncode})")
+    return elapsed, int(result.stdout) // 1024
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the sales aggregation engines.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[32, 128, 512],
+                        help="CSV sizes in MB (default: 32 128 512)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per engine (default: 3)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Pool size for the multi-core run (default: CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=32,
+                        help="pandas engine chunk size in MB (default: 32)")
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON path")
+    args = parser.parse_args()
+
+    engines: Dict[str, List[str]] = {"rows": ["--engine", "rows"]}
+    for workers in sorted({1, args.workers}):
+        engines[f"pandas-{workers}"] = ["--engine", "pandas", "--workers", str(workers),
+                                        "--chunk-size", str(args.chunk_size)]
+
+    runs = []
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="sales-throughput-", dir=RESULTS_DIR) as scratch:
+        for size in sorted(args.sizes):
+            csv_path = Path(scratch) / f"sales-{size}mb.csv"
+            print(f"Generating {size}MB of sales data...", file=sys.stderr)
+            rows = generate(csv_path, size)
+            megabytes = csv_path.stat().st_size / 2**20
+
+            reports = {}
+            for engine, engine_args in engines.items():
+                times, peaks = [], []
+                for _ in range(args.repeat):
+                    output = Path(scratch) / f"summary-{engine}.txt"
+                    elapsed, peak = run_engine(csv_path, output, engine_args)
+                    times.append(elapsed)
+                    peaks.append(peak)
+                    reports[engine] = output.read_text()
+                median = summarize(times)["median"]
+                runs.append({"size_mb": round(megabytes, 1), "rows": rows, "engine": engine,
+                             "seconds": summarize(times),
+                             "mb_per_s": round(megabytes / median, 1),
+                             "rows_per_s": round(rows / median),
+                             "peak_rss_mb": max(peaks),
+                             "identical": reports[engine] == reports["rows"]})
+            csv_path.unlink()
+
+    path = write_results("sales-throughput", {
+        "repeat": args.repeat,
+        "workers": args.workers,
+        "chunk_mb": args.chunk_size,
+        "runs": runs,
+    }, args.output)
+
+    print(f"\n{'size':>8} {'engine':<11} {'time':>8} {'MB/s':>8} {'rows/s':>11} "
+          f"{'peak RSS':>9}  report")
+    for run in runs:
+        print(f"{run['size_mb']:>6.0f}MB {run['engine']:<11} {run['seconds']['median']:>7.2f}s "
+              f"{run['mb_per_s']:>8.1f} {run['rows_per_s']:>11,} {run['peak_rss_mb']:>7}MB  "
+              f"{'identical' if run['identical'] else 'differs'}")
+    print("\npeak RSS: largest single process (the pool's workers each hold one chunk); "
+          "report: compared with the rows engine's")
+
+    print(f"\n✅ Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Seccomp Filter Overhead Benchmark
+
+Measures what syscall filtering costs per call: no filter (unconfined), the
+repository's seccomp-profile.json, and a minimal profile generated by
+seccomp trace mode (python3 -m claude_sandbox --seccomp-trace).
+
+Each profile gets one sandbox container in which probes/seccomp_probe.py
+times cheap syscalls (getpid, read, fstat, openat, ...) in tight loops. Unless
+--generated is given, the generated profile is traced from the probe itself,
+so it allows exactly what the probe needs, hottest syscalls first.
+
+Usage:
+    ./benchmarks/seccomp_overhead.py [--repeat N] [--ops N] [--runtimes RT ...]
+                                     [--generated PROFILE]
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchlib import BENCH_DIR, REPO_DIR, RESULTS_DIR, summarize, write_results
+
+from claude_sandbox import Sandbox, SandboxConfig
+from claude_sandbox.sandbox import UNCONFINED, warn
+from claude_sandbox.seccomp import allowed_syscalls, minimal_profile, trace, write_json
+
+CURRENT_PROFILE = REPO_DIR / "seccomp-profile.json"
+PROBE = "seccomp_probe.py"
+
+
+def prepare_workspace(directory: Path) -> None:
+    """Copy the probe into a scratch directory the sandbox user can use."""
+    shutil.copy(BENCH_DIR / "probes" / PROBE, directory)
+    os.chmod(directory, 0o777)
+
+
+def generate_profile(output: Path) -> Path:
+    """Trace one short probe run and write its minimal profile.
+
+    Returns:
+        Path of the generated profile
+    """
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="seccomp-overhead-", dir=RESULTS_DIR) as scratch:
+        prepare_workspace(Path(scratch))
+        with Sandbox(SandboxConfig(log_dir=RESULTS_DIR / "logs")) as sandbox:
+            result = trace(sandbox, Path(scratch), ["python3", PROBE, "1", "100"],
+                           stdout=io.BytesIO(), stderr=io.BytesIO())
+    if result.exit_code != 0:
+        raise RuntimeError(f"traced probe failed (exit {result.exit_code})")
+    write_json(output, minimal_profile(result.counts,
+                                       json.loads(CURRENT_PROFILE.read_text())))
+    return output
+
+
+def run_probe(runtime: str, profile: Path, repeat: int, ops: int) -> dict:
+    """Run the probe in one sandbox.
+
+    Args:
+        runtime: Container runtime
+        profile: Seccomp profile, or Path("unconfined")
+        repeat: Samples per syscall
+        ops: Calls per sample
+
+    Returns:
+        Dictionary with syscall -> summary (ns per call)
+    """
+    config = SandboxConfig(runtime=runtime, seccomp_profile=profile,
+                           log_dir=RESULTS_DIR / "logs")
+
+    stdout = io.BytesIO()
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="seccomp-overhead-", dir=RESULTS_DIR) as scratch:
+        prepare_workspace(Path(scratch))
+        with Sandbox(config) as sandbox:
+            result = sandbox.run(scratch, ["python3", PROBE, str(repeat), str(ops)],
+                                 stdout=stdout)
+
+    if not result.success:
+        raise RuntimeError(f"probe failed under {runtime} with {profile} (exit {result.exit_code})")
+
+    samples = json.loads(stdout.getvalue().decode().strip().splitlines()[-1])
+    return {"benchmarks": {name: summarize(values) for name, values in samples.items()}}
+
+
+def filter_positions(profile: Optional[Path], names: List[str]) -> Dict[str, Optional[int]]:
+    """Return each syscall's index in the profile's allowlist (None: not listed)."""
+    if profile is None or not profile.is_file():
+        return {}
+    allowed = allowed_syscalls(json.loads(profile.read_text()))
+    return {name: allowed.index(name) if name in allowed else None for name in names}
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark per-syscall seccomp filter overhead.")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per syscall (default: 5)")
+    parser.add_argument("--ops", type=int, default=100000,
+                        help="Calls per sample (default: 100000)")
+    parser.add_argument("--runtimes", nargs="+", default=["runc"],
+                        help="Runtimes to measure (default: runc)")
+    parser.add_argument("--generated", type=Path, default=None, metavar="PROFILE",
+                        help="Generated profile to compare (default: trace the probe)")
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON path")
+    args = parser.parse_args()
+
+    with Sandbox(SandboxConfig()) as sandbox:
+        available = sandbox.runtimes()
+
+    generated = args.generated
+    if generated is None:
+        print("Tracing the probe for a generated profile...", file=sys.stderr)
+        generated = generate_profile(RESULTS_DIR / "seccomp-overhead-generated.json")
+
+    # Profile name -> seccomp profile passed to the sandbox
+    profiles = {"none": Path(UNCONFINED), "current": CURRENT_PROFILE, "generated": generated}
+
+    runs = []
+    for runtime in args.runtimes:
+        if runtime not in available:
+            warn(f"Runtime {runtime} not available, skipping")
+            continue
+        for name, profile in profiles.items():
+            print(f"Benchmarking {runtime} with the {name} seccomp profile...", file=sys.stderr)
+            run = {"runtime": runtime, "seccomp": name,
+                   **run_probe(runtime, profile, args.repeat, args.ops)}
+            run["positions"] = filter_positions(profile, list(run["benchmarks"]))
+            runs.append(run)
+
+    if not runs:
+        print("❌ No runtimes available")
+        return 1
+
+    path = write_results("seccomp-overhead", {
+        "repeat": args.repeat,
+        "ops": args.ops,
+        "units": "ns per call",
+        "profiles": {name: str(profile) for name, profile in profiles.items()},
+        "allowlist_sizes": {name: len(allowed_syscalls(json.loads(profile.read_text())))
+                            for name, profile in profiles.items() if profile.is_file()},
+        "runs": runs,
+    }, args.output)
+
+    # Net cost per call (minus the loop baseline), each profile against no filter
+    for runtime in dict.fromkeys(run["runtime"] for run in runs):
+        group = [run for run in runs if run["runtime"] == runtime]
+        print(f"\n{runtime}")
+        print(f"{'syscall':<16}" + "".join(f"{run['seccomp']:>20}" for run in group))
+        unfiltered = group[0]["benchmarks"]
+        for name in unfiltered:
+            if name == "baseline":
+                continue
+            cells = []
+            for run in group:
+                bench = run["benchmarks"]
+                net = bench[name]["median"] - bench["baseline"]["median"]
+                cell = f"{net:.0f}"
+                if run is not group[0]:
+                    base = unfiltered[name]["median"] - unfiltered["baseline"]["median"]
+                    cell += f" ({net - base:+.0f})"
+                position = run["positions"].get(name)
+                if position is not None:
+                    cell += f" #{position}"
+                cells.append(f"{cell:>20}")
+            print(f"{name:<16}" + "".join(cells))
+    print("\nns per call minus the loop baseline (median); (+N): filter cost over no "
+          "filter; #N: position in the profile's allowlist")
+
+    print(f"\n✅ Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+"""Python API for the Claude sandbox.
+
+Example:
+    from claude_sandbox import Sandbox, SandboxConfig
+
+    with Sandbox(SandboxConfig(memory="2g", cpus="2")) as sandbox:
+        result = sandbox.run("./my-project", ["python3", "hello.py"])
+        print(result.exit_code, result.duration_ms)
+"""
+
+from .docker_api import DockerClient, DockerError
+from .sandbox import Sandbox, SandboxConfig, SandboxError, SandboxResult
+
+__all__ = [
+    "DockerClient",
+    "DockerError",
+    "Sandbox",
+    "SandboxConfig",
+    "SandboxError",
+    "SandboxResult",
+]
@@ -0,0 +1,763 @@
+"""Command-line launcher: python3 -m claude_sandbox <workspace-dir> [command]
+
+Takes the same arguments and SANDBOX_* environment variables as
+run-sandbox.sh, but talks to the Docker socket directly.
+
+Batch mode runs every job of a JSONL file in one container:
+    python3 -m claude_sandbox --batch jobs.jsonl [--parallel N] <workspace-dir>
+
+Sample mode records a container's cgroup stats until it exits:
+    python3 -m claude_sandbox --sample <container> [--rate HZ] [--output FILE]
+
+Watch mode prints a container's OOM events, peak memory and CPU throttling
+once it exits (the complete event's "resources"):
+    python3 -m claude_sandbox --watch <container> [--wait SECS]
+
+Right-size mode prints the limits for a workload signature (used by
+run-sandbox.sh when SANDBOX_RIGHTSIZE=auto):
+    python3 -m claude_sandbox --rightsize <signature> [--oom-at MEMORY]
+
+Seccomp trace mode runs a command once under strace and writes a minimal
+seccomp profile for it, plus its syscall histogram:
+    python3 -m claude_sandbox --seccomp-trace [options] <workspace-dir> [command]
+
+I/O profile mode lists the gVisor workspace I/O profiles (SANDBOX_IO_PROFILE)
+and whether their runtimes are registered:
+    python3 -m claude_sandbox --io-profiles
+
+Capture mode copies a container's output into a rotating, indexed capture
+until it exits (used by run-sandbox.sh); logs mode reads a capture by line:
+    python3 -m claude_sandbox --capture <container> [--output DIR]
+    python3 -m claude_sandbox --logs <container-or-dir> [--tail N | --from LINE] [--follow]
+
+Dependency mode installs a workspace's requirements file offline from the
+wheelhouse into a cached environment (used by run-sandbox.sh), fills the
+wheelhouse (the one step with network), or shows and trims the cache:
+    python3 -m claude_sandbox --deps <workspace-dir> [--owner PID]
+    python3 -m claude_sandbox --wheelhouse (-r <requirements> | <package> ...)
+    python3 -m claude_sandbox --deps-cache [--prune [SIZE]]
+
+Top mode shows CPU, memory, pids, I/O and uptime of every running sandbox
+in one refreshing table, from one streaming stats subscription each:
+    python3 -m claude_sandbox --top [--sort KEY] [--interval SECS] [--once]
+
+Queue mode reserves host capacity for run-sandbox.sh (SANDBOX_QUEUE=1), or
+shows the admission queue:
+    python3 -m claude_sandbox --admit <container> [--owner PID]
+    python3 -m claude_sandbox --release <ticket>
+    python3 -m claude_sandbox --queue [--json]
+"""
+
+import json
+import os
+import shutil
+import signal
+import sys
+import termios
+import threading
+import time
+import tty
+from pathlib import Path
+
+from .batch import BatchRunner, load_jobs
+from .cgroup import (DEFAULT_RATE_HZ, CgroupError, CgroupSampler, CgroupWatcher, process_cgroup,
+                     wait_for_pid)
+from .admission import AdmissionError
+from .docker_api import DockerClient, DockerError
+from .deps import DependencyCache, read_requirements
+from .fleet import DEFAULT_INTERVAL, PREFIX, SORT_KEYS, FleetMonitor, render
+from .io_profiles import PROFILES as IO_PROFILES
+from .output_log import (STREAM_NAMES, OutputReader, OutputWriter, capture_container,
+                         format_line, output_dir)
+from .rightsize import (HISTORY_RUNS, format_cpus, format_memory, recommend, retry_memory,
+                        signature)
+from .sandbox import Sandbox, SandboxConfig, SandboxError, error, info, parse_memory
+from .seccomp import allowed_syscalls, minimal_profile, trace, write_json
+
+USAGE = """\
+Usage: python3 -m claude_sandbox <workspace-dir> [command]
+       python3 -m claude_sandbox --batch <jobs.jsonl> [options] <workspace-dir>
+
+Run a command in a secure Docker+gVisor sandbox via the Docker Engine API.
+
+Arguments:
+  workspace-dir    Directory to mount as /workspace in container (required)
+  command          Command to run in container (optional, default: /bin/bash)
+
+Batch Options:
+  --batch FILE        Run each job in FILE (JSONL) in one shared container
+  --parallel N        Jobs to run concurrently (default: 1)
+  --job-timeout SECS  Timeout for jobs that don't set one (default: none)
+
+Sample Options (python3 -m claude_sandbox --sample <container> [options]):
+  --rate HZ           cgroup samples per second (default: 20)
+  --output FILE       Samples file (default: logs/<container>.cgroup.jsonl)
+  --wait SECS         How long to wait for the container to start (default: 30)
+
+Watch Options (python3 -m claude_sandbox --watch <container> [options]):
+  --wait SECS         How long to wait for the container to start (default: 30)
+
+Right-Size Options (python3 -m claude_sandbox --rightsize <signature> [options]):
+  --oom-at MEMORY     Print the memory to retry a run OOM-killed at MEMORY
+                      (exit 1 if already at SANDBOX_MEMORY)
+
+Seccomp Trace Options (python3 -m claude_sandbox --seccomp-trace [options] <workspace-dir>):
+  --output FILE       Generated profile (default: logs/seccomp/<signature>.json)
+  --histogram FILE    Syscall histogram (default: logs/seccomp/<signature>.syscalls.json)
+  --runtime RT        Runtime to trace under (default: runc)
+
+Capture Options (python3 -m claude_sandbox --capture <container> [options]):
+  --output DIR        Capture directory (default: logs/<container>.output)
+  --wait SECS         How long to wait for the container to start (default: 30)
+
+Logs Options (python3 -m claude_sandbox --logs <container-or-dir> [options]):
+  --tail N            Print the last N lines (default: all)
+  --from LINE         Print from line LINE (0-based); with --count N, N lines
+  --follow            Keep printing new lines until the run's output is complete
+  --stream NAME       Only stdout or stderr
+  --numbers           Prefix line number, arrival time and "!" for stderr
+
+Dependency Options:
+  --deps DIR          Prepare DIR's requirements file; print the environment's
+                      path and the start event's "deps" JSON
+  --owner PID         Process using the environment (default: the caller)
+  --wheelhouse ...    Download or build wheels for -r FILE or packages into
+                      the wheelhouse (uses the network)
+  --deps-cache        List cached environments, least recently used first
+  --prune [SIZE]      Evict least recently used environments down to SIZE
+                      (default: SANDBOX_DEPS_CACHE_SIZE)
+
+Top Options (python3 -m claude_sandbox --top [options]):
+  --sort KEY          cpu, mem, pids, io, net, uptime or name (default: cpu)
+  --interval SECS     Refresh interval (default: 2)
+  --once              Print the table once and exit
+  --prefix PREFIX     Container name prefix (default: claude-sandbox-)
+  Keys: c/m/p/i/n/u/a sort by cpu/mem/pids/io/net/uptime/name, r reverse, q quit
+
+Queue Options:
+  --admit NAME        Wait until NAME's limits fit the host capacity, then
+                      print "<ticket> <admission JSON>"
+  --owner PID         Process holding the reservation (default: the caller)
+  --release TICKET    Give up a reservation
+  --queue             Show capacity, reservations and waiting launches
+
+Environment Variables:
+  SANDBOX_MEMORY      Memory limit (default: 4g)
+  SANDBOX_CPUS        CPU limit (default: 4)
+  SANDBOX_NETWORK     Network mode (default: none)
+  SANDBOX_RUNTIME     Docker runtime (default: runsc)
+  SANDBOX_PIDS_LIMIT  Process limit (default: 512)
+  SANDBOX_PROBE_TTL   Seconds to cache runtime/image checks (default: 300)
+  SANDBOX_IO_PROFILE  gVisor workspace I/O profile (default: default; see --io-profiles)
+  SANDBOX_CAPTURE     Set to 0 to not keep the container's output (default: 1)
+  SANDBOX_CAPTURE_ROTATE    Capture segment size (default: 8m)
+  SANDBOX_CAPTURE_KEEP      Segments kept per run (default: 0, all)
+  SANDBOX_CAPTURE_COMPRESS  Set to 1 to gzip rotated segments (default: 0)
+  SANDBOX_REQUIREMENTS    Requirements file in the workspace, or "none"
+                          (default: requirements.txt)
+  SANDBOX_WHEELHOUSE      Wheel directory installs use (default: .sandbox-wheelhouse)
+  SANDBOX_DEPS_DIR        Environment cache (default: .sandbox-cache/deps)
+  SANDBOX_DEPS_CACHE_SIZE Cache size before LRU eviction (default: 10g)
+  SANDBOX_SECCOMP     Seccomp profile, or "unconfined" (default: seccomp-profile.json)
+  SANDBOX_RIGHTSIZE   off, record or auto: size limits from history (default: off)
+  SANDBOX_QUEUE       Set to 1 to wait for host capacity before starting (default: 0)
+  SANDBOX_QUEUE_POLICY  fifo or priority (default: fifo)
+  SANDBOX_PRIORITY    Priority under the priority policy, higher first (default: 0)
+  SANDBOX_HOST_MEMORY, SANDBOX_HOST_CPUS, SANDBOX_HOST_PIDS
+                      Host capacity (default: the daemon's memory and CPUs, 32768 pids)
+"""
+
+
+def main(argv: list) -> int:
+    """Main entry point."""
+    if not argv or argv[0] in ("-h", "--help"):
+        print(USAGE)
+        return 0 if argv else 1
+
+    if argv[0] == "--batch":
+        return batch_main(argv[1:])
+    if argv[0] == "--sample":
+        return sample_main(argv[1:])
+    if argv[0] == "--watch":
+        return watch_main(argv[1:])
+    if argv[0] == "--rightsize":
+        return rightsize_main(argv[1:])
+    if argv[0] == "--capture":
+        return capture_main(argv[1:])
+    if argv[0] == "--logs":
+        return logs_main(argv[1:])
+    if argv[0] == "--deps":
+        return deps_main(argv[1:])
+    if argv[0] == "--wheelhouse":
+        return wheelhouse_main(argv[1:])
+    if argv[0] == "--deps-cache":
+        return deps_cache_main(argv[1:])
+    if argv[0] == "--top":
+        return top_main(argv[1:])
+    if argv[0] == "--io-profiles":
+        return io_profiles_main(argv[1:])
+    if argv[0] == "--seccomp-trace":
+        return seccomp_trace_main(argv[1:])
+    if argv[0] in ("--admit", "--release", "--queue"):
+        return queue_main(argv)
+
+    workspace = Path(argv[0])
+    command = argv[1:] or ["/bin/bash"]
+
+    try:
+        config = SandboxConfig.from_env()
+        ttl = float(os.environ.get("SANDBOX_PROBE_TTL", "300"))
+        with Sandbox(config, cache_ttl=ttl) as sandbox:
+            info(f"Starting sandbox: {' '.join(command)}")
+            result = sandbox.run(workspace, command)
+    except (SandboxError, DockerError, ValueError) as e:
+        error(str(e))
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+    if result.success:
+        info(f"Sandbox exited successfully ({result.duration_ms}ms)")
+    else:
+        error(f"Sandbox exited with code: {result.exit_code} ({result.duration_ms}ms)")
+    return result.exit_code
+
+
+def batch_main(argv: list) -> int:
+    """Entry point for --batch: argv starts with the jobs file."""
+    options = {"--parallel": "1", "--job-timeout": None}
+    jobs_file = argv[0] if argv else None
+    args = argv[1:]
+    while args and args[0] in options:
+        if len(args) < 2:
+            error(f"{args[0]} requires a value")
+            return 1
+        options[args[0]] = args[1]
+        args = args[2:]
+    if not jobs_file or len(args) != 1:
+        print(USAGE)
+        return 1
+
+    timeout = options["--job-timeout"]
+
+    try:
+        config = SandboxConfig.from_env()
+        ttl = float(os.environ.get("SANDBOX_PROBE_TTL", "300"))
+        jobs = load_jobs(Path(jobs_file), float(timeout) if timeout else None)
+        if not jobs:
+            error(f"No jobs in {jobs_file}")
+            return 1
+        with Sandbox(config, cache_ttl=ttl) as sandbox:
+            runner = BatchRunner(sandbox, Path(args[0]), parallel=int(options["--parallel"]))
+            info(f"Starting batch {runner.name}: {len(jobs)} jobs, "
+                 f"parallel {runner.parallel}")
+            results = runner.run(jobs)
+    except (SandboxError, DockerError, OSError, ValueError) as e:
+        error(str(e))
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+    failed = [r.job.id for r in results if not r.success]
+    info(f"Job output: {runner.output_dir}")
+    if failed:
+        error(f"{len(failed)}/{len(results)} jobs failed: {', '.join(failed)}")
+        return 1
+    info(f"All {len(results)} jobs passed")
+    return 0
+
+
+def sample_main(argv: list) -> int:
+    """Entry point for --sample: sample a container until it exits or SIGTERM.
+
+    Prints the sampling summary as JSON on stdout.
+    """
+    options = {"--rate": str(DEFAULT_RATE_HZ), "--output": None, "--wait": "30"}
+    container = argv[0] if argv else None
+    args = argv[1:]
+    while args and args[0] in options and len(args) >= 2:
+        options[args[0]] = args[1]
+        args = args[2:]
+    if not container or args:
+        print(USAGE)
+        return 1
+
+    output = Path(options["--output"] or f"logs/{container}.cgroup.jsonl")
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    try:
+        with DockerClient() as client:
+            pid = wait_for_pid(client, container, float(options["--wait"]), stop)
+        sampler = CgroupSampler(process_cgroup(pid), output, float(options["--rate"]),
+                                {"container": container})
+    except (CgroupError, DockerError, ValueError) as e:
+        error(f"cgroup sampler: {e}")
+        return 1
+
+    sampler.start()
+    while sampler.is_alive() and not stop.wait(0.1):
+        pass
+    print(json.dumps(sampler.stop()))
+    return 0
+
+
+def watch_main(argv: list) -> int:
+    """Entry point for --watch: keep a container's final cgroup counters.
+
+    Prints them as JSON on stdout when the container exits or on SIGTERM
+    ({} if its cgroup could not be read).
+    """
+    wait = "30"
+    if len(argv) == 3 and argv[1] == "--wait":
+        wait = argv[2]
+    elif len(argv) != 1:
+        print(USAGE)
+        return 1
+
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    try:
+        with DockerClient() as client:
+            pid = wait_for_pid(client, argv[0], float(wait), stop)
+        watcher = CgroupWatcher(process_cgroup(pid))
+    except (CgroupError, DockerError, OSError, ValueError):
+        print("{}")
+        return 1
+
+    watcher.start()
+    while watcher.is_alive() and not stop.wait(0.05):
+        pass
+    print(json.dumps(watcher.stop(), separators=(",", ":")))
+    return 0
+
+
+def rightsize_main(argv: list) -> int:
+    """Entry point for --rightsize: print limits for a workload signature.
+
+    Prints "<memory> <cpus> <runs> <reason>" for a new run, or with --oom-at
+    the memory to retry with. SANDBOX_MEMORY/SANDBOX_CPUS are the ceiling.
+    """
+    if len(argv) not in (1, 3) or (len(argv) == 3 and argv[1] != "--oom-at"):
+        print(USAGE)
+        return 1
+
+    from .history import HistoryIndex  # not imported by the package, see history.py
+
+    config = SandboxConfig.from_env()
+    try:
+        ceiling_memory = parse_memory(config.memory)
+        if len(argv) == 3:
+            retry = retry_memory(parse_memory(argv[2]), ceiling_memory)
+            if retry is None:
+                return 1
+            print(format_memory(retry))
+            return 0
+        with HistoryIndex(config.log_dir) as index:
+            index.refresh()
+            usage = index.usage(argv[0], HISTORY_RUNS)
+    except (SandboxError, ValueError, OSError) as e:
+        error(f"rightsize: {e}")
+        return 1
+
+    limits = recommend(usage, ceiling_memory, float(config.cpus), config.rightsize_margin,
+                       config.rightsize_min_runs)
+    print(format_memory(limits.memory), format_cpus(limits.cpus), limits.runs, limits.reason)
+    return 0
+
+
+def seccomp_trace_main(argv: list) -> int:
+    """Entry point for --seccomp-trace: derive a minimal profile from one run.
+
+    The profile's default action and architectures come from the configured
+    profile (SANDBOX_SECCOMP), which the histogram is also compared against.
+    """
+    options = {"--output": None, "--histogram": None, "--runtime": "runc"}
+    args = list(argv)
+    while args and args[0] in options:
+        if len(args) < 2:
+            error(f"{args[0]} requires a value")
+            return 1
+        options[args[0]] = args[1]
+        args = args[2:]
+    if not args:
+        print(USAGE)
+        return 1
+
+    workspace = Path(args[0])
+    command = args[1:] or ["/bin/bash"]
+    sig = signature(str(workspace.resolve()), " ".join(command))
+
+    base = {}
+    try:
+        config = SandboxConfig.from_env()
+        # Outside the run logs, which the history index reads as runs
+        output = Path(options["--output"] or config.log_dir / "seccomp" / f"{sig}.json")
+        histogram_path = Path(options["--histogram"]
+                              or config.log_dir / "seccomp" / f"{sig}.syscalls.json")
+        if config.seccomp_profile is not None and config.seccomp_profile.is_file():
+            base = json.loads(config.seccomp_profile.read_text())
+        with Sandbox(config) as sandbox:
+            info(f"Tracing syscalls: {' '.join(command)}")
+            result = trace(sandbox, workspace, command, options["--runtime"])
+    except (SandboxError, DockerError, OSError, ValueError) as e:
+        error(f"seccomp trace: {e}")
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+    profile = minimal_profile(result.counts, base)
+    histogram = result.histogram(allowed_syscalls(base) if base else None)
+    write_json(output, profile)
+    write_json(histogram_path, histogram)
+
+    print(f"{'syscall':<24}{'calls':>12}{'errors':>10}{'share':>9}")
+    for row in histogram["syscalls"][:15]:
+        print(f"{row['name']:<24}{row['calls']:>12}{row['errors']:>10}{row['percent']:>8.1f}%")
+    if len(histogram["syscalls"]) > 15:
+        print(f"... {len(histogram['syscalls']) - 15} more in {histogram_path}")
+    print()
+    if base:
+        print(f"Allowlist: {len(allowed_syscalls(base))} syscalls in {config.seccomp_profile}, "
+              f"{len(profile['syscalls'][0]['names'])} generated")
+        if histogram["denied_by_current"]:
+            error(f"Denied by the current profile: {', '.join(histogram['denied_by_current'])}")
+    if result.exit_code != 0:
+        error(f"Traced command exited with code {result.exit_code}; "
+              f"the profile only covers the paths it took")
+    info(f"Profile written to {output} (use with SANDBOX_SECCOMP={output})")
+    info(f"Histogram written to {histogram_path}")
+    return 0
+
+
+def capture_main(argv: list) -> int:
+    """Entry point for --capture: copy a container's output until it exits.
+
+    Prints the capture summary (the complete event's "output") as JSON on
+    stdout, or {} if the container could not be read.
+    """
+    options = {"--output": None, "--wait": "30"}
+    container = argv[0] if argv else None
+    args = argv[1:]
+    while args and args[0] in options and len(args) >= 2:
+        options[args[0]] = args[1]
+        args = args[2:]
+    if not container or args:
+        print(USAGE)
+        return 1
+
+    def interrupt(*_) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, interrupt)
+    config = SandboxConfig.from_env()
+    directory = Path(options["--output"] or output_dir(config.log_dir, container))
+    try:
+        with DockerClient() as client:
+            # The logs endpoint serves everything from the start, but only
+            # follows a container once it has started
+            deadline = time.monotonic() + float(options["--wait"])
+            while client.inspect_container(container)["State"]["Status"] == "created":
+                if time.monotonic() >= deadline:
+                    raise DockerError(0, f"Container {container} did not start")
+                time.sleep(0.05)
+            with OutputWriter(directory, parse_memory(config.capture_rotate),
+                              config.capture_keep, config.capture_compress) as writer:
+                try:
+                    capture_container(client, container, writer)
+                except KeyboardInterrupt:
+                    pass
+    except (DockerError, SandboxError, OSError, ValueError, KeyboardInterrupt):
+        print("{}")
+        return 1
+
+    print(json.dumps(writer.summary(), separators=(",", ":")))
+    return 0
+
+
+def logs_main(argv: list) -> int:
+    """Entry point for --logs: print a captured run's output by line."""
+    options = {"--tail": None, "--from": None, "--count": None, "--stream": None}
+    flags = {"--follow": False, "--numbers": False}
+    target = argv[0] if argv else None
+    args = argv[1:]
+    while args:
+        if args[0] in flags:
+            flags[args.pop(0)] = True
+        elif args[0] in options and len(args) >= 2:
+            options[args[0]] = args[1]
+            args = args[2:]
+        else:
+            print(USAGE)
+            return 1
+    streams = {name: stream for stream, name in STREAM_NAMES.items()}
+    if not target or (options["--stream"] and options["--stream"] not in streams):
+        print(USAGE)
+        return 1
+
+    directory = Path(target)
+    if not directory.is_dir():
+        directory = output_dir(SandboxConfig.from_env().log_dir, target)
+    stream = streams.get(options["--stream"] or "")
+    try:
+        reader = OutputReader(directory)
+        total = len(reader)
+        if options["--tail"] is not None:
+            lines = reader.tail(int(options["--tail"]), stream)
+        else:
+            start = int(options["--from"] or 0)
+            count = int(options["--count"]) if options["--count"] else max(total - start, 0)
+            lines = reader.read(start, count, stream)
+        for line in lines:
+            print(format_line(*line, numbers=flags["--numbers"]))
+        if flags["--follow"]:
+            position = lines[-1][0] + 1 if lines else total
+            for line in reader.follow(max(position, total), stream):
+                print(format_line(*line, numbers=flags["--numbers"]), flush=True)
+    except (OSError, ValueError) as e:
+        error(f"logs: {e}")
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+def deps_main(argv: list) -> int:
+    """Entry point for --deps: prepare a workspace's dependency environment.
+
+    Prints the environment's path and, on the next line, the start event's
+    "deps" JSON; prints nothing if the workspace has no requirements.
+    """
+    if len(argv) not in (1, 3) or (len(argv) == 3 and argv[1] != "--owner"):
+        print(USAGE)
+        return 1
+    owner = int(argv[2]) if len(argv) == 3 else os.getppid()
+    config = SandboxConfig.from_env()
+    try:
+        with Sandbox(config) as sandbox:
+            # run-sandbox.sh has resolved the runtime already
+            deps = sandbox.dependencies(sandbox.check_workspace(argv[0]), config.runtime, owner)
+    except (SandboxError, DockerError, OSError, ValueError) as e:
+        error(str(e))
+        return 1
+    if deps is not None:
+        print(deps["path"])
+        print(json.dumps({k: v for k, v in deps.items() if k != "path"},
+                         separators=(",", ":")))
+    return 0
+
+
+def wheelhouse_main(argv: list) -> int:
+    """Entry point for --wheelhouse: add wheels for requirements to the wheelhouse."""
+    if not argv:
+        print(USAGE)
+        return 1
+    try:
+        requirements = read_requirements(Path(argv[1])) if argv[0] == "-r" and len(argv) == 2 \
+            else list(argv)
+    except OSError as e:
+        error(str(e))
+        return 1
+
+    config = SandboxConfig.from_env()
+    try:
+        with Sandbox(config) as sandbox:
+            info(f"Fetching wheels for {len(requirements)} requirements into {config.wheelhouse}")
+            exit_code = sandbox.fill_wheelhouse(requirements)
+    except (SandboxError, DockerError) as e:
+        error(str(e))
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    if exit_code != 0:
+        error(f"pip wheel failed (exit {exit_code})")
+        return exit_code
+    info(f"Wheelhouse: {len(list(config.wheelhouse.glob('*.whl')))} wheels")
+    return 0
+
+
+def deps_cache_main(argv: list) -> int:
+    """Entry point for --deps-cache: list or trim the dependency environments."""
+    config = SandboxConfig.from_env()
+    try:
+        cache = DependencyCache(config.deps_dir, parse_memory(config.deps_cache_size))
+        limit = parse_memory(argv[1]) if argv[:1] == ["--prune"] and len(argv) == 2 else None
+    except SandboxError as e:
+        error(str(e))
+        return 1
+    if argv[:1] == ["--prune"] and len(argv) <= 2:
+        for key in cache.evict(limit):
+            info(f"Evicted {key}")
+        return 0
+    if argv:
+        print(USAGE)
+        return 1
+
+    entries = cache.entries()
+    now = time.time()
+    total = sum(entry["bytes"] for entry in entries)
+    print(f"{len(entries)} environments, {total / 2**20:.0f}MB of "
+          f"{cache.max_bytes / 2**20:.0f}MB ({config.deps_dir})")
+    for entry in entries:
+        requirements = ", ".join(entry["requirements"])
+        print(f"  {entry['key']}  {entry['bytes'] / 2**20:7.1f}MB  "
+              f"used {(now - entry['last_used']) / 3600:6.1f}h ago  "
+              f"{'in use  ' if entry['in_use'] else ''}{requirements[:60]}")
+    return 0
+
+
+def top_main(argv: list) -> int:
+    """Entry point for --top: a refreshing table of all running sandboxes."""
+    options = {"--sort": "cpu", "--interval": str(DEFAULT_INTERVAL), "--prefix": PREFIX}
+    once = False
+    args = list(argv)
+    while args:
+        if args[0] == "--once":
+            once = True
+            args.pop(0)
+        elif args[0] in options and len(args) >= 2:
+            options[args[0]] = args[1]
+            args = args[2:]
+        else:
+            print(USAGE)
+            return 1
+    if options["--sort"] not in SORT_KEYS:
+        error(f"Invalid --sort key: {options['--sort']} (choose from {', '.join(SORT_KEYS)})")
+        return 1
+    try:
+        interval = float(options["--interval"])
+    except ValueError:
+        interval = 0
+    if not 0 < interval < float("inf"):
+        error(f"Invalid --interval: {options['--interval']} (seconds, greater than 0)")
+        return 1
+
+    keys = {"c": "cpu", "m": "mem", "p": "pids", "i": "io", "n": "net", "u": "uptime",
+            "a": "name"}
+    sort, reverse = options["--sort"], False
+    interactive = not once and sys.stdin.isatty() and sys.stdout.isatty()
+    terminal = None
+    try:
+        with DockerClient() as client, FleetMonitor(client, options["--prefix"]) as fleet:
+            if once:
+                # Streams deliver their first document within about a second
+                fleet.poll(min(interval, 2.5))
+                print(render(fleet.rows(), sort, size=shutil.get_terminal_size((120, 10000))))
+                return 0
+            if interactive:
+                terminal = termios.tcgetattr(sys.stdin)
+                tty.setcbreak(sys.stdin)
+                fleet.watch(sys.stdin)
+
+            cpu_mark, wall_mark, own_cpu = time.process_time(), time.monotonic(), None
+            deadline = time.monotonic()
+            while True:
+                if time.monotonic() >= deadline:
+                    deadline = time.monotonic() + interval
+                    table = render(fleet.rows(), sort, reverse, shutil.get_terminal_size(),
+                                   own_cpu)
+                    sys.stdout.write("\033[H\033[2J" + table + "\n")
+                    sys.stdout.flush()
+                    # The monitor's own cost, over the last interval
+                    cpu_now, wall_now = time.process_time(), time.monotonic()
+                    own_cpu = (cpu_now - cpu_mark) * 100 / max(wall_now - wall_mark, 1e-9)
+                    cpu_mark, wall_mark = cpu_now, wall_now
+                if fleet.poll(max(deadline - time.monotonic(), 0)):
+                    key = sys.stdin.read(1)
+                    if key == "q":
+                        return 0
+                    if key == "r":
+                        reverse = not reverse
+                    elif key in keys:
+                        sort, reverse = keys[key], False
+                    deadline = time.monotonic()
+    except (DockerError, OSError) as e:
+        error(f"top: {e}")
+        return 1
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if terminal is not None:
+            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, terminal)
+
+
+def io_profiles_main(argv: list) -> int:
+    """Entry point for --io-profiles: list profiles and their runtimes."""
+    if argv:
+        print(USAGE)
+        return 1
+    try:
+        with Sandbox(SandboxConfig.from_env(), cache_path=None) as sandbox:
+            available = sandbox.runtimes()
+    except (DockerError, OSError) as e:
+        error(f"Cannot reach the Docker daemon: {e}")
+        available = []
+
+    for profile in IO_PROFILES.values():
+        state = "registered" if profile.runtime in available else "not registered"
+        print(f"{profile.name:<10} {profile.runtime:<16} {state}")
+        print(f"{'':<10} {profile.description}")
+        if profile.runtime not in available:
+            print(f"{'':<10} register: {profile.install_command()}")
+    print("\nSelect one with SANDBOX_IO_PROFILE=<name> (applies under runsc; a missing "
+          "runtime falls back to runsc)")
+    return 0
+
+
+def queue_main(argv: list) -> int:
+    """Entry point for --admit, --release and --queue."""
+    config = SandboxConfig.from_env()
+    try:
+        with Sandbox(config) as sandbox:
+            queue = sandbox.admission_queue()
+            if argv[0] == "--release" and len(argv) == 2:
+                queue.release(argv[1])
+                return 0
+
+            if argv[0] == "--admit" and len(argv) in (2, 4):
+                owner = int(argv[3]) if len(argv) == 4 and argv[2] == "--owner" else os.getppid()
+                request = queue.request(argv[1], parse_memory(config.memory), float(config.cpus),
+                                        config.pids_limit, config.queue_priority, owner)
+                admission = queue.admit(request, config.queue_timeout or None)
+                print(request.ticket, json.dumps(admission, separators=(",", ":")))
+                return 0
+
+            if argv[0] == "--queue" and argv[1:] in ([], ["--json"]):
+                status = queue.status()
+                if argv[1:]:
+                    print(json.dumps(status, indent=2))
+                else:
+                    print_queue(status)
+                return 0
+    except (AdmissionError, SandboxError, DockerError, ValueError, OSError) as e:
+        error(f"queue: {e}")
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+    print(USAGE)
+    return 1
+
+
+def print_queue(status: dict) -> None:
+    """Print the admission queue status."""
+    def row(resources: dict) -> str:
+        return (f"{resources['memory_bytes'] / 2**30:6.1f}GB {resources['cpus']:6g} CPUs "
+                f"{resources['pids']:6d} pids")
+
+    now = time.time()
+    print(f"Capacity: {row(status['capacity'])}  (policy: {status['policy']})")
+    print(f"Reserved: {row(status['reserved'])}")
+    for title, requests in (("Admitted", status["admitted"]), ("Waiting", status["waiting"])):
+        print(f"\n{title} ({len(requests)}):")
+        for request in requests:
+            print(f"  {request['container']:<44} {request['memory'] / 2**30:6.1f}GB "
+                  f"{request['cpus']:6g} CPUs  priority {request['priority']:3d}  "
+                  f"{now - request['enqueued']:7.1f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,311 @@
+"""Host-capacity admission queue for concurrent sandbox launches.
+
+Without it every launcher creates its container immediately, so a burst of
+callers overcommits the host. With SANDBOX_QUEUE=1 a launcher first asks for
+a reservation of its memory, CPU and pids limits; it is admitted once they
+fit in the host capacity next to what is already reserved:
+
+- requests holding a reservation (admitted tickets), and
+- running claude-sandbox containers started without one (warm pool
+  containers, launches with the queue off), at their configured limits
+
+State is shared by every launcher on the host through a directory, guarded
+by an flock on <queue_dir>/lock:
+
+    <queue_dir>/waiting/<ticket>.json    queued requests
+    <queue_dir>/admitted/<ticket>.json   requests holding a reservation
+
+Each launcher polls for its own ticket. Waiting requests are ordered FIFO or
+by priority (then FIFO) and first-fit bin-packed: a request that does not
+fit is skipped so smaller ones behind it can start, until it has waited
+starvation_s, after which nothing may pass it. Tickets of processes that no
+longer exist are reaped, so a killed launcher never leaks its reservation.
+"""
+
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .docker_api import DockerClient, DockerError
+
+DEFAULT_QUEUE_DIR = Path(".sandbox-queue")
+POLICIES = ("fifo", "priority")
+# Seconds a request may be bypassed by smaller ones before it blocks the queue
+DEFAULT_STARVATION_S = 60
+# Linux's default pid_max; the Docker API does not report a host pid limit
+DEFAULT_HOST_PIDS = 32768
+POLL_S = 0.25
+CONTAINER_PREFIX = "claude-sandbox"
+
+
+class AdmissionError(Exception):
+    """Raised when a request can never be admitted or waited too long."""
+
+
+@dataclass
+class Resources:
+    """Memory (bytes), CPUs and pids, reserved or available."""
+
+    memory: int
+    cpus: float
+    pids: int
+
+    def fits(self, other: "Resources") -> bool:
+        """Return True if other fits within these resources."""
+        return (other.memory <= self.memory and other.cpus <= self.cpus + 1e-9
+                and other.pids <= self.pids)
+
+    def __add__(self, other: "Resources") -> "Resources":
+        return Resources(self.memory + other.memory, self.cpus + other.cpus,
+                         self.pids + other.pids)
+
+    def __sub__(self, other: "Resources") -> "Resources":
+        return Resources(self.memory - other.memory, self.cpus - other.cpus,
+                         self.pids - other.pids)
+
+    def event(self) -> Dict[str, Any]:
+        """Return the resources as log event fields."""
+        return {"memory_bytes": self.memory, "cpus": round(self.cpus, 2), "pids": self.pids}
+
+
+@dataclass
+class Request:
+    """One launch waiting for, or holding, a reservation."""
+
+    ticket: str
+    container: str
+    memory: int
+    cpus: float
+    pids: int
+    priority: int = 0
+    owner: int = 0
+    enqueued: float = 0.0
+
+    @property
+    def resources(self) -> Resources:
+        return Resources(self.memory, self.cpus, self.pids)
+
+
+class AdmissionQueue:
+    """Admits sandbox launches against the host's capacity.
+
+    Example:
+        queue = AdmissionQueue(Resources(16 << 30, 8, 32768), client=client)
+        request = queue.request("claude-sandbox-x", 2 << 30, 2, 512)
+        admission = queue.admit(request)
+        try:
+            ...  # create and run the container
+        finally:
+            queue.release(request.ticket)
+    """
+
+    def __init__(self, capacity: Resources, queue_dir: Path = DEFAULT_QUEUE_DIR,
+                 policy: str = "fifo", client: Optional[DockerClient] = None,
+                 starvation_s: float = DEFAULT_STARVATION_S):
+        if policy not in POLICIES:
+            raise AdmissionError(f"Invalid queue policy: {policy} (expected fifo or priority)")
+        self.capacity = capacity
+        self.queue_dir = queue_dir
+        self.policy = policy
+        self.client = client
+        self.starvation_s = starvation_s
+        self.waiting_dir = queue_dir / "waiting"
+        self.admitted_dir = queue_dir / "admitted"
+        # Container id -> limits; limits never change, so inspect each once
+        self._limits: Dict[str, Resources] = {}
+
+    @staticmethod
+    def request(container: str, memory: int, cpus: float, pids: int, priority: int = 0,
+                owner: Optional[int] = None) -> Request:
+        """Create a request for a launch.
+
+        Args:
+            container: Name of the container to be started
+            memory: Memory limit in bytes
+            cpus: CPU limit
+            pids: Pids limit
+            priority: Higher runs first under the priority policy
+            owner: Process holding the reservation (default: this one); the
+                ticket is reaped once it exits
+        """
+        owner = owner or os.getpid()
+        return Request(f"{time.time_ns()}-{owner}", container, memory, cpus, pids,
+                       priority, owner, time.time())
+
+    def admit(self, request: Request, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Queue a request and block until it is admitted.
+
+        Args:
+            request: Request from request()
+            timeout: Seconds to wait before giving up (None: wait forever)
+
+        Returns:
+            Dictionary for the start event: policy, priority, queue_depth
+            (requests waiting ahead of or beside it when queued), wait_ms,
+            and the reserved and capacity resources at admission
+
+        Raises:
+            AdmissionError: If the request exceeds the host capacity or timed out
+        """
+        if not self.capacity.fits(request.resources):
+            raise AdmissionError(
+                f"Request ({request.resources.event()}) exceeds host capacity "
+                f"({self.capacity.event()})")
+
+        started = time.monotonic()
+        with self._locked():
+            depth = len(self._load(self.waiting_dir))
+            self._write(self.waiting_dir, request)
+
+        try:
+            while True:
+                with self._locked():
+                    reserved = self._admit_if_possible(request)
+                if reserved is not None:
+                    break
+                if timeout is not None and time.monotonic() - started > timeout:
+                    raise AdmissionError(f"Not admitted within {timeout:g}s")
+                time.sleep(POLL_S)
+        except BaseException:
+            with self._locked():
+                (self.waiting_dir / f"{request.ticket}.json").unlink(missing_ok=True)
+            raise
+
+        return {
+            "policy": self.policy,
+            "priority": request.priority,
+            "queue_depth": depth,
+            "wait_ms": int((time.monotonic() - started) * 1000),
+            "reserved": reserved.event(),
+            "capacity": self.capacity.event(),
+        }
+
+    def release(self, ticket: str) -> None:
+        """Give up a reservation."""
+        with self._locked():
+            (self.admitted_dir / f"{ticket}.json").unlink(missing_ok=True)
+
+    def status(self) -> Dict[str, Any]:
+        """Return capacity, reservations and the queue in admission order."""
+        with self._locked():
+            waiting, admitted = self._reap()
+            reserved = self._reserved(admitted)
+        return {
+            "policy": self.policy,
+            "capacity": self.capacity.event(),
+            "reserved": reserved.event(),
+            "admitted": [asdict(r) for r in admitted],
+            "waiting": [asdict(r) for r in self.order(waiting)],
+        }
+
+    def order(self, waiting: List[Request]) -> List[Request]:
+        """Return waiting requests in admission order."""
+        if self.policy == "priority":
+            return sorted(waiting, key=lambda r: (-r.priority, r.enqueued, r.ticket))
+        return sorted(waiting, key=lambda r: (r.enqueued, r.ticket))
+
+    def _admit_if_possible(self, request: Request) -> Optional[Resources]:
+        """Admit the request if its turn has come (call with the lock held).
+
+        Returns:
+            Resources reserved before this request, or None if not admitted
+        """
+        waiting, admitted = self._reap()
+        reserved = self._reserved(admitted)
+        free = self.capacity - reserved
+        now = time.time()
+
+        # First fit in admission order; everything admitted before us in
+        # this pass will claim its share on its own next poll
+        for candidate in self.order(waiting):
+            if free.fits(candidate.resources):
+                if candidate.ticket == request.ticket:
+                    self._write(self.admitted_dir, request)
+                    (self.waiting_dir / f"{request.ticket}.json").unlink(missing_ok=True)
+                    return reserved
+                free = free - candidate.resources
+            elif now - candidate.enqueued >= self.starvation_s:
+                return None
+        return None
+
+    def _reserved(self, admitted: List[Request]) -> Resources:
+        """Sum the admitted requests and untracked running sandbox containers."""
+        total = Resources(0, 0.0, 0)
+        for request in admitted:
+            total = total + request.resources
+
+        if self.client is None:
+            return total
+        tracked = {request.container for request in admitted}
+        try:
+            containers = self.client.list_containers({"name": [CONTAINER_PREFIX]})
+            for container in containers:
+                names = {name.lstrip("/") for name in container.get("Names", [])}
+                if names & tracked:
+                    continue
+                total = total + self._container_limits(container["Id"])
+        except (DockerError, OSError):
+            pass  # the daemon is checked by the launcher; count tickets only
+        return total
+
+    def _container_limits(self, container_id: str) -> Resources:
+        if container_id not in self._limits:
+            host = self.client.inspect_container(container_id)["HostConfig"]
+            self._limits[container_id] = Resources(host.get("Memory") or 0,
+                                                   (host.get("NanoCpus") or 0) / 1e9,
+                                                   max(host.get("PidsLimit") or 0, 0))
+        return self._limits[container_id]
+
+    def _reap(self) -> Tuple[List[Request], List[Request]]:
+        """Load both queues, dropping tickets whose owner has exited."""
+        queues = []
+        for directory in (self.waiting_dir, self.admitted_dir):
+            alive = []
+            for request in self._load(directory):
+                if process_alive(request.owner):
+                    alive.append(request)
+                else:
+                    (directory / f"{request.ticket}.json").unlink(missing_ok=True)
+            queues.append(alive)
+        return queues[0], queues[1]
+
+    @staticmethod
+    def _load(directory: Path) -> List[Request]:
+        requests = []
+        for path in directory.glob("*.json"):
+            try:
+                requests.append(Request(**json.loads(path.read_text())))
+            except (OSError, ValueError, TypeError):
+                continue  # removed or being written concurrently
+        return requests
+
+    @staticmethod
+    def _write(directory: Path, request: Request) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{request.ticket}.json").write_text(json.dumps(asdict(request)))
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.queue_dir / "lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def process_alive(pid: int) -> bool:
+    """Return True if a process with this pid exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,219 @@
+"""Batch mode: run many commands inside one sandbox container.
+
+Starts a single container (same hardening as a normal run) with an idle
+placeholder process and runs each job in it with `exec`, in sequence or with
+bounded parallelism, so container create/teardown is paid once per batch.
+
+Jobs are read from a JSONL file, one object per line:
+
+    {"id": "parse", "command": ["python3", "parse.py"], "timeout": 30}
+    {"command": "pytest -q tests/"}
+
+``command`` is an argv list or a shell string (run with ``sh -c``); ``id``
+defaults to the line number and ``timeout`` (seconds) to the batch default.
+
+The workspace's requirements (see deps.py) are installed or found in the
+dependency cache once per batch and mounted for every job.
+
+Every job gets its own log file, logs/<batch>-<id>.json, with the usual
+start/complete events, so the history tools see jobs individually. Job
+output is captured to logs/<batch>/<id>.out and .err.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .sandbox import RunLog, Sandbox, SandboxError
+
+# Exit codes of coreutils `timeout`: TERM sent, then KILL after the grace period.
+# 137 is also a kill by the OOM killer, so it only counts once the timeout passed.
+TIMEOUT_EXIT_CODE = 124
+KILLED_EXIT_CODE = 137
+KILL_GRACE_S = 5
+
+
+@dataclass
+class Job:
+    """One command of a batch."""
+
+    id: str
+    command: List[str]
+    timeout: Optional[float] = None
+
+
+@dataclass
+class JobResult:
+    """Outcome of one batch job."""
+
+    job: Job
+    exit_code: int
+    duration_ms: int
+    timed_out: bool
+    stdout_path: Path
+    stderr_path: Path
+
+    @property
+    def success(self) -> bool:
+        return self.exit_code == 0
+
+
+def load_jobs(path: Path, default_timeout: Optional[float] = None) -> List[Job]:
+    """Read jobs from a JSONL file.
+
+    Args:
+        path: Path to the jobs file
+        default_timeout: Timeout for jobs that don't set one
+
+    Returns:
+        Jobs in file order
+    """
+    jobs = []
+    seen = set()
+    for number, line in enumerate(path.read_text().splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            spec = json.loads(line)
+        except ValueError as e:
+            raise SandboxError(f"{path}:{number}: invalid JSON: {e}")
+        if not isinstance(spec, dict):
+            raise SandboxError(f"{path}:{number}: expected an object")
+
+        command = spec.get("command")
+        if isinstance(command, str):
+            command = ["sh", "-c", command]
+        if not command or not isinstance(command, list):
+            raise SandboxError(f"{path}:{number}: missing command")
+
+        job_id = str(spec.get("id", number))
+        if job_id in seen or "/" in job_id:
+            raise SandboxError(f"{path}:{number}: invalid or duplicate id '{job_id}'")
+        seen.add(job_id)
+
+        timeout = spec.get("timeout", default_timeout)
+        if timeout is not None and (isinstance(timeout, bool)
+                                    or not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise SandboxError(f"{path}:{number}: timeout must be a positive number of seconds")
+
+        jobs.append(Job(job_id, [str(arg) for arg in command], timeout))
+    return jobs
+
+
+class BatchRunner:
+    """Runs a list of jobs in one sandbox container."""
+
+    def __init__(self, sandbox: Sandbox, workspace: Path, parallel: int = 1,
+                 name: Optional[str] = None):
+        self.sandbox = sandbox
+        self.workspace = sandbox.check_workspace(workspace)
+        self.parallel = max(1, parallel)
+        self.name = name or sandbox.config.name or sandbox.generate_name()
+        self.output_dir = sandbox.config.log_dir / self.name
+        self._print_lock = threading.Lock()
+
+    def run(self, jobs: List[Job]) -> List[JobResult]:
+        """Start the container, run all jobs, and tear the container down.
+
+        Returns:
+            Results in job order
+        """
+        sandbox = self.sandbox
+        sandbox.ensure_image()
+        self.runtime = sandbox.resolve_runtime()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        deps = sandbox.dependencies(self.workspace, self.runtime)
+
+        batch_log = RunLog(sandbox.config.log_dir / f"{self.name}.json")
+        batch_log.event("batch_start", {
+            **sandbox.start_event(self.name, self.workspace, self.runtime, ["sleep", "infinity"]),
+            "jobs": len(jobs),
+            "parallel": self.parallel,
+            **({"deps": deps} if deps else {}),
+        })
+        started = time.monotonic()
+        overlay, mount = sandbox.workspace_mount(self.name, self.workspace)
+
+        results: List[JobResult] = []
+        sampler = watcher = None
+        complete: Dict[str, Any] = {}
+        try:
+            config = sandbox.container_config(self.workspace, ["sleep", "infinity"],
+                                              self.runtime, mount,
+                                              deps=deps["path"] if deps else None)
+            self.container_id = sandbox.create_container(self.name, config)
+            sandbox.client.start_container(self.container_id)
+            watcher = sandbox.start_watcher(self.container_id)
+            sampler = sandbox.start_sampler(self.container_id, self.name)
+
+            with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+                results = list(executor.map(self._run_job, jobs))
+        finally:
+            complete.update(sandbox.stop_watcher(watcher))
+            sandbox.client.remove_container(self.name)
+            complete.update(sandbox.stop_sampler(sampler))
+            if overlay is not None:
+                complete["overlay"] = overlay.summary()
+                overlay.teardown()
+            duration_ms = int((time.monotonic() - started) * 1000)
+            failed = sum(not r.success for r in results)
+            batch_log.event("batch_complete", {
+                "jobs": len(jobs),
+                "completed": len(results),
+                "failed": failed,
+                "duration_ms": duration_ms,
+                "success": "true" if results and not failed and len(results) == len(jobs)
+                           else "false",
+                **complete,
+            })
+
+        return results
+
+    def _run_job(self, job: Job) -> JobResult:
+        client = self.sandbox.client
+        log = RunLog(self.sandbox.config.log_dir / f"{self.name}-{job.id}.json")
+        stdout_path = self.output_dir / f"{job.id}.out"
+        stderr_path = self.output_dir / f"{job.id}.err"
+
+        command = job.command
+        if job.timeout:
+            command = ["timeout", f"--kill-after={KILL_GRACE_S}", str(job.timeout), *command]
+
+        log.event("start", {
+            **self.sandbox.start_event(self.name, self.workspace, self.runtime, job.command),
+            "batch": self.name,
+            "job": job.id,
+            "timeout": job.timeout,
+        })
+        started = time.monotonic()
+
+        with open(stdout_path, "wb") as stdout, open(stderr_path, "wb") as stderr:
+            exec_id = client.exec_create(self.container_id, command)
+            self.sandbox.pump(client.exec_start(exec_id), stdout, stderr)
+        exit_code = client.exec_exit_code(exec_id)
+
+        duration_ms = int((time.monotonic() - started) * 1000)
+        timed_out = bool(job.timeout) and (
+            exit_code == TIMEOUT_EXIT_CODE
+            or (exit_code == KILLED_EXIT_CODE and duration_ms >= job.timeout * 1000))
+        log.event("complete", {
+            "exit_code": exit_code,
+            "duration_seconds": duration_ms // 1000,
+            "duration_ms": duration_ms,
+            "success": "true" if exit_code == 0 else "false",
+            "timed_out": timed_out,
+            "stdout": str(stdout_path),
+            "stdout_bytes": stdout_path.stat().st_size,
+            "stderr": str(stderr_path),
+            "stderr_bytes": stderr_path.stat().st_size,
+        })
+
+        result = JobResult(job, exit_code, duration_ms, timed_out, stdout_path, stderr_path)
+        with self._print_lock:
+            status = "⏱️  TIMEOUT" if timed_out else "✅" if result.success else "❌"
+            print(f"{status} {job.id}: exit {exit_code} ({duration_ms}ms)", flush=True)
+        return result
@@ -0,0 +1,445 @@
+"""High-frequency cgroup v2 sampler for sandbox containers.
+
+Reads the container's cgroup files on the host (memory.current, memory.peak,
+cpu.stat, io.stat, pids.current) directly, at 10-100 Hz, instead of polling
+`docker stats`. Each file is opened once and re-read from offset 0 per tick,
+so a sample costs a handful of read() calls and no daemon round trips.
+
+Samples are streamed as JSON lines: a header object, one array per sample in
+the order of FIELDS, and a summary object once sampling stops.
+
+    {"format":"cgroup-samples","fields":["t_ms",...],"rate_hz":50,...}
+    [0,10485760,10485760,1200,0,0,0,3]
+    [20,10493952,10493952,1850,0,0,4096,3]
+    {"samples":2,"missed":0,"duration_ms":20,"memory_peak_bytes":10493952,...}
+
+Standalone use (waits for the container to start, stops when it exits):
+    python3 -m claude_sandbox --sample <container> [--rate HZ] [--output FILE]
+
+CgroupWatcher keeps the accounting that only exists while the cgroup does
+(OOM and high events, peak memory, CPU throttling) for the complete event:
+    python3 -m claude_sandbox --watch <container>
+"""
+
+import json
+import os
+import select
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from .docker_api import DockerClient, DockerError
+
+FORMAT = "cgroup-samples"
+FIELDS = [
+    "t_ms",
+    "memory_current",
+    "memory_peak",
+    "cpu_usage_usec",
+    "cpu_throttled_usec",
+    "io_rbytes",
+    "io_wbytes",
+    "pids_current",
+]
+DEFAULT_RATE_HZ = 20
+MAX_RATE_HZ = 1000
+FLUSH_INTERVAL_S = 1.0
+CPU_WINDOW_MS = 1000
+# memory.events counters recorded by CgroupWatcher
+MEMORY_EVENTS = ["high", "max", "oom", "oom_kill"]
+THROTTLING = ["nr_periods", "nr_throttled", "throttled_usec"]
+WATCH_INTERVAL_S = 1.0
+
+
+class CgroupError(Exception):
+    """The container's cgroup could not be located or read."""
+
+
+def cgroup2_mount() -> Path:
+    """Return the host's cgroup v2 mount point.
+
+    Handles both unified (/sys/fs/cgroup) and hybrid
+    (/sys/fs/cgroup/unified) layouts.
+
+    Raises:
+        CgroupError: If no cgroup2 filesystem is mounted
+    """
+    try:
+        with open("/proc/self/mountinfo") as f:
+            for line in f:
+                fields = line.split()
+                separator = fields.index("-")
+                if fields[separator + 1] == "cgroup2":
+                    return Path(fields[4])
+    except OSError as e:
+        raise CgroupError(f"Cannot read mount table: {e}")
+    raise CgroupError("No cgroup v2 filesystem mounted (cgroup v1 hosts are not supported)")
+
+
+def process_cgroup(pid: int) -> Path:
+    """Return the cgroup v2 directory of a host process.
+
+    Args:
+        pid: Host pid, e.g. a container's State.Pid
+
+    Raises:
+        CgroupError: If the process is gone or not in a v2 cgroup
+    """
+    try:
+        lines = Path(f"/proc/{pid}/cgroup").read_text().splitlines()
+    except OSError as e:
+        raise CgroupError(f"Cannot read cgroup of pid {pid}: {e}")
+    for line in lines:
+        if line.startswith("0::"):
+            path = cgroup2_mount() / line[3:].lstrip("/")
+            if (path / "cgroup.procs").exists():
+                return path
+    raise CgroupError(f"pid {pid} is not in a cgroup v2 hierarchy")
+
+
+def _parse_keyed(data: bytes) -> Dict[str, int]:
+    """Parse 'key value' lines (cpu.stat)."""
+    values = {}
+    for line in data.split(b"\n"):
+        key, _, value = line.partition(b" ")
+        if value:
+            values[key.decode()] = int(value)
+    return values
+
+
+def _parse_io(data: bytes) -> Tuple[int, int]:
+    """Sum rbytes/wbytes over all devices in io.stat."""
+    rbytes = wbytes = 0
+    for line in data.split(b"\n"):
+        for item in line.split()[1:]:
+            key, _, value = item.partition(b"=")
+            if key == b"rbytes":
+                rbytes += int(value)
+            elif key == b"wbytes":
+                wbytes += int(value)
+    return rbytes, wbytes
+
+
+class CgroupReader:
+    """Keeps a cgroup's stat files open and reads one sample at a time."""
+
+    FILES = ["memory.current", "memory.peak", "cpu.stat", "io.stat", "pids.current"]
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fds: Dict[str, Optional[int]] = {}
+        for name in self.FILES:
+            try:
+                self._fds[name] = os.open(path / name, os.O_RDONLY)
+            except FileNotFoundError:
+                # memory.peak needs kernel 5.19+; io.stat needs the io controller
+                self._fds[name] = None
+        if self._fds["memory.current"] is None:
+            self.close()
+            raise CgroupError(f"No memory controller in {path}")
+
+    def close(self) -> None:
+        for fd in self._fds.values():
+            if fd is not None:
+                os.close(fd)
+        self._fds = {}
+
+    def memory_max(self) -> Optional[int]:
+        """Return the memory limit in bytes, or None if unlimited."""
+        try:
+            value = (self.path / "memory.max").read_text().strip()
+        except OSError:
+            return None
+        return None if value == "max" else int(value)
+
+    def _read(self, name: str) -> Optional[bytes]:
+        fd = self._fds[name]
+        if fd is None:
+            return None
+        os.lseek(fd, 0, os.SEEK_SET)
+        return os.read(fd, 65536)
+
+    def sample(self) -> List[Optional[int]]:
+        """Read one sample (all FIELDS except t_ms).
+
+        Raises:
+            OSError: If the cgroup has been removed
+        """
+        memory_current = int(self._read("memory.current"))
+        peak = self._read("memory.peak")
+        cpu = _parse_keyed(self._read("cpu.stat") or b"")
+        io = self._read("io.stat")
+        rbytes, wbytes = _parse_io(io) if io is not None else (None, None)
+        pids = self._read("pids.current")
+        return [
+            memory_current,
+            int(peak) if peak is not None else None,
+            cpu.get("usage_usec"),
+            cpu.get("throttled_usec"),
+            rbytes,
+            wbytes,
+            int(pids) if pids is not None else None,
+        ]
+
+
+class CgroupSampler(threading.Thread):
+    """Background thread streaming samples of one cgroup to a file.
+
+    Stops when stop() is called or the cgroup disappears (container exit).
+    """
+
+    def __init__(self, path: Path, output: Path, rate_hz: float = DEFAULT_RATE_HZ,
+                 metadata: Optional[Dict[str, Any]] = None):
+        super().__init__(daemon=True)
+        if not 0 < rate_hz <= MAX_RATE_HZ:
+            raise CgroupError(f"Sample rate must be between 0 and {MAX_RATE_HZ} Hz")
+        self.reader = CgroupReader(path)
+        self.output = output
+        self.rate_hz = rate_hz
+        self.metadata = metadata or {}
+        self.summary: Dict[str, Any] = {}
+        self._stop_event = threading.Event()
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop sampling, wait for the file to be finalized, return the summary."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        return self.summary
+
+    def run(self) -> None:
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.output, "w") as f:
+            try:
+                self._sample_loop(f)
+            finally:
+                self.reader.close()
+
+    def _sample_loop(self, f: TextIO) -> None:
+        header = {
+            "format": FORMAT,
+            "version": 1,
+            "fields": FIELDS,
+            "rate_hz": self.rate_hz,
+            "cgroup": str(self.reader.path),
+            "memory_max": self.reader.memory_max(),
+            "start": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            **self.metadata,
+        }
+        f.write(json.dumps(header, separators=(",", ":")) + "\n")
+
+        interval = 1.0 / self.rate_hz
+        started = time.monotonic()
+        deadline = started
+        last_flush = started
+        samples = missed = 0
+        first: Optional[List[Optional[int]]] = None
+        last: Optional[List[Optional[int]]] = None
+        memory_peak = 0
+        # CPU peak over windows of at least CPU_WINDOW_MS
+        window: Optional[List[Optional[int]]] = None
+        cpu_peak: Optional[float] = None
+
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            try:
+                values = self.reader.sample()
+            except (OSError, ValueError):
+                break  # cgroup removed: the container has exited
+            row = [int((now - started) * 1000), *values]
+            f.write(json.dumps(row, separators=(",", ":")) + "\n")
+            samples += 1
+            first = first or row
+            last = row
+            memory_peak = max(memory_peak, values[0], values[1] or 0)
+            window = window or row
+            if row[0] - window[0] >= CPU_WINDOW_MS and row[3] is not None:
+                percent = (row[3] - window[3]) / ((row[0] - window[0]) * 10)
+                cpu_peak = max(cpu_peak or 0.0, percent)
+                window = row
+
+            if now - last_flush >= FLUSH_INTERVAL_S:
+                f.flush()
+                last_flush = now
+
+            # Fixed schedule; ticks we fell behind on are skipped and counted
+            deadline += interval
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                skipped = int(-delay / interval) + 1
+                missed += skipped
+                deadline += skipped * interval
+                delay = deadline - time.monotonic()
+            self._stop_event.wait(max(delay, 0))
+
+        self.summary = {
+            "samples": samples,
+            "missed": missed,
+            "duration_ms": last[0] if last else 0,
+            "memory_peak_bytes": memory_peak,
+        }
+        if first and last:
+            for index, name in enumerate(FIELDS):
+                if name in ("cpu_usage_usec", "cpu_throttled_usec", "io_rbytes", "io_wbytes") \
+                        and last[index] is not None:
+                    self.summary[name] = last[index] - first[index]
+            if last[0] and last[3] is not None:
+                self.summary["cpu_avg_percent"] = round(
+                    self.summary["cpu_usage_usec"] / (last[0] * 10), 1)
+                # Runs shorter than one window peak at their average
+                self.summary["cpu_peak_percent"] = round(
+                    cpu_peak if cpu_peak is not None else self.summary["cpu_avg_percent"], 1)
+        f.write(json.dumps(self.summary, separators=(",", ":")) + "\n")
+
+
+class CgroupWatcher(threading.Thread):
+    """Keeps a cgroup's final OOM, peak memory and CPU throttling counters.
+
+    A container's cgroup is removed as soon as its last process exits, so
+    these can't be read once wait() returns. The watcher re-reads them
+    whenever memory.events changes (the kernel notifies OOM and high events),
+    every WATCH_INTERVAL_S otherwise, and a last time when cgroup.events
+    reports the cgroup unpopulated, which happens before the runtime removes
+    it. Each read is a few small read() calls on files opened once.
+    """
+
+    def __init__(self, path: Path):
+        super().__init__(daemon=True)
+        self.path = path
+        self.result: Dict[str, Any] = {}
+        self._fds: Dict[str, Optional[int]] = {}
+        for name in ("cgroup.events", "memory.events", "memory.peak", "memory.current",
+                     "memory.max", "cpu.stat"):
+            try:
+                self._fds[name] = os.open(path / name, os.O_RDONLY)
+            except FileNotFoundError:
+                self._fds[name] = None  # memory.peak needs kernel 5.19+
+        if self._fds["memory.events"] is None:
+            self.close()
+            raise CgroupError(f"No memory controller in {path}")
+        self._wake_r, self._wake_w = os.pipe()
+        self._stopping = False
+        self._peak = 0
+
+    def close(self) -> None:
+        for fd in self._fds.values():
+            if fd is not None:
+                os.close(fd)
+        self._fds = {}
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop watching and return the last counters read.
+
+        Returns:
+            memory_peak_bytes, memory_max_bytes (None if unlimited),
+            memory_events (high, max, oom, oom_kill), cpu_throttling
+            (nr_periods, nr_throttled, throttled_usec) and final (True if
+            read after the last process exited); empty if nothing was read
+        """
+        if not self._stopping:
+            self._stopping = True
+            os.write(self._wake_w, b"x")
+            if self.ident is not None:
+                self.join()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+        return self.result
+
+    def _read(self, name: str) -> Optional[bytes]:
+        fd = self._fds.get(name)
+        if fd is None:
+            return None
+        os.lseek(fd, 0, os.SEEK_SET)
+        return os.read(fd, 65536)
+
+    def read(self) -> bool:
+        """Read all counters into result.
+
+        Returns:
+            False once the cgroup has no processes left
+        """
+        events = _parse_keyed(self._read("memory.events"))
+        peak = self._read("memory.peak")
+        current = self._read("memory.current")
+        limit = self._read("memory.max")
+        cpu = _parse_keyed(self._read("cpu.stat") or b"")
+        populated = _parse_keyed(self._read("cgroup.events") or b"populated 1")
+
+        # Without memory.peak, the highest memory.current we have seen
+        self._peak = max(self._peak, int(peak) if peak else int(current or 0))
+        self.result = {
+            "memory_peak_bytes": self._peak,
+            "memory_max_bytes": None if not limit or limit.strip() == b"max" else int(limit),
+            "memory_events": {key: events.get(key, 0) for key in MEMORY_EVENTS},
+            "cpu_throttling": {key: cpu[key] for key in THROTTLING if key in cpu},
+            "final": not populated.get("populated", 1),
+        }
+        return not self.result["final"]
+
+    def run(self) -> None:
+        poller = select.poll()
+        # Changes to these files are signalled as POLLPRI
+        for name in ("memory.events", "cgroup.events"):
+            if self._fds[name] is not None:
+                poller.register(self._fds[name], select.POLLPRI)
+        poller.register(self._wake_r, select.POLLIN)
+        try:
+            while True:
+                try:
+                    if not self.read():
+                        break
+                except (OSError, ValueError):
+                    break  # cgroup already removed; keep the last read
+                if self._stopping:
+                    break
+                poller.poll(WATCH_INTERVAL_S * 1000)
+        finally:
+            self.close()
+
+
+def read_samples(path: Path) -> Tuple[Dict[str, Any], List[List[Optional[int]]],
+                                      Optional[Dict[str, Any]]]:
+    """Load a samples file.
+
+    Returns:
+        Tuple of (header, rows, summary or None if sampling was cut short)
+    """
+    header: Dict[str, Any] = {}
+    rows = []
+    summary = None
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if isinstance(record, list):
+                rows.append(record)
+            elif not header:
+                header = record
+            else:
+                summary = record
+    return header, rows, summary
+
+
+def wait_for_pid(client: DockerClient, container: str, timeout: float,
+                 cancel: Optional[threading.Event] = None) -> int:
+    """Poll the daemon until a container is running and return its host pid.
+
+    Raises:
+        CgroupError: If the container doesn't start within the timeout, or
+            ``cancel`` is set first
+    """
+    cancel = cancel or threading.Event()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            state = client.inspect_container(container)["State"]
+            if state.get("Running") and state.get("Pid"):
+                return state["Pid"]
+        except DockerError as e:
+            if e.status != 404:
+                raise
+        if time.monotonic() >= deadline:
+            raise CgroupError(f"Container {container} did not start within {timeout}s")
+        if cancel.wait(0.05):
+            raise CgroupError(f"Stopped before container {container} started")
@@ -0,0 +1,227 @@
+"""Offline wheelhouse and cached per-project dependency environments.
+
+Sandboxes run with --network none and the image bakes in only a handful of
+packages. A project that needs more lists them in a requirements file in its
+workspace (SANDBOX_REQUIREMENTS, default requirements.txt). The launcher
+installs them, without network, from a local wheelhouse into a virtualenv
+kept on the host and keyed by a hash of the requirements and the image ID:
+
+    <wheelhouse>/*.whl                        filled by --wheelhouse (network)
+    <deps_dir>/envs/<key>/                    virtualenv, system site packages
+    <deps_dir>/envs/<key>/.sandbox-deps.json  requirements, size, install time
+    <deps_dir>/envs/<key>/.last-used          touched by every run using it
+    <deps_dir>/envs/<key>/owners/<pid>        launchers using it
+    <deps_dir>/locks/<key>                    one install at a time per key
+    <deps_dir>/lock                           guards lookups against eviction
+
+Runs mount their environment read-only at /opt/sandbox-deps with its bin/
+first on PATH, so only the first run of a dependency set pays for the
+install; later runs add a bind mount. Requirements already in the image are
+satisfied by the system site packages and not installed again. After each
+install the cache is trimmed to max_bytes, least recently used first,
+skipping environments whose owners are still running.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .admission import process_alive
+
+DEFAULT_REQUIREMENTS = "requirements.txt"
+DEFAULT_DEPS_DIR = Path(".sandbox-cache/deps")
+DEFAULT_WHEELHOUSE = Path(".sandbox-wheelhouse")
+DEFAULT_CACHE_SIZE = "10g"
+
+# Where the environment and the wheelhouse are mounted in the container
+DEPS_MOUNT = "/opt/sandbox-deps"
+WHEELHOUSE_MOUNT = "/wheelhouse"
+# The image's PATH with the environment's scripts first; must match
+# DEPS_PATH in sandbox-lib.sh
+DEPS_PATH = (f"{DEPS_MOUNT}/bin:/home/claudeuser/.local/bin:/usr/local/sbin:/usr/local/bin:"
+             "/usr/sbin:/usr/bin:/sbin:/bin")
+
+# Run in the sandbox image with the requirements at /workspace/requirements.txt
+INSTALL_SCRIPT = (
+    f"python3 -m venv --without-pip --system-site-packages {DEPS_MOUNT} && "
+    f"python3 -m pip --python {DEPS_MOUNT}/bin/python install --no-index "
+    f"--find-links {WHEELHOUSE_MOUNT} --disable-pip-version-check --no-warn-script-location "
+    f"-r /workspace/requirements.txt")
+WHEELHOUSE_SCRIPT = (
+    f"python3 -m pip wheel --wheel-dir {WHEELHOUSE_MOUNT} --find-links {WHEELHOUSE_MOUNT} "
+    f"--disable-pip-version-check -r /workspace/requirements.txt")
+
+META = ".sandbox-deps.json"
+LAST_USED = ".last-used"
+
+
+def read_requirements(path: Path, seen: Optional[set] = None) -> List[str]:
+    """Return a requirements file's lines without comments, -r/-c files inlined.
+
+    Raises:
+        OSError: If the file or an included file cannot be read
+    """
+    seen = set() if seen is None else seen
+    path = path.resolve()
+    if path in seen:
+        return []
+    seen.add(path)
+
+    lines = []
+    for raw in path.read_text().splitlines():
+        line = raw.split(" #", 1)[0].strip()
+        if not line or line.startswith("#"):
+            continue
+        option, _, value = line.partition(" ")
+        if option in ("-r", "--requirement", "-c", "--constraint") and value:
+            lines.extend(read_requirements(path.parent / value.strip(), seen))
+        else:
+            lines.append(line)
+    return lines
+
+
+def dependency_key(requirements: List[str], image_id: str) -> str:
+    """Return the cache key of a dependency set installed on an image.
+
+    Order, duplicates and comments do not change the key; a rebuilt image does.
+    """
+    text = "\n".join(sorted(set(requirements)))
+    return hashlib.sha256(f"{image_id}\n{text}".encode()).hexdigest()[:16]
+
+
+def directory_size(path: Path) -> int:
+    """Return the total size of the files under path (symlinks not followed)."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class DependencyCache:
+    """Dependency environments on the host, keyed by dependency_key()."""
+
+    def __init__(self, root: Path = DEFAULT_DEPS_DIR, max_bytes: int = 10 * 1024 ** 3):
+        self.root = root
+        self.envs = root / "envs"
+        self.max_bytes = max_bytes
+
+    def path(self, key: str) -> Path:
+        """Return the directory of an environment (it may not exist)."""
+        return (self.envs / key).resolve()
+
+    def lookup(self, key: str, owner: int) -> Optional[Path]:
+        """Return an installed environment and mark it used by owner, or None."""
+        path = self.path(key)
+        with self._locked():
+            if not (path / META).exists():
+                return None
+            self.use(key, owner)
+        return path
+
+    def use(self, key: str, owner: int) -> None:
+        """Record a use: refresh the LRU time and register the owner process."""
+        path = self.path(key)
+        (path / LAST_USED).touch()
+        (path / "owners").mkdir(exist_ok=True)
+        (path / "owners" / str(owner)).touch()
+
+    @contextmanager
+    def installing(self, key: str, owner: int) -> Iterator[Optional[Path]]:
+        """Hold the key's install lock.
+
+        Yields the scratch directory to install into, or None if another
+        launcher finished the install while this one waited. The scratch
+        directory becomes the environment, owned by owner, when the block
+        exits cleanly.
+        """
+        (self.root / "locks").mkdir(parents=True, exist_ok=True)
+        with open(self.root / "locks" / key, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if (self.path(key) / META).exists():
+                yield None
+                return
+            scratch = self.envs / f".{key}.tmp"
+            shutil.rmtree(scratch, ignore_errors=True)
+            (scratch / "owners").mkdir(parents=True)
+            (scratch / "owners" / str(owner)).touch()
+            try:
+                yield scratch.resolve()
+            except BaseException:
+                shutil.rmtree(scratch, ignore_errors=True)
+                raise
+            os.replace(scratch, self.path(key))
+
+    @staticmethod
+    def record(path: Path, key: str, requirements: List[str], install_ms: int
+               ) -> Dict[str, Any]:
+        """Write the metadata of an environment installed in path; return it.
+
+        Call it inside installing(): the metadata marks the install complete.
+        """
+        meta = {"key": key, "requirements": sorted(set(requirements)),
+                "bytes": directory_size(path), "install_ms": install_ms,
+                "created": time.time()}
+        (path / META).write_text(json.dumps(meta, indent=2) + "\n")
+        (path / LAST_USED).touch()
+        return meta
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Return every installed environment, least recently used first."""
+        entries = []
+        if not self.envs.is_dir():
+            return entries
+        for path in self.envs.iterdir():
+            try:
+                meta = json.loads((path / META).read_text())
+                last_used = (path / LAST_USED).stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            owners = [int(p.name) for p in (path / "owners").glob("*") if p.name.isdigit()] \
+                if (path / "owners").is_dir() else []
+            entries.append({**meta, "last_used": last_used,
+                            "in_use": any(process_alive(pid) for pid in owners)})
+        return sorted(entries, key=lambda entry: entry["last_used"])
+
+    def evict(self, max_bytes: Optional[int] = None) -> List[str]:
+        """Remove least recently used environments until the cache fits.
+
+        Environments with a running owner are never removed, so the cache
+        can stay above max_bytes while they run.
+
+        Returns:
+            Keys removed
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        removed = []
+        with self._locked():
+            entries = self.entries()
+            total = sum(entry["bytes"] for entry in entries)
+            for entry in entries:
+                if total <= limit:
+                    break
+                if entry["in_use"]:
+                    continue
+                shutil.rmtree(self.path(entry["key"]), ignore_errors=True)
+                total -= entry["bytes"]
+                removed.append(entry["key"])
+        return removed
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / "lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -0,0 +1,324 @@
+"""Minimal Docker Engine API client over the unix socket.
+
+Speaks HTTP/1.1 directly to the daemon instead of forking the docker CLI.
+Control requests reuse one keep-alive connection; attach streams (which the
+daemon hijacks until the container exits) get a dedicated connection.
+"""
+
+import http.client
+import io
+import json
+import os
+import socket
+import struct
+import tarfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+API_VERSION = "v1.41"
+
+DEFAULT_SOCKETS = [
+    "/var/run/docker.sock",
+    str(Path.home() / ".docker" / "run" / "docker.sock"),  # Docker Desktop (macOS)
+]
+
+# Stream ids in multiplexed attach/logs output
+STDOUT = 1
+STDERR = 2
+
+
+class DockerError(Exception):
+    """An error response from the Docker daemon."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Docker API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection that connects to a unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+def find_socket() -> str:
+    """Locate the Docker daemon socket.
+
+    Honours DOCKER_HOST when it is a unix:// URL.
+
+    Returns:
+        Path to the socket
+
+    Raises:
+        DockerError: If no socket can be found
+    """
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return docker_host[len("unix://"):]
+    if docker_host:
+        raise DockerError(0, f"Only unix:// DOCKER_HOST is supported, got {docker_host}")
+
+    for path in DEFAULT_SOCKETS:
+        if os.path.exists(path):
+            return path
+    raise DockerError(0, "Docker socket not found. Is Docker running?")
+
+
+class DockerClient:
+    """Docker Engine API client holding one persistent connection."""
+
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or find_socket()
+        self._conn: Optional[UnixHTTPConnection] = None
+        # Serialises request/response cycles on the shared connection
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the persistent connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> "DockerClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _url(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        url = f"/{API_VERSION}{path}"
+        if params:
+            url += "?" + urlencode({k: v for k, v in params.items() if v is not None})
+        return url
+
+    def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                body: Any = None, headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        """Send a request on the persistent connection.
+
+        Reconnects once if the daemon closed the idle connection.
+
+        Args:
+            method: HTTP method
+            path: API path without the version prefix
+            params: Query parameters
+            body: JSON-serialisable body, or raw bytes
+            headers: Extra headers
+
+        Returns:
+            Tuple of (status, response body)
+        """
+        headers = dict(headers or {})
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+            headers.setdefault("Content-Type", "application/json")
+
+        with self._lock:
+            for attempt in (1, 2):
+                if self._conn is None:
+                    self._conn = UnixHTTPConnection(self.socket_path)
+                try:
+                    self._conn.request(method, self._url(path, params), body=body,
+                                       headers=headers)
+                    response = self._conn.getresponse()
+                    data = response.read()
+                    if response.will_close:
+                        self.close()
+                    return response.status, data
+                except (ConnectionError, http.client.RemoteDisconnected, BrokenPipeError):
+                    self.close()
+                    if attempt == 2:
+                        raise
+                except BaseException:
+                    # Interrupted mid-request (Ctrl-C, a timeout): the connection is
+                    # left waiting for a response, so later requests need a new one
+                    self.close()
+                    raise
+        raise AssertionError("unreachable")
+
+    def call(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+             body: Any = None, ok: Tuple[int, ...] = (200, 201, 204)) -> Any:
+        """Send a request and decode the JSON response.
+
+        Raises:
+            DockerError: If the status is not in ``ok``
+        """
+        status, data = self.request(method, path, params, body)
+        if status not in ok:
+            try:
+                message = json.loads(data).get("message", "")
+            except ValueError:
+                message = data.decode(errors="replace")
+            raise DockerError(status, message)
+        return json.loads(data) if data else None
+
+    def stream(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+               body: Any = None, headers: Optional[Dict[str, str]] = None
+               ) -> http.client.HTTPResponse:
+        """Open a streaming response on a dedicated connection.
+
+        The caller reads the returned response until EOF; the connection is
+        closed with it.
+        """
+        headers = dict(headers or {})
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+
+        conn = UnixHTTPConnection(self.socket_path)
+        conn.request(method, self._url(path, params), body=body, headers=headers)
+        response = conn.getresponse()
+        if response.status >= 400:
+            data = response.read()
+            conn.close()
+            raise DockerError(response.status, data.decode(errors="replace").strip())
+        return response
+
+    # -- Endpoints used by the sandbox -------------------------------------
+
+    def ping(self) -> bool:
+        """Return True if the daemon is reachable."""
+        try:
+            status, _ = self.request("GET", "/_ping")
+        except OSError:
+            return False
+        return status == 200
+
+    def info(self) -> Dict[str, Any]:
+        """Return system-wide daemon information (``docker info``)."""
+        return self.call("GET", "/info")
+
+    def image_exists(self, name: str) -> bool:
+        """Return True if the image is present locally."""
+        status, _ = self.request("GET", f"/images/{quote(name, safe='/:')}/json")
+        return status == 200
+
+    def build_image(self, tag: str, dockerfile: Path) -> Iterator[Dict[str, Any]]:
+        """Build an image from a Dockerfile with an otherwise empty context.
+
+        Yields:
+            Build progress messages from the daemon
+        """
+        context = io.BytesIO()
+        with tarfile.open(fileobj=context, mode="w") as tar:
+            tar.add(str(dockerfile), arcname="Dockerfile")
+
+        response = self.stream("POST", "/build", {"t": tag, "dockerfile": "Dockerfile", "rm": 1},
+                               body=context.getvalue(),
+                               headers={"Content-Type": "application/x-tar"})
+        for line in response:
+            if line.strip():
+                message = json.loads(line)
+                if "error" in message:
+                    raise DockerError(500, message["error"])
+                yield message
+
+    def create_container(self, name: str, config: Dict[str, Any]) -> str:
+        """Create a container and return its id."""
+        return self.call("POST", "/containers/create", {"name": name}, config)["Id"]
+
+    def start_container(self, container_id: str) -> None:
+        """Start a created container."""
+        self.call("POST", f"/containers/{container_id}/start", ok=(204, 304))
+
+    def wait_container(self, container_id: str) -> int:
+        """Block until the container exits and return its exit code.
+
+        Waits on a dedicated connection, so other threads' requests are not
+        held up and an interrupted wait leaves the shared connection usable.
+        """
+        response = self.stream("POST", f"/containers/{container_id}/wait")
+        try:
+            return json.loads(response.read())["StatusCode"]
+        finally:
+            response.close()
+
+    def kill_container(self, container_id: str) -> None:
+        """Send SIGKILL to a running container."""
+        self.call("POST", f"/containers/{container_id}/kill", ok=(204, 404, 409))
+
+    def remove_container(self, container_id: str) -> None:
+        """Force-remove a container."""
+        self.call("DELETE", f"/containers/{container_id}", {"force": 1}, ok=(204, 404, 409))
+
+    def list_containers(self, filters: Optional[Dict[str, List[str]]] = None
+                        ) -> List[Dict[str, Any]]:
+        """Return running containers (``docker ps``), optionally filtered."""
+        return self.call("GET", "/containers/json",
+                         {"filters": json.dumps(filters) if filters else None})
+
+    def inspect_container(self, container_id: str) -> Dict[str, Any]:
+        """Return low-level information on a container."""
+        return self.call("GET", f"/containers/{container_id}/json")
+
+    def exec_create(self, container_id: str, command: list,
+                    workdir: str = "/workspace") -> str:
+        """Create an exec instance in a running container and return its id."""
+        return self.call("POST", f"/containers/{container_id}/exec", body={
+            "Cmd": command,
+            "WorkingDir": workdir,
+            "AttachStdout": True,
+            "AttachStderr": True,
+        })["Id"]
+
+    def exec_start(self, exec_id: str) -> http.client.HTTPResponse:
+        """Start an exec instance.
+
+        Returns:
+            The raw multiplexed output stream; read it with demux()
+        """
+        return self.stream("POST", f"/exec/{exec_id}/start", body={"Detach": False, "Tty": False})
+
+    def exec_exit_code(self, exec_id: str) -> int:
+        """Return the exit code of a finished exec instance."""
+        return self.call("GET", f"/exec/{exec_id}/json")["ExitCode"]
+
+    def logs(self, container_id: str, follow: bool = True) -> http.client.HTTPResponse:
+        """Stream a container's stdout/stderr from its start.
+
+        With follow the stream stays open until the container exits.
+
+        Returns:
+            The raw multiplexed stream; read it with demux()
+        """
+        return self.stream("GET", f"/containers/{container_id}/logs",
+                           {"follow": int(follow), "stdout": 1, "stderr": 1})
+
+    def attach(self, container_id: str) -> http.client.HTTPResponse:
+        """Attach to a container's stdout/stderr.
+
+        Attach before starting the container so no output is lost.
+
+        Returns:
+            The raw multiplexed stream; read it with demux()
+        """
+        return self.stream("POST", f"/containers/{container_id}/attach",
+                           {"stream": 1, "stdout": 1, "stderr": 1})
+
+
+def demux(response: http.client.HTTPResponse) -> Iterator[Tuple[int, bytes]]:
+    """Split a multiplexed (non-TTY) attach/logs stream into frames.
+
+    Each frame is an 8-byte header (stream id, 3 padding bytes, big-endian
+    payload length) followed by the payload.
+    """
+    while True:
+        header = response.read(8)
+        if len(header) < 8:
+            return
+        stream_id, length = struct.unpack(">BxxxL", header)
+        payload = response.read(length)
+        if not payload:
+            return
+        yield stream_id, payload
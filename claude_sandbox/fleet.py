@@ -0,0 +1,402 @@
+"""Fleet-wide resource view of all running sandboxes.
+
+`docker stats --no-stream` asks the daemon for a fresh sample of one container
+and waits for it, so refreshing fifty sandboxes that way costs seconds and a
+process per container. The fleet monitor instead holds one streaming stats
+subscription per claude-sandbox-* container, plus one events subscription
+for starts and exits, all on non-blocking sockets served by a single
+selector loop:
+
+- the daemon pushes a stats document per container about once a second; only
+  the newest raw document is kept and it is parsed when the table is drawn,
+  so the cost grows with containers per refresh rather than with the
+  stream rate
+- each document carries the previous sample (precpu_stats), so CPU% needs no
+  history here
+- the loop wakes at most every BATCH_S and then drains every ready socket,
+  instead of waking for each document as it arrives
+- containers are found once at startup and from events afterwards, never by
+  polling the container list
+
+Used by `python3 -m claude_sandbox --top` and sandbox-monitor.sh --top.
+"""
+
+import json
+import selectors
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from .docker_api import API_VERSION, DockerClient, DockerError
+
+PREFIX = "claude-sandbox-"
+DEFAULT_INTERVAL = 2.0
+READ_SIZE = 64 * 1024
+# Minimum time between selector wakeups: documents that arrive meanwhile wait
+# in the socket buffers and are read in one batch
+BATCH_S = 0.25
+
+# Sort key -> (column, largest first)
+SORT_KEYS = {
+    "cpu": ("cpu_percent", True),
+    "mem": ("memory_percent", True),
+    "pids": ("pids", True),
+    "io": ("block_io", True),
+    "net": ("net_io", True),
+    "uptime": ("uptime", True),
+    "name": ("name", False),
+}
+
+
+class JsonStream:
+    """A streaming GET whose body is newline-delimited JSON, read without blocking.
+
+    Speaks just enough HTTP/1.1 for the daemon's streaming endpoints (chunked
+    or close-delimited bodies), since http.client cannot be read
+    incrementally from a selector loop.
+    """
+
+    def __init__(self, socket_path: str, path: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.sock.sendall(f"GET /{API_VERSION}{path} HTTP/1.1\r\nHost: docker\r\n\r\n".encode())
+        self.sock.setblocking(False)
+        self.status: Optional[int] = None
+        self.eof = False
+        self._raw = b""
+        self._body = b""
+        self._chunked = False
+
+    def fileno(self) -> int:
+        return self.sock.fileno()
+
+    def close(self) -> None:
+        self.sock.close()
+
+    def read(self) -> List[bytes]:
+        """Read what has arrived; return the complete lines received."""
+        try:
+            data = self.sock.recv(READ_SIZE)
+        except BlockingIOError:
+            return []
+        except OSError:
+            data = b""
+        if not data:
+            self.eof = True
+        self._raw += data
+
+        if self.status is None:
+            end = self._raw.find(b"\r\n\r\n")
+            if end < 0:
+                return []
+            head = self._raw[:end].decode("latin-1").split("\r\n")
+            self.status = int(head[0].split()[1])
+            self._chunked = any(line.lower().replace(" ", "") == "transfer-encoding:chunked"
+                                for line in head[1:])
+            self._raw = self._raw[end + 4:]
+            if self.status != 200:
+                self.eof = True
+                return []
+
+        if self._chunked:
+            self._dechunk()
+        else:
+            self._body += self._raw
+            self._raw = b""
+        lines = self._body.split(b"\n")
+        self._body = lines.pop()
+        return [line for line in lines if line.strip()]
+
+    def _dechunk(self) -> None:
+        while True:
+            end = self._raw.find(b"\r\n")
+            if end < 0:
+                return
+            size = int(self._raw[:end].split(b";")[0], 16)
+            if size == 0:
+                self.eof = True
+                return
+            if len(self._raw) < end + size + 4:
+                return
+            self._body += self._raw[end + 2:end + 2 + size]
+            self._raw = self._raw[end + size + 4:]
+
+
+@dataclass
+class Row:
+    """One container's line in the table."""
+
+    name: str
+    cpu_percent: float
+    cpus: Optional[float]
+    memory: int
+    memory_limit: Optional[int]
+    pids: Optional[int]
+    block_read: int
+    block_write: int
+    net_rx: int
+    net_tx: int
+    uptime: float
+
+    @property
+    def memory_percent(self) -> float:
+        return self.memory * 100 / self.memory_limit if self.memory_limit else 0.0
+
+    @property
+    def block_io(self) -> int:
+        return self.block_read + self.block_write
+
+    @property
+    def net_io(self) -> int:
+        return self.net_rx + self.net_tx
+
+
+@dataclass
+class Watched:
+    """A container with an open stats subscription."""
+
+    name: str
+    started: float
+    cpus: Optional[float]
+    stream: JsonStream
+    latest: bytes = b""
+
+
+def parse_stats(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a stats document to the table's values, computed like `docker stats`.
+
+    CPU% is relative to one core (400% is four busy cores); memory excludes
+    the reclaimable page cache (inactive_file).
+    """
+    cpu, precpu = doc.get("cpu_stats") or {}, doc.get("precpu_stats") or {}
+    cpu_delta = ((cpu.get("cpu_usage") or {}).get("total_usage", 0)
+                 - (precpu.get("cpu_usage") or {}).get("total_usage", 0))
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    online = cpu.get("online_cpus") or len((cpu.get("cpu_usage") or {}).get("percpu_usage")
+                                           or []) or 1
+    cpu_percent = cpu_delta / system_delta * online * 100 \
+        if system_delta > 0 and cpu_delta > 0 else 0.0
+
+    memory = doc.get("memory_stats") or {}
+    stats = memory.get("stats") or {}
+    cache = stats.get("inactive_file", stats.get("total_inactive_file", 0))
+    usage = memory.get("usage", 0)
+
+    block = (doc.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+    networks = (doc.get("networks") or {}).values()
+    return {
+        "cpu_percent": cpu_percent,
+        "memory": usage - cache if cache < usage else usage,
+        "memory_limit": memory.get("limit"),
+        "pids": (doc.get("pids_stats") or {}).get("current"),
+        "block_read": sum(e.get("value", 0) for e in block if e.get("op", "").lower() == "read"),
+        "block_write": sum(e.get("value", 0) for e in block if e.get("op", "").lower() == "write"),
+        "net_rx": sum(n.get("rx_bytes", 0) for n in networks),
+        "net_tx": sum(n.get("tx_bytes", 0) for n in networks),
+    }
+
+
+def parse_started(value: str) -> float:
+    """Parse a State.StartedAt timestamp (RFC 3339 with nanoseconds) to epoch seconds."""
+    try:
+        return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").replace(
+            tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return time.time()
+
+
+class FleetMonitor:
+    """Streams stats for every running container whose name starts with prefix.
+
+    Example:
+        with DockerClient() as client, FleetMonitor(client) as fleet:
+            while True:
+                fleet.poll(2.0)
+                print(render(fleet.rows()))
+    """
+
+    def __init__(self, client: DockerClient, prefix: str = PREFIX):
+        self.client = client
+        self.prefix = prefix
+        self.containers: Dict[str, Watched] = {}
+        self._selector = selectors.DefaultSelector()
+        # Subscribe to events before listing, so no start falls in between
+        events = json.dumps({"type": ["container"], "event": ["start", "die"]})
+        self._events = JsonStream(client.socket_path, f"/events?filters={quote(events)}")
+        self._selector.register(self._events, selectors.EVENT_READ, None)
+        for container in client.list_containers({"name": [prefix]}):
+            name = container["Names"][0].lstrip("/")
+            if name.startswith(prefix):
+                self._add(container["Id"], name)
+
+    def __enter__(self) -> "FleetMonitor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close every subscription."""
+        for container_id in list(self.containers):
+            self._remove(container_id)
+        self._selector.close()
+        self._events.close()
+
+    def watch(self, fileobj: Any) -> None:
+        """Also wake poll() when fileobj is readable (e.g. the keyboard)."""
+        self._selector.register(fileobj, selectors.EVENT_READ, fileobj)
+
+    def poll(self, timeout: float) -> List[Any]:
+        """Serve the subscriptions for up to timeout seconds.
+
+        Returns:
+            Watched file objects that became readable (poll returns early then)
+
+        Raises:
+            DockerError: If the daemon closes the events subscription
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            woken = []
+            ready = self._selector.select(remaining)
+            for key, _ in ready:
+                if key.fileobj is self._events:
+                    for line in self._events.read():
+                        self._event(line)
+                    if self._events.eof:
+                        raise DockerError(self._events.status or 0, "events stream closed")
+                elif isinstance(key.data, str):
+                    watched = self.containers.get(key.data)
+                    if watched is None:
+                        continue
+                    lines = watched.stream.read()
+                    if lines:
+                        watched.latest = lines[-1]
+                    if watched.stream.eof:
+                        self._remove(key.data)
+                else:
+                    woken.append(key.data)
+            if woken:
+                return woken
+            if ready:
+                time.sleep(min(BATCH_S, max(deadline - time.monotonic(), 0)))
+
+    def rows(self) -> List[Row]:
+        """Return a row per container that has reported stats."""
+        now = time.time()
+        rows = []
+        for watched in self.containers.values():
+            if not watched.latest:
+                continue
+            try:
+                values = parse_stats(json.loads(watched.latest))
+            except ValueError:
+                continue
+            rows.append(Row(name=watched.name, cpus=watched.cpus,
+                            uptime=now - watched.started, **values))
+        return rows
+
+    def _event(self, line: bytes) -> None:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return
+        actor = event.get("Actor") or {}
+        container_id = actor.get("ID") or event.get("id")
+        name = (actor.get("Attributes") or {}).get("name", "")
+        action = event.get("Action") or event.get("status")
+        if action == "start" and name.startswith(self.prefix):
+            self._add(container_id, name)
+        elif action == "die" and container_id in self.containers:
+            self._remove(container_id)
+
+    def _add(self, container_id: str, name: str) -> None:
+        if container_id in self.containers:
+            return
+        try:
+            details = self.client.inspect_container(container_id)
+            stream = JsonStream(self.client.socket_path, f"/containers/{container_id}/stats")
+        except (DockerError, OSError):
+            return  # gone again already
+        nano_cpus = (details.get("HostConfig") or {}).get("NanoCpus")
+        self.containers[container_id] = Watched(
+            name, parse_started((details.get("State") or {}).get("StartedAt", "")),
+            nano_cpus / 1e9 if nano_cpus else None, stream)
+        self._selector.register(stream, selectors.EVENT_READ, container_id)
+
+    def _remove(self, container_id: str) -> None:
+        watched = self.containers.pop(container_id)
+        self._selector.unregister(watched.stream)
+        watched.stream.close()
+
+
+def format_bytes(size: Optional[int]) -> str:
+    """Format a byte count like docker stats ('512KB', '1.5GB')."""
+    if size is None:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" or size >= 100 else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
+def format_uptime(seconds: float) -> str:
+    """Format a duration as '45s', '12m03s', '3h07m' or '2d04h'."""
+    seconds = int(max(seconds, 0))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    if seconds < 86400:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 86400}d{seconds % 86400 // 3600:02d}h"
+
+
+def _fit(name: str, width: int) -> str:
+    """Shorten a name to width, keeping its end (where container names differ)."""
+    return name if len(name) <= width else "…" + name[-(width - 1):]
+
+
+def sort_rows(rows: List[Row], key: str, reverse: bool = False) -> List[Row]:
+    """Sort rows by a SORT_KEYS key (largest first, except name); reverse flips it."""
+    column, descending = SORT_KEYS[key]
+    return sorted(rows, key=lambda row: getattr(row, column), reverse=descending != reverse)
+
+
+def render(rows: List[Row], key: str = "cpu", reverse: bool = False,
+           size: Tuple[int, int] = (120, 40), own_cpu: Optional[float] = None) -> str:
+    """Render the table, top-style, for a terminal of size (columns, lines)."""
+    width, height = size
+    rows = sort_rows(rows, key, reverse)
+    used = sum(row.memory for row in rows)
+    limit = sum(row.memory_limit or 0 for row in rows)
+    summary = (f"{len(rows)} sandboxes  CPU {sum(row.cpu_percent for row in rows):.0f}%  "
+               f"memory {format_bytes(used)} / {format_bytes(limit)}  "
+               f"pids {sum(row.pids or 0 for row in rows)}  sort: {key}"
+               f"{' (reversed)' if reverse else ''}")
+    if own_cpu is not None:
+        summary += f"  monitor: {own_cpu:.2f}% CPU"
+
+    name_width = max(12, width - 95)
+    lines = [summary[:width], "",
+             f"{'NAME':<{name_width}} {'CPU%':>7} {'CPUS':>5} {'MEM':>8} {'LIMIT':>8} "
+             f"{'MEM%':>6} {'PIDS':>5} {'BLOCK R / W':>17} {'NET RX / TX':>17} {'UPTIME':>7}"]
+    for row in rows[:max(height - 5, 1)]:
+        lines.append(
+            f"{_fit(row.name, name_width):<{name_width}} {row.cpu_percent:>7.1f} "
+            f"{row.cpus if row.cpus is not None else '-':>5} "
+            f"{format_bytes(row.memory):>8} {format_bytes(row.memory_limit):>8} "
+            f"{row.memory_percent:>6.1f} {row.pids if row.pids is not None else '-':>5} "
+            f"{format_bytes(row.block_read) + ' / ' + format_bytes(row.block_write):>17} "
+            f"{format_bytes(row.net_rx) + ' / ' + format_bytes(row.net_tx):>17} "
+            f"{format_uptime(row.uptime):>7}")
+    if len(rows) > max(height - 5, 1):
+        lines.append(f"... {len(rows) - max(height - 5, 1)} more")
+    return "\n".join(lines)
@@ -0,0 +1,982 @@
+"""Incremental SQLite index of sandbox run logs.
+
+sandbox-history.sh used to re-parse every logs/*.json file on each call. The
+index keeps one row per run and remembers, per log file, how far it has been
+read, so each query only ingests what was appended since the last one:
+
+- New log files show up as a change of the directory's mtime; when it is
+  unchanged the directory is not even listed.
+- Runs without a complete event yet ("open" files) are re-checked by size
+  and read from their last offset.
+- Finished files are never stat()ed again; deleted files drop out on the
+  next directory change. So are .json files that are not run logs (batch
+  logs, other tools' output): ones whose first line is not a start event.
+
+Start and complete event data are kept verbatim as JSON, so later queries
+can use json_extract() on fields the index has no column for.
+
+The index is a cache in .sandbox-cache/history.sqlite (outside the log
+directory, whose mtime it relies on) and can be deleted at any time; it is
+rebuilt on the next query.
+"""
+
+import json
+import os
+import re
+import math
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .output_log import OutputReader, format_line, output_dir
+
+DEFAULT_INDEX = Path(".sandbox-cache/history.sqlite")
+SCHEMA_VERSION = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS runs (
+    container TEXT PRIMARY KEY,
+    started TEXT,
+    command TEXT,
+    workspace TEXT,
+    runtime TEXT,
+    memory TEXT,
+    cpus TEXT,
+    signature TEXT,
+    completed TEXT,
+    exit_code INTEGER,
+    duration_seconds INTEGER,
+    duration_ms INTEGER,
+    success INTEGER,
+    start_data TEXT,
+    complete_data TEXT
+);
+CREATE TABLE IF NOT EXISTS phases (
+    container TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    ms INTEGER NOT NULL,
+    PRIMARY KEY (container, phase)
+);
+CREATE INDEX IF NOT EXISTS files_open ON files (complete);
+-- Covering indexes: listings and --stats never touch the wide JSON columns
+CREATE INDEX IF NOT EXISTS runs_started
+    ON runs (started, success, exit_code, duration_seconds, duration_ms);
+CREATE INDEX IF NOT EXISTS runs_success ON runs (success, started);
+CREATE INDEX IF NOT EXISTS runs_signature ON runs (signature, started);
+"""
+
+# Columns filled from the start event's data
+START_COLUMNS = ["command", "workspace", "runtime", "memory", "cpus", "signature"]
+RUN_COLUMNS = ["started", *START_COLUMNS, "completed", "exit_code", "duration_seconds",
+               "duration_ms", "success", "start_data", "complete_data"]
+
+# One statement per log file; columns not seen in this chunk keep their value
+UPSERT_RUN = (
+    f"INSERT INTO runs (container, {', '.join(RUN_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (len(RUN_COLUMNS) + 1))}) "
+    "ON CONFLICT (container) DO UPDATE SET "
+    + ", ".join(f"{c} = COALESCE(excluded.{c}, runs.{c})" for c in RUN_COLUMNS))
+UPSERT_FILE = (
+    "INSERT INTO files (name, offset, complete) VALUES (?, ?, ?) "
+    "ON CONFLICT (name) DO UPDATE SET offset = excluded.offset, "
+    "complete = MAX(files.complete, excluded.complete)")
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class HistoryIndex:
+    """SQLite index over a directory of run logs."""
+
+    def __init__(self, log_dir: Path, path: Path = DEFAULT_INDEX):
+        self.log_dir = log_dir
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.create_function("REGEXP", 2, _regexp, deterministic=True)
+
+        version = self._schema_version()
+        if version not in (None, SCHEMA_VERSION) or \
+                self._get_meta("log_dir") not in (None, str(log_dir.resolve())):
+            # Old layout or another log directory: the index is only a cache,
+            # start over
+            self.db.executescript("DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS files; "
+                                  "DROP TABLE IF EXISTS runs; DROP TABLE IF EXISTS phases;")
+        self.db.executescript(SCHEMA)
+        self._set_meta("schema_version", SCHEMA_VERSION)
+        self._set_meta("log_dir", log_dir.resolve())
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "HistoryIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _schema_version(self) -> Optional[int]:
+        value = self._get_meta("schema_version")
+        return int(value) if value else None
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        try:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:
+            return None  # no meta table yet
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Any) -> None:
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        (key, str(value)))
+
+    # -- Ingestion -----------------------------------------------------------
+
+    def refresh(self) -> int:
+        """Ingest everything appended to the logs since the last refresh.
+
+        Returns:
+            Number of log files read
+        """
+        try:
+            dir_mtime = os.stat(self.log_dir).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            if self._get_meta("dir_mtime") == str(dir_mtime):
+                # No files added or removed: only open runs can have grown
+                names = dict(self.db.execute(
+                    "SELECT name, offset FROM files WHERE complete = 0"))
+            else:
+                known = {name for name, in self.db.execute("SELECT name FROM files")}
+                listed = {entry.name for entry in os.scandir(self.log_dir)
+                          if entry.name.endswith(".json") and entry.is_file()}
+                for name in known - listed:
+                    self._forget(name)
+                names = dict.fromkeys(listed - known)
+                names.update(self.db.execute(
+                    "SELECT name, offset FROM files WHERE complete = 0"))
+
+            files, runs, phases = [], [], []
+            for name, offset in names.items():
+                ingested = self._ingest(name, offset)
+                if ingested:
+                    files.append(ingested[0])
+                    if ingested[1] is not None:
+                        runs.append(ingested[1])
+                    phases.extend(ingested[2])
+            self.db.executemany(UPSERT_FILE, files)
+            self.db.executemany(UPSERT_RUN, runs)
+            self.db.executemany("INSERT OR REPLACE INTO phases (container, phase, ms) "
+                                "VALUES (?, ?, ?)", phases)
+
+            # A file created in the same mtime tick as this scan could be
+            # missed next time, so only trust mtimes that are safely past
+            if time.time_ns() - dir_mtime > 2_000_000_000:
+                self._set_meta("dir_mtime", dir_mtime)
+            else:
+                self._set_meta("dir_mtime", "")
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return len(files)
+
+    def _forget(self, name: str) -> None:
+        self.db.execute("DELETE FROM files WHERE name = ?", (name,))
+        self.db.execute("DELETE FROM runs WHERE container = ?", (name[:-len(".json")],))
+        self.db.execute("DELETE FROM phases WHERE container = ?", (name[:-len(".json")],))
+
+    def _ingest(self, name: str, offset: Optional[int]
+                ) -> Optional[Tuple[Tuple[Any, ...], Optional[Tuple[Any, ...]],
+                                    List[Tuple[str, str, int]]]]:
+        """Read a log file from its last offset.
+
+        Returns:
+            None if nothing new was read, else (files row, runs row or None,
+            phases rows)
+        """
+        path = self.log_dir / name
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            self._forget(name)
+            return None
+
+        if size == offset:
+            return None
+        if offset is None or size < offset:
+            if offset is not None:
+                # Truncated or replaced: read it again from the start
+                self._forget(name)
+            offset = 0
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        # Only consume whole lines; a partial last line is read next time
+        end = data.rfind(b"\n") + 1
+
+        container = name[:-len(".json")]
+        run: Dict[str, Any] = {}
+        phases: List[Tuple[str, str, int]] = []
+        # A run log starts with its start event; anything else is done with
+        not_run = False
+        for number, line in enumerate(data[:end].splitlines()):
+            try:
+                record = json.loads(line)
+                event = record["event"]
+                fields = record.get("data") or {}
+            except (ValueError, KeyError, TypeError):
+                event = fields = None
+            if offset == 0 and number == 0 and event != "start":
+                not_run = True
+                break
+            if event is None:
+                continue
+            if event == "start":
+                run["started"] = record.get("timestamp")
+                for column in START_COLUMNS:
+                    if fields.get(column) is not None:
+                        run[column] = str(fields[column])
+                run["start_data"] = json.dumps(fields)
+            elif event == "complete":
+                run["completed"] = record.get("timestamp")
+                run["exit_code"] = _int(fields.get("exit_code"))
+                run["duration_seconds"] = _int(fields.get("duration_seconds"))
+                run["duration_ms"] = _int(fields.get("duration_ms"))
+                run["success"] = int(str(fields.get("success")).lower() == "true")
+                run["complete_data"] = json.dumps(fields)
+                phases_ms = fields.get("phases_ms")
+                if isinstance(phases_ms, dict):
+                    phases.extend((container, phase, ms) for phase, ms in phases_ms.items()
+                                  if isinstance(ms, int))
+
+        # UPSERT_FILE keeps complete=1 once set, so a chunk without the
+        # complete event doesn't reopen the file
+        if not_run:
+            return (name, size, 1), None, []
+        file_row = (name, offset + end, int("completed" in run))
+        if not run:
+            return file_row, None, phases
+        return file_row, (container, *(run.get(c) for c in RUN_COLUMNS)), phases
+
+    # -- Queries -------------------------------------------------------------
+
+    @staticmethod
+    def _where(success: Optional[bool] = None, since: Optional[str] = None,
+               until: Optional[str] = None, container: Optional[str] = None,
+               oom: Optional[bool] = None, throttled: Optional[bool] = None,
+               peak_above: Optional[float] = None) -> Tuple[str, List[Any]]:
+        clauses = ["exit_code IS NOT NULL"]
+        params: List[Any] = []
+        if success is not None:
+            clauses.append("success = ?")
+            params.append(int(success))
+        if oom is not None:
+            clauses.append(f"{OOM_KILLED} = ?")
+            params.append(int(oom))
+        if throttled is not None:
+            clauses.append(f"({THROTTLED_PERIODS} > 0) = ?")
+            params.append(int(throttled))
+        if peak_above is not None:
+            clauses.append(f"{PEAK_PERCENT} >= ?")
+            params.append(peak_above)
+        if since:
+            clauses.append("started >= ?")
+            params.append(since)
+        if until:
+            clauses.append("started < ?")
+            params.append(until)
+        if container:
+            clauses.append("container REGEXP ?")
+            params.append(container)
+        return " AND ".join(clauses), params
+
+    def runs(self, limit: Optional[int] = 10, **filters: Any) -> List[sqlite3.Row]:
+        """Return finished runs, newest first.
+
+        Args:
+            limit: Maximum number of runs (None for all)
+            **filters: success (bool), since and until (YYYY-MM-DD or ISO
+                timestamp; until is exclusive), container (regular expression),
+                oom and throttled (bool), peak_above (peak memory as a
+                percentage of the limit)
+        """
+        where, params = self._where(**filters)
+        sql = f"SELECT * FROM runs WHERE {where} ORDER BY started DESC, container DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.db.execute(sql, params).fetchall()
+
+    def phase_summary(self, group_by: str = "runtime",
+                      **filters: Any) -> Dict[str, Dict[str, Any]]:
+        """Average launch phase timings per group of runs.
+
+        Phase averages are per run in the group (a phase that only some runs
+        have, like build, is amortised over all of them), so they add up to
+        the average launch time.
+
+        Args:
+            group_by: "runtime", or "config" for runtime plus memory and cpus
+            **filters: As for runs()
+
+        Returns:
+            Mapping of group label to {"runs": n, "phases": {phase: avg_ms}}
+        """
+        group = {"runtime": "runtime",
+                 "config": "runtime || ' mem=' || memory || ' cpus=' || cpus"}[group_by]
+        where, params = self._where(**filters)
+        groups: Dict[str, Dict[str, Any]] = {}
+        for row in self.db.execute(
+                f"SELECT COALESCE({group}, '?') AS label, COUNT(*) AS runs FROM runs "
+                f"WHERE {where} AND container IN (SELECT container FROM phases) "
+                "GROUP BY label ORDER BY label", params):
+            groups[row["label"]] = {"runs": row["runs"], "phases": {}}
+        for row in self.db.execute(
+                f"SELECT COALESCE({group}, '?') AS label, phase, SUM(ms) AS total_ms "
+                f"FROM runs JOIN phases USING (container) WHERE {where} "
+                "GROUP BY label, phase", params):
+            group_stats = groups[row["label"]]
+            group_stats["phases"][row["phase"]] = round(row["total_ms"] / group_stats["runs"])
+        return groups
+
+    def usage(self, signature: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Resource usage of the most recent sampled runs of a workload.
+
+        Only runs with a cgroup_samples summary (SANDBOX_SAMPLE_HZ or
+        SANDBOX_RIGHTSIZE set) are returned.
+
+        Args:
+            signature: Workload signature from the start event
+            limit: Maximum number of runs, newest first
+
+        Returns:
+            One dict per run: container, memory (the run's limit), exit_code,
+            oom_killed, memory_peak_bytes and cpu_peak_percent
+        """
+        summary = "'$.cgroup_samples.summary"
+        rows = self.db.execute(
+            "SELECT container, memory, exit_code, "
+            f"{OOM_KILLED} AS oom_killed, "
+            # The watcher's peak is exact; the sampler's can miss a spike
+            f"COALESCE({RESOURCES}.memory_peak_bytes'), "
+            f"json_extract(complete_data, {summary}.memory_peak_bytes')) AS memory_peak_bytes, "
+            f"COALESCE(json_extract(complete_data, {summary}.cpu_peak_percent'), "
+            f"json_extract(complete_data, {summary}.cpu_avg_percent')) AS cpu_peak_percent "
+            "FROM runs WHERE signature = ? AND exit_code IS NOT NULL "
+            f"AND json_extract(complete_data, {summary}.memory_peak_bytes') IS NOT NULL "
+            "ORDER BY started DESC LIMIT ?", (signature, limit))
+        return [dict(row, oom_killed=bool(row["oom_killed"])) for row in rows]
+
+    def latest(self, **filters: Any) -> Optional[str]:
+        """Return the start timestamp of the newest finished run."""
+        where, params = self._where(**filters)
+        return self.db.execute(f"SELECT MAX(started) FROM runs WHERE {where}",
+                               params).fetchone()[0]
+
+    def latency_report(self, by: List[str], **filters: Any) -> List[Dict[str, Any]]:
+        """Duration percentiles, failure rate and throughput per group of runs.
+
+        Durations are duration_ms where the log has it and whole seconds
+        otherwise. Failed runs count towards the percentiles too: a change
+        that makes runs fail fast shows up in failure_rate instead.
+
+        Args:
+            by: Keys of REPORT_KEYS to group by, in order (empty for a single
+                group of all runs)
+            **filters: As for runs()
+
+        Returns:
+            One dict per group, sorted by group: "group" ({key: value}),
+            "runs", "failed", "failure_rate", "throughput_per_hour" and
+            "mean_ms", "p50_ms", "p90_ms", "p99_ms"
+        """
+        unknown = [key for key in by if key not in REPORT_KEYS]
+        if unknown:
+            raise ValueError(f"unknown report key: {', '.join(unknown)}")
+        where, params = self._where(**filters)
+        keys = "".join(f"COALESCE({REPORT_KEYS[key]}, '?'), " for key in by)
+        rows = self.db.execute(
+            f"SELECT {keys}COALESCE(duration_ms, duration_seconds * 1000), success, "
+            f"started, completed FROM runs WHERE {where} ORDER BY started", params)
+
+        groups: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        for row in rows:
+            group = groups.setdefault(tuple(row[:len(by)]), {
+                "durations": [], "runs": 0, "failed": 0,
+                "first": row[-2], "last": row[-1]})
+            ms, success, started, completed = row[len(by):]
+            group["runs"] += 1
+            group["failed"] += not success
+            if ms is not None:
+                group["durations"].append(ms)
+            if completed and (group["last"] is None or completed > group["last"]):
+                group["last"] = completed
+
+        # Time window groups are measured over the whole window, others over
+        # the span from their first start to their last completion
+        window_hours = [WINDOW_HOURS[key] for key in by if key in WINDOW_HOURS]
+        report = []
+        for key in sorted(groups):
+            group = groups[key]
+            durations = sorted(group["durations"])
+            if window_hours:
+                hours: Optional[float] = min(window_hours)
+            else:
+                hours = _hours_between(group["first"], group["last"])
+            report.append({
+                "group": dict(zip(by, key)),
+                "runs": group["runs"],
+                "failed": group["failed"],
+                "failure_rate": round(group["failed"] / group["runs"], 4),
+                "throughput_per_hour": round(group["runs"] / hours, 2) if hours else None,
+                "mean_ms": round(sum(durations) / len(durations)) if durations else None,
+                **{f"p{pct}_ms": percentile(durations, pct) for pct in PERCENTILES},
+            })
+        return report
+
+    def regressions(self, by: List[str], current: Tuple[str, str],
+                    baseline: Tuple[str, str], threshold_pct: float = 20.0,
+                    min_runs: int = 5, **filters: Any) -> List[Dict[str, Any]]:
+        """Compare each group's percentiles in a current and a baseline window.
+
+        Args:
+            by: Grouping keys as for latency_report(); time window keys are
+                dropped, the windows are the comparison
+            current: (since, until) of the current window
+            baseline: (since, until) of the baseline window
+            threshold_pct: Flag a percentile that grew by more than this
+            min_runs: Groups with fewer runs in either window are reported
+                but never flagged
+            **filters: success and container, as for runs()
+
+        Returns:
+            One dict per group present in both windows: "group", "baseline"
+            and "current" (latency_report() entries), "change_pct"
+            ({"p50": ..., ...}), "regressed" (percentiles over the threshold)
+            and "enough_runs"
+        """
+        by = [key for key in by if key not in WINDOW_HOURS]
+        filters = {k: v for k, v in filters.items() if k not in ("since", "until")}
+        base = {tuple(g["group"].values()): g
+                for g in self.latency_report(by, since=baseline[0], until=baseline[1], **filters)}
+        result = []
+        for cur in self.latency_report(by, since=current[0], until=current[1], **filters):
+            old = base.get(tuple(cur["group"].values()))
+            if old is None:
+                continue
+            change = {}
+            for pct in PERCENTILES:
+                before, after = old[f"p{pct}_ms"], cur[f"p{pct}_ms"]
+                change[f"p{pct}"] = (round((after - before) * 100 / before, 1)
+                                     if before and after is not None else None)
+            enough = old["runs"] >= min_runs and cur["runs"] >= min_runs
+            result.append({
+                "group": cur["group"],
+                "baseline": old,
+                "current": cur,
+                "change_pct": change,
+                "regressed": [p for p, c in change.items()
+                              if enough and c is not None and c > threshold_pct],
+                "enough_runs": enough,
+            })
+        return result
+
+    def empty(self) -> bool:
+        """Return True if no log files have been indexed."""
+        return self.db.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def stats(self, **filters: Any) -> Dict[str, Any]:
+        """Return aggregate counts, durations and resource accounting over finished runs.
+
+        Resource figures cover runs whose complete event has "resources"
+        (cgroup v2 Linux hosts).
+        """
+        where, params = self._where(**filters)
+        row = self.db.execute(
+            "SELECT COUNT(*) AS total, COALESCE(SUM(success), 0) AS success, "
+            "COALESCE(SUM(duration_seconds), 0) AS total_duration, "
+            "COALESCE(SUM(COALESCE(duration_ms, duration_seconds * 1000)), 0) "
+            "AS total_duration_ms, "
+            f"COALESCE(SUM({OOM_KILLED}), 0) AS oom_killed, "
+            f"COUNT({RESOURCES}')) AS with_resources, "
+            f"AVG({PEAK_PERCENT}) AS peak_percent_avg, MAX({PEAK_PERCENT}) AS peak_percent_max, "
+            f"COALESCE(SUM({RESOURCES}.memory_events.high') > 0), 0) AS high_runs, "
+            f"COALESCE(SUM({THROTTLED_PERIODS} > 0), 0) AS throttled, "
+            f"COALESCE(SUM({RESOURCES}.cpu_throttling.throttled_usec')), 0) AS throttled_usec "
+            f"FROM runs WHERE {where}", params).fetchone()
+        return {
+            "total": row["total"],
+            "success": row["success"],
+            "failed": row["total"] - row["success"],
+            "total_duration": row["total_duration"],
+            "total_duration_ms": row["total_duration_ms"],
+            "oom_killed": row["oom_killed"],
+            "with_resources": row["with_resources"],
+            "peak_percent_avg": row["peak_percent_avg"],
+            "peak_percent_max": row["peak_percent_max"],
+            "high_runs": row["high_runs"],
+            "throttled": row["throttled"],
+            "throttled_usec": row["throttled_usec"],
+        }
+
+
+# complete_data expressions for the cgroup accounting (see cgroup.CgroupWatcher)
+RESOURCES = "json_extract(complete_data, '$.resources"
+OOM_KILLED = (f"COALESCE(json_extract(complete_data, '$.oom_killed') = 1 "
+              f"OR {RESOURCES}.memory_events.oom_kill') > 0, 0)")
+THROTTLED_PERIODS = f"{RESOURCES}.cpu_throttling.nr_throttled')"
+PEAK_PERCENT = (f"{RESOURCES}.memory_peak_bytes') * 100.0 "
+                f"/ NULLIF({RESOURCES}.memory_max_bytes'), 0)")
+
+
+def _regexp(pattern: str, value: Optional[str]) -> bool:
+    return value is not None and re.search(pattern, value) is not None
+
+
+# Grouping keys of latency_report(): run columns and start-time windows
+REPORT_KEYS = {
+    "command": "command",
+    "runtime": "runtime",
+    "memory": "memory",
+    "cpus": "cpus",
+    "hour": "substr(started, 1, 13) || ':00'",
+    "day": "substr(started, 1, 10)",
+    "week": "strftime('%Y-W%W', started)",
+}
+WINDOW_HOURS = {"hour": 1, "day": 24, "week": 168}
+PERCENTILES = (50, 90, 99)
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def percentile(values: List[int], pct: float) -> Optional[int]:
+    """Percentile of sorted values, interpolating between closest ranks."""
+    if not values:
+        return None
+    rank = (len(values) - 1) * pct / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(values) - 1)
+    return round(values[low] + (values[high] - values[low]) * (rank - low))
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a log timestamp or a YYYY-MM-DD date (UTC)."""
+    for fmt in (TIMESTAMP_FORMAT, "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    raise ValueError(f"invalid timestamp: {value}")
+
+
+def parse_span(value: str) -> timedelta:
+    """Parse a window length like 90m, 24h, 7d or 2w."""
+    match = re.fullmatch(r"(\d+)([mhdw])", value)
+    if not match:
+        raise ValueError(f"invalid window length: {value} (use e.g. 90m, 24h, 7d, 2w)")
+    unit = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}[match.group(2)]
+    return timedelta(**{unit: int(match.group(1))})
+
+
+def _hours_between(first: Optional[str], last: Optional[str]) -> Optional[float]:
+    try:
+        seconds = (parse_timestamp(last) - parse_timestamp(first)).total_seconds()
+    except (TypeError, ValueError):
+        return None
+    return seconds / 3600 if seconds > 0 else None
+
+
+# -- Command line (used by sandbox-history.sh) ------------------------------
+
+GREEN = "\033[0;32m"
+RED = "\033[0;31m"
+YELLOW = "\033[1;33m"
+CYAN = "\033[0;36m"
+NC = "\033[0m"
+
+
+def print_runs(index: HistoryIndex, runs: List[sqlite3.Row], raw_json: bool) -> None:
+    """Print runs in sandbox-history.sh's format, or their raw log lines."""
+    if raw_json:
+        for run in runs:
+            try:
+                sys.stdout.write((index.log_dir / f"{run['container']}.json").read_text())
+            except OSError:
+                pass
+        return
+
+    print(f"{CYAN}=== Sandbox Execution History ==={NC}")
+    print()
+    for run in runs:
+        status = f"{GREEN}✓ SUCCESS{NC}" if run["success"] else f"{RED}✗ FAILED{NC}"
+        print(f"{YELLOW}Container:{NC} {run['container']}")
+        print(f"  Status: {status} (exit code: {run['exit_code']})")
+        print(f"  Started: {run['started'] or ''}")
+        print(f"  Duration: {run['duration_seconds'] if run['duration_seconds'] is not None else ''}s")
+        print(f"  Command: {run['command'] or ''}")
+        resources = _resources_line(run)
+        if resources:
+            print(f"  Resources: {resources}")
+        output = _output_line(run)
+        if output:
+            print(f"  Output: {output}")
+        print()
+
+
+def _output_line(run: sqlite3.Row) -> str:
+    """Summarize a run's captured output."""
+    try:
+        output = json.loads(run["complete_data"] or "{}").get("output") or {}
+    except ValueError:
+        return ""
+    if not output:
+        return ""
+    return (f"{output.get('lines', 0)} lines in {output.get('segments', 1)} segment(s) "
+            f"(--output {run['container']})")
+
+
+def print_output(log_dir: Path, container: str, tail: Optional[int]) -> int:
+    """Print a run's captured output, or its last tail lines."""
+    try:
+        reader = OutputReader(output_dir(log_dir, container))
+    except FileNotFoundError:
+        print(f"No captured output for {container}")
+        return 1
+    lines = reader.tail(tail) if tail is not None else reader.read(0, len(reader))
+    for line in lines:
+        print(format_line(*line))
+    return 0
+
+
+def _resources_line(run: sqlite3.Row) -> str:
+    """Summarize a run's peak memory, OOM and throttling counters."""
+    try:
+        complete = json.loads(run["complete_data"] or "{}")
+    except ValueError:
+        return ""
+    resources = complete.get("resources") or {}
+    if not resources:
+        return f"{RED}OOM-killed{NC}" if complete.get("oom_killed") else ""
+
+    peak, limit = resources.get("memory_peak_bytes"), resources.get("memory_max_bytes")
+    parts = [f"peak {peak / 2**20:.0f}MB" + (f" of {limit / 2**20:.0f}MB "
+                                              f"({peak * 100 / limit:.0f}%)" if limit else "")]
+    events = resources.get("memory_events", {})
+    if complete.get("oom_killed") or events.get("oom_kill"):
+        parts.append(f"{RED}OOM-killed{NC} (oom_kill {events.get('oom_kill', 0)})")
+    if events.get("high"):
+        parts.append(f"{events['high']} memory.high events")
+    throttling = resources.get("cpu_throttling", {})
+    if throttling.get("nr_throttled"):
+        parts.append(f"CPU throttled {throttling['nr_throttled']}/{throttling['nr_periods']} "
+                     f"periods ({throttling.get('throttled_usec', 0) / 1e6:.1f}s)")
+    return ", ".join(parts)
+
+
+def print_stats(stats: Dict[str, Any]) -> None:
+    """Print aggregate statistics in sandbox-history.sh's format."""
+    print(f"{CYAN}=== Sandbox Execution Statistics ==={NC}")
+    print()
+    print(f"Total Executions: {stats['total']}")
+    print(f"Successful: {GREEN}{stats['success']}{NC}")
+    print(f"Failed: {RED}{stats['failed']}{NC}")
+    if stats["total"]:
+        print(f"Success Rate: {stats['success'] * 100 // stats['total']}%")
+        print(f"Average Duration: {stats['total_duration_ms'] / stats['total'] / 1000:.2f}s")
+        print(f"Total Runtime: {stats['total_duration']}s")
+        print(f"OOM-Killed: {RED}{stats['oom_killed']}{NC}")
+    if stats["with_resources"]:
+        print()
+        print(f"Resource accounting ({stats['with_resources']} runs):")
+        if stats["peak_percent_avg"] is not None:
+            print(f"  Peak Memory: {stats['peak_percent_avg']:.0f}% of limit on average, "
+                  f"{stats['peak_percent_max']:.0f}% max")
+        print(f"  Hit memory.high: {stats['high_runs']} runs")
+        print(f"  CPU Throttled: {stats['throttled']} runs, "
+              f"{stats['throttled_usec'] / 1e6:.1f}s in total")
+
+
+# Launch order of the phases run-sandbox.sh and the Python launcher record
+PHASE_ORDER = ["docker_check", "image_check", "build", "runtime", "pool_claim",
+               "overlay_setup", "create", "command", "teardown", "overlay_teardown"]
+
+
+def print_phases(index: HistoryIndex, raw_json: bool, **filters: Any) -> None:
+    """Print average launch phase timings per runtime and per resource config."""
+    summaries = {group_by: index.phase_summary(group_by, **filters)
+                 for group_by in ("runtime", "config")}
+    if raw_json:
+        print(json.dumps(summaries, indent=2))
+        return
+
+    print(f"{CYAN}=== Launch Phase Timings (average ms per run) ==={NC}")
+    for group_by, title in (("runtime", "By runtime"), ("config", "By resource config")):
+        groups = summaries[group_by]
+        seen = {phase for stats in groups.values() for phase in stats["phases"]}
+        phases = [p for p in PHASE_ORDER if p in seen] + sorted(seen - set(PHASE_ORDER))
+        width = max([len(label) for label in groups] + [len(group_by)])
+
+        print()
+        print(f"{YELLOW}{title}:{NC}")
+        if not groups:
+            print("  (no runs with phase timings)")
+            continue
+        header = [f"{group_by:<{width}}", f"{'runs':>6}"]
+        header += [f"{p:>{max(len(p), 7)}}" for p in phases]
+        header += [f"{'total':>7}", f"{'overhead':>8}"]
+        print("  " + "  ".join(header))
+        for label, stats in groups.items():
+            total = sum(stats["phases"].values())
+            overhead = total - stats["phases"].get("command", 0)
+            row = [f"{label:<{width}}", f"{stats['runs']:>6}"]
+            row += [f"{stats['phases'].get(p, 0):>{max(len(p), 7)}}" for p in phases]
+            row += [f"{total:>7}", f"{overhead:>8}"]
+            print("  " + "  ".join(row))
+    print()
+    print("overhead = launch time outside the user command")
+
+
+def _fmt_ms(ms: Optional[int]) -> str:
+    if ms is None:
+        return "-"
+    return f"{ms}ms" if ms < 10000 else f"{ms / 1000:.1f}s"
+
+
+def _report_windows(index: HistoryIndex, current: str, baseline: str,
+                    **filters: Any) -> Optional[Dict[str, Tuple[str, str]]]:
+    """Current and baseline windows, ending at the newest matching run.
+
+    Anchoring on the newest run rather than the clock keeps a report over
+    older logs meaningful: it compares their last stretch with the one before.
+    """
+    latest = index.latest(**filters)
+    if latest is None:
+        return None
+    end = parse_timestamp(latest) + timedelta(seconds=1)
+    split = end - parse_span(current)
+    start = split - parse_span(baseline)
+    return {"current": (split.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT)),
+            "baseline": (start.strftime(TIMESTAMP_FORMAT), split.strftime(TIMESTAMP_FORMAT))}
+
+
+def print_report(index: HistoryIndex, raw_json: bool, by: List[str], current: str,
+                 baseline: str, threshold_pct: float, min_runs: int,
+                 **filters: Any) -> int:
+    """Print the latency report and the regression check.
+
+    Returns:
+        2 if any regression was flagged, else 0
+    """
+    groups = index.latency_report(by, **filters)
+    windows = _report_windows(index, current, baseline, **filters)
+    compared = index.regressions(by, windows["current"], windows["baseline"],
+                                 threshold_pct, min_runs, **filters) if windows else []
+    flagged = [entry for entry in compared if entry["regressed"]]
+
+    if raw_json:
+        print(json.dumps({
+            "by": by,
+            "groups": groups,
+            "regressions": {
+                "current": windows and windows["current"],
+                "baseline": windows and windows["baseline"],
+                "threshold_pct": threshold_pct,
+                "min_runs": min_runs,
+                "groups": compared,
+            },
+        }, indent=2))
+        return 2 if flagged else 0
+
+    keys = by or ["all"]
+    print(f"{CYAN}=== Latency Report (by {', '.join(keys)}) ==={NC}")
+    print()
+    labels = [[str(v) for v in g["group"].values()] or ["all"] for g in groups]
+    widths = [max([len(key)] + [len(label[i]) for label in labels])
+              for i, key in enumerate(keys)]
+    print("  " + "  ".join([f"{k:<{w}}" for k, w in zip(keys, widths)] +
+                           [f"{'runs':>6}", f"{'fail%':>6}", f"{'runs/h':>7}"] +
+                           [f"{f'p{p}':>8}" for p in PERCENTILES]))
+    for label, group in zip(labels, groups):
+        rate = group["throughput_per_hour"]
+        print("  " + "  ".join(
+            [f"{v:<{w}}" for v, w in zip(label, widths)] +
+            [f"{group['runs']:>6}", f"{group['failure_rate'] * 100:>5.1f}%",
+             f"{rate:>7.1f}" if rate is not None else f"{'-':>7}"] +
+            [f"{_fmt_ms(group[f'p{p}_ms']):>8}" for p in PERCENTILES]))
+
+    print()
+    print(f"{CYAN}=== Regressions: last {current} vs previous {baseline} "
+          f"(threshold +{threshold_pct:g}%) ==={NC}")
+    print()
+    if not compared:
+        print("  (no configuration has runs in both windows)")
+        return 0
+    for entry in compared:
+        label = ", ".join(f"{k}={v}" for k, v in entry["group"].items()) or "all runs"
+        if entry["regressed"]:
+            status = f"{RED}✗ REGRESSED ({', '.join(entry['regressed'])}){NC}"
+        elif not entry["enough_runs"]:
+            status = f"{YELLOW}? fewer than {min_runs} runs{NC}"
+        else:
+            status = f"{GREEN}✓ ok{NC}"
+        print(f"  {YELLOW}{label}{NC}  {status}")
+        print(f"    runs {entry['baseline']['runs']} → {entry['current']['runs']}, "
+              f"failure rate {entry['baseline']['failure_rate'] * 100:.1f}% → "
+              f"{entry['current']['failure_rate'] * 100:.1f}%")
+        for pct in PERCENTILES:
+            change = entry["change_pct"][f"p{pct}"]
+            print(f"    p{pct:<3} {_fmt_ms(entry['baseline'][f'p{pct}_ms']):>8} → "
+                  f"{_fmt_ms(entry['current'][f'p{pct}_ms']):>8}"
+                  f"  {f'{change:+.1f}%' if change is not None else ''}")
+    print()
+    print(f"{len(flagged)} of {len(compared)} configurations regressed")
+    return 2 if flagged else 0
+
+
+def main(argv: List[str]) -> int:
+    """Query the index: argv takes sandbox-history.sh's options."""
+    log_dir = Path(os.environ.get("SANDBOX_LOG_DIR", "logs"))
+    limit: Optional[int] = 10
+    filters: Dict[str, Any] = {}
+    raw_json = show_stats = show_phases = show_report = False
+    by = ["runtime", "memory", "cpus"]
+    current, baseline = "1d", "7d"
+    threshold_pct, min_runs = 20.0, 5
+    output: Optional[str] = None
+    tail: Optional[int] = None
+
+    args = list(argv)
+    while args:
+        option = args.pop(0)
+        if option in ("--recent", "--since", "--until", "--container", "--peak-above", "--by",
+                      "--current", "--baseline", "--threshold", "--min-runs", "--output",
+                      "--tail") and not args:
+            print(f"Option {option} requires a value")
+            return 1
+        if option == "--recent":
+            value = args.pop(0)
+            if not value.isdigit():
+                print(f"Invalid --recent value: {value}")
+                return 1
+            limit = int(value)
+        elif option == "--failed":
+            filters["success"] = False
+        elif option == "--success":
+            filters["success"] = True
+        elif option == "--oom":
+            filters["oom"] = True
+        elif option == "--throttled":
+            filters["throttled"] = True
+        elif option == "--peak-above":
+            value = args.pop(0)
+            try:
+                filters["peak_above"] = float(value.rstrip("%"))
+            except ValueError:
+                print(f"Invalid --peak-above value: {value}")
+                return 1
+        elif option in ("--since", "--until"):
+            filters[option[2:]] = args.pop(0)
+        elif option == "--container":
+            filters["container"] = args.pop(0)
+            try:
+                re.compile(filters["container"])
+            except re.error as e:
+                print(f"Invalid --container pattern: {e}")
+                return 1
+        elif option == "--output":
+            output = args.pop(0)
+        elif option == "--tail":
+            value = args.pop(0)
+            if not value.isdigit():
+                print(f"Invalid --tail value: {value}")
+                return 1
+            tail = int(value)
+        elif option == "--json":
+            raw_json = True
+        elif option == "--stats":
+            show_stats = True
+        elif option == "--phases":
+            show_phases = True
+        elif option == "--report":
+            show_report = True
+        elif option == "--by":
+            by = [key for key in args.pop(0).split(",") if key]
+            unknown = [key for key in by if key not in REPORT_KEYS]
+            if unknown:
+                print(f"Invalid --by key: {', '.join(unknown)} "
+                      f"(choose from {', '.join(REPORT_KEYS)})")
+                return 1
+        elif option in ("--current", "--baseline"):
+            value = args.pop(0)
+            try:
+                parse_span(value)
+            except ValueError as e:
+                print(f"Invalid {option} value: {e}")
+                return 1
+            if option == "--current":
+                current = value
+            else:
+                baseline = value
+        elif option in ("--threshold", "--min-runs"):
+            value = args.pop(0)
+            try:
+                number = float(value) if option == "--threshold" else int(value)
+            except ValueError:
+                print(f"Invalid {option} value: {value}")
+                return 1
+            if option == "--threshold":
+                threshold_pct = number
+            else:
+                min_runs = int(number)
+        else:
+            print(f"Unknown option: {option}")
+            return 1
+
+    if not log_dir.is_dir():
+        print("No logs directory found. Run some sandbox executions first.")
+        return 1
+    if output is not None:
+        # Read through the capture's line index; the runs index isn't needed
+        return print_output(log_dir, output, tail)
+
+    with HistoryIndex(log_dir) as index:
+        index.refresh()
+        if index.empty():
+            print("No execution logs found.")
+        elif show_report:
+            return print_report(index, raw_json, by, current, baseline,
+                                threshold_pct, min_runs, **filters)
+        elif show_phases:
+            print_phases(index, raw_json, **filters)
+        elif show_stats:
+            print_stats(index.stats(**filters))
+        else:
+            print_runs(index, index.runs(limit, **filters), raw_json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,93 @@
+"""Named filesystem I/O profiles for the gVisor runtime.
+
+Under runsc every file operation on the /workspace bind mount is served by
+gVisor's Sentry, and how it reaches the host file is set by runsc flags:
+
+- directfs: the Sentry opens host files itself (donated, confined fds)
+  instead of asking the gofer process for every open/stat/walk
+- file access: with --file-access-mounts=exclusive gVisor assumes nothing
+  outside the sandbox changes the workspace while it runs, so it can keep
+  dentries, attributes and file pages cached instead of revalidating them
+- overlay: with --overlay2=all:memory every mount, /workspace included, gets
+  a writable layer in sandbox memory; the host directory is only read
+
+Docker cannot pass runsc flags per container, so each profile is a runtime
+registered with the daemon under its own name (`runsc install --runtime`).
+SANDBOX_IO_PROFILE picks one; a profile whose runtime is not registered falls
+back to plain runsc with a warning. Profiles only apply under runsc.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PROFILE = "default"
+
+
+@dataclass
+class IOProfile:
+    """A runsc configuration for workspace I/O."""
+
+    name: str
+    runtime: str
+    flags: List[str]
+    description: str
+    # Writes to /workspace never reach the host
+    discards_writes: bool = False
+    # Unsafe when the host may change the workspace during the container's
+    # lifetime (warm pool containers outlive a run)
+    exclusive: bool = False
+
+    def install_command(self) -> str:
+        """Return the command that registers the profile's runtime with Docker."""
+        if not self.flags:
+            return "sudo runsc install"
+        return f"sudo runsc install --runtime={self.runtime} -- {' '.join(self.flags)}"
+
+
+# Must match io_profile_runtime in sandbox-lib.sh
+PROFILES: Dict[str, IOProfile] = {profile.name: profile for profile in [
+    IOProfile("default", "runsc", [],
+              "runsc as installed (recent releases: directfs, shared file access)"),
+    IOProfile("gofer", "runsc-gofer", ["--directfs=false"],
+              "every file operation goes through the gofer process; most isolated, slowest"),
+    IOProfile("directfs", "runsc-directfs", ["--directfs=true"],
+              "the Sentry walks and opens workspace files itself instead of asking the gofer"),
+    IOProfile("cached", "runsc-cached", ["--directfs=true", "--file-access-mounts=exclusive"],
+              "directfs plus aggressive caching of the workspace; the host must not "
+              "change it during a run", exclusive=True),
+    IOProfile("overlay", "runsc-overlay",
+              ["--directfs=true", "--file-access-mounts=exclusive", "--overlay2=all:memory"],
+              "cached, with workspace writes kept in sandbox memory (counted against the "
+              "memory limit) and discarded at exit", discards_writes=True, exclusive=True),
+]}
+
+
+def get_profile(name: str) -> Optional[IOProfile]:
+    """Return the profile with this name, or None if there is none."""
+    return PROFILES.get(name)
+
+
+def resolve(name: str, runtime: str, available: List[str]) -> Tuple[str, Optional[str]]:
+    """Pick the runtime for a run.
+
+    Args:
+        name: I/O profile name (must exist)
+        runtime: Runtime after the runsc availability check
+        available: Runtimes registered with the daemon
+
+    Returns:
+        Tuple of (runtime to use, warning to show or None)
+    """
+    profile = PROFILES[name]
+    if name == DEFAULT_PROFILE:
+        return runtime, None
+    if runtime != "runsc":
+        return runtime, f"I/O profile '{name}' only applies to runsc, ignored under {runtime}"
+    if profile.runtime not in available:
+        return runtime, (f"Runtime {profile.runtime} for I/O profile '{name}' is not "
+                         f"registered, using runsc. Register it with: "
+                         f"{profile.install_command()}")
+    if profile.discards_writes:
+        return profile.runtime, (f"I/O profile '{name}': writes to /workspace are discarded "
+                                 f"when the run ends")
+    return profile.runtime, None
@@ -0,0 +1,277 @@
+"""Persistent capture of container output with rotation and a line index.
+
+Containers are removed when a run ends, taking their output with them, and
+`docker logs --tail` makes the daemon re-read the whole log every time. The
+launchers instead stream each run's stdout and stderr into
+logs/<container>.output/:
+
+    segment-000000.log[.gz]   output lines in arrival order, both streams
+    segment-000001.log        the active segment (never compressed)
+    index                     one fixed-size record per line
+    closed                    written once the run's output is complete
+
+A segment is rotated once it reaches max_bytes; rotated segments are
+gzip-compressed if compress is set, and only the newest `keep` are retained
+(0: all). Index record N describes line N (segment, byte offset, length,
+arrival time, stream), so the line count, a tail or a seek to any line is
+one index read: no scan of earlier output. A line in a compressed segment costs one
+decompression of that segment, which rotation bounds to max_bytes.
+
+The writer flushes segment data before the index records that point to it,
+so a reader following a live run never sees a line that is not there yet.
+"""
+
+import gzip
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .docker_api import STDERR, STDOUT, DockerClient, demux
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_KEEP = 0
+# Longer lines are split so a stream without newlines cannot grow the buffer
+MAX_LINE_BYTES = 64 * 1024
+FOLLOW_POLL_S = 0.2
+
+# segment, byte offset in the uncompressed segment, arrival time, length, stream.
+# The length delimits a line split at MAX_LINE_BYTES, which has no newline.
+RECORD = struct.Struct("<IQdIB3x")
+STREAM_NAMES = {STDOUT: "stdout", STDERR: "stderr"}
+
+
+def output_dir(log_dir: Path, container: str) -> Path:
+    """Return the capture directory of a run."""
+    return log_dir / f"{container}.output"
+
+
+def segment_path(directory: Path, number: int) -> Path:
+    """Return the uncompressed path of a segment."""
+    return directory / f"segment-{number:06d}.log"
+
+
+class OutputWriter:
+    """Appends a run's output lines to rotating segments and the index.
+
+    Example:
+        with OutputWriter(output_dir(log_dir, name), compress=True) as writer:
+            writer.write(STDOUT, data)
+        summary = writer.summary()
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES,
+                 keep: int = DEFAULT_KEEP, compress: bool = False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.compress = compress
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # Reopened for a retried run: continue after the existing lines
+        (directory / "closed").unlink(missing_ok=True)
+        self.lines = os.path.getsize(directory / "index") // RECORD.size \
+            if (directory / "index").exists() else 0
+        self.bytes = 0
+        self.segment = max([int(p.name[8:14]) for p in directory.glob("segment-*")], default=0)
+        if not segment_path(directory, self.segment).exists() and self.lines:
+            self.segment += 1  # the last segment was compressed or removed
+        self._segment_file = open(segment_path(directory, self.segment), "ab")
+        self._index = open(directory / "index", "ab")
+        self._partial: Dict[int, bytes] = {}
+        self._closed = False
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def write(self, stream: int, data: bytes) -> None:
+        """Add a chunk of a stream's output; lines are stored once complete."""
+        if self._closed:
+            return  # output still draining after an interrupted run
+        buffer = self._partial.pop(stream, b"") + data
+        lines = buffer.split(b"\n")
+        rest = lines.pop()
+        complete = [line + b"\n" for line in lines]
+        while len(rest) > MAX_LINE_BYTES:
+            complete.append(rest[:MAX_LINE_BYTES])
+            rest = rest[MAX_LINE_BYTES:]
+        if rest:
+            self._partial[stream] = rest
+        self._append(stream, complete)
+
+    def close(self) -> None:
+        """Terminate and store partial lines, close the files and mark the output complete."""
+        if self._closed:
+            return
+        for stream, rest in sorted(self._partial.items()):
+            self._append(stream, [rest + b"\n"])
+        self._partial.clear()
+        self._segment_file.close()
+        self._index.close()
+        (self.directory / "closed").touch()
+        self._closed = True
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the complete event's "output" fields.
+
+        lines counts the whole capture, bytes only what this writer wrote.
+        """
+        return {"dir": str(self.directory), "lines": self.lines, "bytes": self.bytes,
+                "segments": self.segment + 1, "compressed": self.compress}
+
+    def _append(self, stream: int, lines: List[bytes]) -> None:
+        records = []
+        now = time.time()
+        for line in lines:
+            records.append(RECORD.pack(self.segment, self._segment_file.tell(), now,
+                                       len(line), stream))
+            self._segment_file.write(line)
+            self.bytes += len(line)
+            if self._segment_file.tell() >= self.max_bytes:
+                self._rotate()
+        if not records:
+            return
+        # Data first, so the index never points past what a reader can see
+        self._segment_file.flush()
+        self._index.write(b"".join(records))
+        self._index.flush()
+        self.lines += len(records)
+
+    def _rotate(self) -> None:
+        self._segment_file.close()
+        finished = segment_path(self.directory, self.segment)
+        if self.compress:
+            with open(finished, "rb") as source, gzip.open(f"{finished}.gz.tmp", "wb") as target:
+                while True:
+                    block = source.read(1024 * 1024)
+                    if not block:
+                        break
+                    target.write(block)
+            os.replace(f"{finished}.gz.tmp", f"{finished}.gz")
+            finished.unlink()
+        self.segment += 1
+        self._segment_file = open(segment_path(self.directory, self.segment), "ab")
+        expired = self.segment - self.keep
+        if self.keep and expired >= 0:
+            segment_path(self.directory, expired).unlink(missing_ok=True)
+            Path(f"{segment_path(self.directory, expired)}.gz").unlink(missing_ok=True)
+
+
+class OutputReader:
+    """Random access to a captured run's output by line number."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        if not (directory / "index").exists():
+            raise FileNotFoundError(f"No captured output in {directory}")
+        # Decompressed segment kept for consecutive reads from it
+        self._cached: Tuple[int, bytes] = (-1, b"")
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.directory / "index") // RECORD.size
+
+    @property
+    def closed(self) -> bool:
+        """True once the run's output is complete."""
+        return (self.directory / "closed").exists()
+
+    def read(self, start: int, count: int, stream: Optional[int] = None
+             ) -> List[Tuple[int, float, int, bytes]]:
+        """Return up to count lines from line number start.
+
+        Lines of rotated-away segments are skipped.
+
+        Returns:
+            List of (line number, arrival time, stream, line)
+        """
+        start = max(start, 0)
+        with open(self.directory / "index", "rb") as index:
+            index.seek(start * RECORD.size)
+            data = index.read(count * RECORD.size)
+        records = [RECORD.unpack_from(data, offset)
+                   for offset in range(0, len(data) - len(data) % RECORD.size, RECORD.size)]
+
+        lines = []
+        for number, (segment, offset, arrived, length, source) in enumerate(records, start):
+            if stream is not None and source != stream:
+                continue
+            line = self._line(segment, offset, length)
+            if line is not None:
+                lines.append((number, arrived, source, line))
+        return lines
+
+    def tail(self, count: int, stream: Optional[int] = None
+             ) -> List[Tuple[int, float, int, bytes]]:
+        """Return the last count lines (of one stream, if given)."""
+        if stream is None:
+            return self.read(len(self) - count, count)
+        # Walk back in blocks until enough lines of the stream are found
+        lines: List[Tuple[int, float, int, bytes]] = []
+        end = len(self)
+        while end > 0 and len(lines) < count:
+            start = max(0, end - max(count, 256))
+            lines = self.read(start, end - start, stream) + lines
+            end = start
+        return lines[-count:]
+
+    def follow(self, start: int, stream: Optional[int] = None
+               ) -> Iterator[Tuple[int, float, int, bytes]]:
+        """Yield lines from line number start as they arrive, until the output is closed."""
+        position = start
+        while True:
+            closed = self.closed
+            total = len(self)
+            if position < total:
+                yield from self.read(position, total - position, stream)
+                position = total
+            elif closed:
+                return
+            else:
+                time.sleep(FOLLOW_POLL_S)
+
+    def _line(self, segment: int, offset: int, length: int) -> Optional[bytes]:
+        path = segment_path(self.directory, segment)
+        if path.exists():
+            with open(path, "rb") as f:
+                f.seek(offset)
+                return f.read(length)
+        if self._cached[0] != segment:
+            try:
+                with gzip.open(f"{path}.gz", "rb") as f:
+                    self._cached = (segment, f.read())
+            except OSError:
+                return None  # rotated away (or being compressed right now)
+        return self._cached[1][offset:offset + length]
+
+
+def format_line(number: int, arrived: float, stream: int, line: bytes,
+                numbers: bool = False) -> str:
+    """Format a line for display.
+
+    With numbers, the line is prefixed with its number, arrival time and a
+    "!" for stderr; otherwise it is printed as the container wrote it.
+    """
+    text = line.decode(errors="replace").rstrip("\n")
+    if not numbers:
+        return text
+    marker = "!" if stream == STDERR else " "
+    return f"{number:>7} {time.strftime('%H:%M:%S', time.localtime(arrived))} {marker} {text}"
+
+
+def capture_container(client: DockerClient, container: str, writer: OutputWriter) -> None:
+    """Stream a container's whole log into a writer until the container exits.
+
+    The logs endpoint serves output from the start of the container, so this
+    may begin any time after the container is created.
+    """
+    response = client.logs(container)
+    try:
+        for stream_id, data in demux(response):
+            writer.write(stream_id, data)
+    finally:
+        response.close()
+
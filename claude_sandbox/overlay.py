@@ -0,0 +1,99 @@
+"""Copy-on-write workspaces.
+
+The workspace directory becomes the read-only lower layer of an overlay
+filesystem and each run writes to its own upper layer, so concurrent runs
+share one copy of the input data with zero-copy setup. The overlay is a
+Docker local volume, mounted by the daemon (Linux hosts only).
+
+Layout per run, matching run-sandbox.sh's SANDBOX_WORKSPACE_MODE=overlay:
+
+    <overlay_dir>/<run>/upper   files the run created or modified
+    <overlay_dir>/<run>/work    overlayfs scratch space
+
+Deleted files appear in upper/ as 0:0 character devices (whiteouts).
+"""
+
+import platform
+import shutil
+import stat
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .docker_api import DockerClient, DockerError
+
+
+class OverlayWorkspace:
+    """A per-run writable overlay on top of a read-only base directory."""
+
+    def __init__(self, client: DockerClient, name: str, base: Path, overlay_dir: Path,
+                 keep: bool = True):
+        self.client = client
+        self.base = base
+        self.run_dir = (overlay_dir / name).resolve()
+        self.upper = self.run_dir / "upper"
+        self.work = self.run_dir / "work"
+        self.volume = f"{name}-workspace"
+        self.keep = keep
+
+    def setup(self) -> Dict[str, Any]:
+        """Create the layer directories and the overlay volume.
+
+        Returns:
+            Mount spec for /workspace in the container's HostConfig.Mounts
+        """
+        if platform.system() != "Linux":
+            raise DockerError(0, "Overlay workspaces require a Linux Docker host")
+
+        self.upper.mkdir(parents=True, exist_ok=True)
+        self.work.mkdir(parents=True, exist_ok=True)
+        self.client.call("POST", "/volumes/create", body={
+            "Name": self.volume,
+            "Driver": "local",
+            "DriverOpts": {
+                "type": "overlay",
+                "device": "overlay",
+                "o": f"lowerdir={self.base},upperdir={self.upper},workdir={self.work}",
+            },
+        })
+        return {"Type": "volume", "Source": self.volume, "Target": "/workspace"}
+
+    def teardown(self) -> None:
+        """Remove the volume, keeping the upper layer unless keep is False."""
+        self.client.call("DELETE", f"/volumes/{self.volume}", ok=(204, 404, 409))
+
+        # The kernel leaves an empty root-owned work/work behind; removing an
+        # empty directory only needs write access to its parent
+        for path in (self.work / "work", self.work):
+            try:
+                path.rmdir()
+            except OSError:
+                pass
+
+        if not self.keep:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    def changes(self) -> Dict[str, List[str]]:
+        """List the run's changes relative to the base.
+
+        Returns:
+            Dictionary with 'changed' and 'deleted' workspace-relative paths
+        """
+        changed, deleted = [], []
+        for path in sorted(self.upper.rglob("*")):
+            mode = path.lstat().st_mode
+            relative = str(path.relative_to(self.upper))
+            if stat.S_ISCHR(mode):
+                deleted.append(relative)
+            elif not stat.S_ISDIR(mode):
+                changed.append(relative)
+        return {"changed": changed, "deleted": deleted}
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the overlay fields recorded in the complete event."""
+        changes = self.changes() if self.upper.exists() else {"changed": [], "deleted": []}
+        return {
+            "upper": str(self.upper),
+            "changed_files": len(changes["changed"]),
+            "deleted_files": len(changes["deleted"]),
+            "kept": self.keep,
+        }
@@ -0,0 +1,123 @@
+"""Profile-guided right-sizing of sandbox memory and CPU limits.
+
+Most runs peak far below the 4g / 4 CPU defaults, which caps how many
+sandboxes fit on a host. With SANDBOX_RIGHTSIZE=record (or auto) every run is
+sampled at a low rate, so its complete event records peak memory and CPU;
+runs are grouped by workload signature (workspace + command) in the history
+index. In auto mode the launcher derives limits from the recent runs of the
+same signature:
+
+- memory: highest recent peak plus a safety margin, rounded up to 64MB
+- cpus: highest recent one-second CPU peak plus the margin, in half-CPU steps
+
+The configured SANDBOX_MEMORY/SANDBOX_CPUS stay the ceiling, so auto mode
+only ever shrinks limits. A run that is OOM-killed is retried with double
+the memory, up to the ceiling.
+"""
+
+import hashlib
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+MB = 1024 * 1024
+
+MODES = ("off", "record", "auto")
+DEFAULT_MARGIN = 0.3
+DEFAULT_MIN_RUNS = 3
+# Recent runs considered per signature
+HISTORY_RUNS = 20
+# Sampling rate when right-sizing needs peaks but SANDBOX_SAMPLE_HZ is off;
+# memory.peak is exact at any rate, CPU peaks need at least 1 Hz
+SAMPLE_HZ = 2
+
+MIN_MEMORY = 128 * MB
+MEMORY_STEP = 64 * MB
+CPU_STEP = 0.5
+
+
+def signature(workspace: str, command: str) -> str:
+    """Return the workload signature of a command in a workspace.
+
+    Must match sandbox_signature in sandbox-lib.sh.
+    """
+    return hashlib.sha1(f"{workspace}\n{command}".encode()).hexdigest()[:16]
+
+
+def format_memory(size: int) -> str:
+    """Format bytes as a docker memory size in whole megabytes ('768m')."""
+    return f"{math.ceil(size / MB)}m"
+
+
+def format_cpus(cpus: float) -> str:
+    """Format a CPU count the way --cpus takes it ('1.5', '2')."""
+    return f"{cpus:g}"
+
+
+@dataclass
+class Limits:
+    """Limits for one run and how they were derived."""
+
+    memory: int
+    cpus: float
+    runs: int
+    reason: str
+
+    def event(self) -> Dict[str, Any]:
+        """Return the start event's "rightsize" fields."""
+        return {"runs": self.runs, "reason": self.reason}
+
+
+def recommend(usage: List[Dict[str, Any]], ceiling_memory: int, ceiling_cpus: float,
+              margin: float = DEFAULT_MARGIN, min_runs: int = DEFAULT_MIN_RUNS) -> Limits:
+    """Derive limits from a workload's recent usage.
+
+    Args:
+        usage: HistoryIndex.usage() rows, newest first
+        ceiling_memory: Configured memory limit in bytes (never exceeded)
+        ceiling_cpus: Configured CPU limit (never exceeded)
+        margin: Safety margin on top of the observed peaks (0.3 = 30%)
+        min_runs: Keep the configured limits until this many runs are known
+
+    Returns:
+        Limits to use
+    """
+    if len(usage) < min_runs:
+        return Limits(ceiling_memory, ceiling_cpus, len(usage),
+                      f"{len(usage)} of {min_runs} sampled runs, using configured limits")
+
+    memory_peak = max(run["memory_peak_bytes"] for run in usage)
+    # An OOM-killed run's peak is its limit, not its need
+    oom_limits = [run["memory_peak_bytes"] * 2 for run in usage if run["oom_killed"]]
+    need = max([memory_peak * (1 + margin)] + oom_limits)
+    memory = max(MIN_MEMORY, math.ceil(need / MEMORY_STEP) * MEMORY_STEP)
+
+    cpu_peak = max((run["cpu_peak_percent"] or 0) for run in usage) / 100
+    cpus = max(CPU_STEP, math.ceil(cpu_peak * (1 + margin) / CPU_STEP) * CPU_STEP)
+
+    return Limits(min(memory, ceiling_memory), min(cpus, ceiling_cpus), len(usage),
+                  f"peak {memory_peak // MB}MB / {cpu_peak * 100:.0f}% CPU "
+                  f"over {len(usage)} runs, +{margin:.0%}")
+
+
+def retry_memory(memory: int, ceiling_memory: int) -> Optional[int]:
+    """Return the memory limit to retry an OOM-killed run with.
+
+    Returns:
+        Double the limit, capped at the ceiling; None if already at it
+    """
+    if memory >= ceiling_memory:
+        return None
+    return min(memory * 2, ceiling_memory)
+
+
+def oom_killed(exit_code: int, inspected: bool, memory_peak: Optional[int],
+               memory_limit: int) -> bool:
+    """Decide whether a run was OOM-killed.
+
+    Docker's State.OOMKilled is authoritative when set, but not every runtime
+    reports it; a SIGKILL exit with memory at the limit counts too.
+    """
+    if inspected:
+        return True
+    return exit_code == 137 and memory_peak is not None and memory_peak >= memory_limit * 0.95
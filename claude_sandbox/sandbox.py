@@ -0,0 +1,911 @@
+"""Sandbox launcher built on the Docker Engine API.
+
+Python equivalent of run-sandbox.sh: same SANDBOX_* options, same container
+hardening and the same JSON log events, without forking the docker CLI.
+Runtime availability and image presence are cached with a TTL (in memory and
+on disk) instead of being re-probed on every launch.
+"""
+
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from . import io_profiles
+from . import rightsize as rightsize_policy
+from .admission import (DEFAULT_HOST_PIDS, DEFAULT_QUEUE_DIR, AdmissionError, AdmissionQueue,
+                        Resources)
+from .cgroup import CgroupError, CgroupSampler, CgroupWatcher, process_cgroup
+from .deps import (DEFAULT_CACHE_SIZE, DEFAULT_DEPS_DIR, DEFAULT_REQUIREMENTS, DEFAULT_WHEELHOUSE,
+                   DEPS_MOUNT, DEPS_PATH, INSTALL_SCRIPT, WHEELHOUSE_MOUNT, WHEELHOUSE_SCRIPT,
+                   DependencyCache, dependency_key, read_requirements)
+from .docker_api import STDERR, DockerClient, DockerError, demux
+from .output_log import DEFAULT_KEEP, OutputWriter, output_dir
+from .overlay import OverlayWorkspace
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+CAPABILITIES = ["CHOWN", "DAC_OVERRIDE", "SETGID", "SETUID"]
+TMPFS = {"/tmp/claude-tmp": "rw,noexec,nosuid,size=1g"}
+# seccomp_profile value that disables syscall filtering (tracing, benchmarks)
+UNCONFINED = "unconfined"
+
+
+class SandboxError(Exception):
+    """The sandbox could not be launched."""
+
+
+def parse_memory(value: str) -> int:
+    """Parse a docker-style memory size ('4g', '512m', '1024') into bytes.
+
+    Args:
+        value: Memory size
+
+    Returns:
+        Size in bytes
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([bkmg]?)b?\s*', value, re.IGNORECASE)
+    if not match:
+        raise SandboxError(f"Invalid memory size: {value}")
+    scale = {'': 1, 'b': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+    return int(float(match.group(1)) * scale[match.group(2).lower()])
+
+
+def utc_timestamp() -> str:
+    """Return the current UTC time in the log timestamp format."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@dataclass
+class SandboxConfig:
+    """Sandbox options, mirroring run-sandbox.sh's environment variables."""
+
+    image: str = "claude-sandbox:latest"
+    memory: str = "4g"
+    cpus: str = "4"
+    network: str = "none"
+    runtime: str = "runsc"
+    pids_limit: int = 512
+    name: Optional[str] = None
+    seccomp_profile: Optional[Path] = field(
+        default_factory=lambda: REPO_DIR / "seccomp-profile.json")
+    dockerfile: Path = field(default_factory=lambda: REPO_DIR / "Dockerfile.claude-sandbox")
+    log_dir: Path = Path("logs")
+    workspace_mode: str = "bind"
+    io_profile: str = io_profiles.DEFAULT_PROFILE
+    overlay_dir: Path = Path(".sandbox-overlays")
+    overlay_keep: bool = True
+    sample_hz: float = 0
+    rightsize: str = "off"
+    rightsize_margin: float = rightsize_policy.DEFAULT_MARGIN
+    rightsize_min_runs: int = rightsize_policy.DEFAULT_MIN_RUNS
+    queue: bool = False
+    queue_policy: str = "fifo"
+    queue_priority: int = 0
+    queue_dir: Path = DEFAULT_QUEUE_DIR
+    queue_timeout: float = 0
+    # Host capacity for the queue (default: the daemon's MemTotal and NCPU)
+    host_memory: Optional[str] = None
+    host_cpus: Optional[str] = None
+    host_pids: int = DEFAULT_HOST_PIDS
+    # Output capture into <log_dir>/<name>.output (see output_log.py)
+    capture: bool = True
+    capture_rotate: str = "8m"
+    capture_keep: int = DEFAULT_KEEP
+    capture_compress: bool = False
+    # Project dependencies from the workspace (see deps.py); "none" disables
+    requirements: str = DEFAULT_REQUIREMENTS
+    deps_dir: Path = DEFAULT_DEPS_DIR
+    deps_cache_size: str = DEFAULT_CACHE_SIZE
+    wheelhouse: Path = DEFAULT_WHEELHOUSE
+
+    @classmethod
+    def from_env(cls, env: Optional[Dict[str, str]] = None) -> "SandboxConfig":
+        """Build a config from SANDBOX_* environment variables."""
+        env = os.environ if env is None else env
+        config = cls()
+        config.image = env.get("SANDBOX_IMAGE", config.image)
+        config.memory = env.get("SANDBOX_MEMORY", config.memory)
+        config.cpus = env.get("SANDBOX_CPUS", config.cpus)
+        config.network = env.get("SANDBOX_NETWORK", config.network)
+        config.runtime = env.get("SANDBOX_RUNTIME", config.runtime)
+        config.pids_limit = int(env.get("SANDBOX_PIDS_LIMIT", config.pids_limit))
+        config.name = env.get("SANDBOX_NAME") or None
+        if "SANDBOX_SECCOMP" in env:
+            config.seccomp_profile = Path(env["SANDBOX_SECCOMP"])
+        if "SANDBOX_DOCKERFILE" in env:
+            config.dockerfile = Path(env["SANDBOX_DOCKERFILE"])
+        config.workspace_mode = env.get("SANDBOX_WORKSPACE_MODE", config.workspace_mode)
+        config.io_profile = env.get("SANDBOX_IO_PROFILE", config.io_profile)
+        config.overlay_dir = Path(env.get("SANDBOX_OVERLAY_DIR", config.overlay_dir))
+        config.overlay_keep = env.get("SANDBOX_OVERLAY_KEEP", "1") != "0"
+        config.sample_hz = float(env.get("SANDBOX_SAMPLE_HZ", config.sample_hz))
+        config.rightsize = env.get("SANDBOX_RIGHTSIZE", config.rightsize)
+        config.rightsize_margin = float(env.get("SANDBOX_RIGHTSIZE_MARGIN",
+                                                config.rightsize_margin))
+        config.rightsize_min_runs = int(env.get("SANDBOX_RIGHTSIZE_MIN_RUNS",
+                                                config.rightsize_min_runs))
+        config.queue = env.get("SANDBOX_QUEUE", "0") == "1"
+        config.queue_policy = env.get("SANDBOX_QUEUE_POLICY", config.queue_policy)
+        config.queue_priority = int(env.get("SANDBOX_PRIORITY", config.queue_priority))
+        config.queue_dir = Path(env.get("SANDBOX_QUEUE_DIR", config.queue_dir))
+        config.queue_timeout = float(env.get("SANDBOX_QUEUE_TIMEOUT", config.queue_timeout))
+        config.host_memory = env.get("SANDBOX_HOST_MEMORY") or None
+        config.host_cpus = env.get("SANDBOX_HOST_CPUS") or None
+        config.host_pids = int(env.get("SANDBOX_HOST_PIDS", config.host_pids))
+        config.capture = env.get("SANDBOX_CAPTURE", "1") != "0"
+        config.capture_rotate = env.get("SANDBOX_CAPTURE_ROTATE", config.capture_rotate)
+        config.capture_keep = int(env.get("SANDBOX_CAPTURE_KEEP", config.capture_keep))
+        config.capture_compress = env.get("SANDBOX_CAPTURE_COMPRESS", "0") == "1"
+        config.requirements = env.get("SANDBOX_REQUIREMENTS", config.requirements)
+        config.deps_dir = Path(env.get("SANDBOX_DEPS_DIR", config.deps_dir))
+        config.deps_cache_size = env.get("SANDBOX_DEPS_CACHE_SIZE", config.deps_cache_size)
+        config.wheelhouse = Path(env.get("SANDBOX_WHEELHOUSE", config.wheelhouse))
+        return config
+
+
+@dataclass
+class SandboxResult:
+    """Outcome of a sandbox run."""
+
+    container: str
+    exit_code: int
+    duration_ms: int
+    runtime: str
+    overlay: Optional[OverlayWorkspace] = None
+    phases_ms: Dict[str, int] = field(default_factory=dict)
+    memory: Optional[str] = None
+    cpus: Optional[str] = None
+    attempts: int = 1
+    oom_killed: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.exit_code == 0
+
+
+class ProbeCache:
+    """TTL cache for daemon probes, shared between processes through a file.
+
+    A launcher process typically lives for one run, so an in-memory cache
+    alone would never hit; the file lets consecutive launches skip the probes.
+    """
+
+    def __init__(self, path: Optional[Path], ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._entries: Dict[str, List[Any]] = {}
+        if path is not None and path.exists():
+            try:
+                self._entries = json.loads(path.read_text())
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value and persist the cache."""
+        self._entries[key] = [time.time(), value]
+        self._save()
+
+    def invalidate(self, key: str) -> None:
+        """Drop a cached value."""
+        if self._entries.pop(key, None) is not None:
+            self._save()
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._entries))
+        tmp.replace(self.path)  # atomic, so concurrent launchers never read a torn file
+
+
+class Sandbox:
+    """Launches commands in locked-down sandbox containers.
+
+    One Sandbox holds one Docker connection and probe cache, so creating it
+    once and calling run() many times amortises all setup cost.
+
+    Example:
+        sandbox = Sandbox(SandboxConfig(memory="2g"))
+        result = sandbox.run("./my-project", ["python3", "hello.py"])
+    """
+
+    def __init__(self, config: Optional[SandboxConfig] = None,
+                 client: Optional[DockerClient] = None,
+                 cache_path: Optional[Path] = Path(".sandbox-cache/probes.json"),
+                 cache_ttl: float = 300.0):
+        self.config = config or SandboxConfig.from_env()
+        self.client = client or DockerClient()
+        self.cache = ProbeCache(cache_path, cache_ttl)
+        self._seccomp: Optional[str] = None
+        self._queue: Optional[AdmissionQueue] = None
+
+    def close(self) -> None:
+        """Close the Docker connection."""
+        self.client.close()
+
+    def __enter__(self) -> "Sandbox":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # -- Probes --------------------------------------------------------------
+
+    def runtimes(self) -> List[str]:
+        """Return the runtimes registered with the daemon (cached)."""
+        runtimes = self.cache.get("runtimes")
+        if runtimes is None:
+            runtimes = sorted(self.client.info().get("Runtimes", {}))
+            self.cache.set("runtimes", runtimes)
+        return runtimes
+
+    def resolve_runtime(self) -> str:
+        """Return the runtime to use.
+
+        Falls back to runc without gVisor; under runsc, a non-default I/O
+        profile selects the runtime registered for it.
+        """
+        if io_profiles.get_profile(self.config.io_profile) is None:
+            raise SandboxError(f"Invalid I/O profile: {self.config.io_profile} "
+                               f"(expected one of {', '.join(io_profiles.PROFILES)})")
+        runtime = self.config.runtime
+        if runtime == "runsc" and "runsc" not in self.runtimes():
+            warn("gVisor runtime (runsc) not available, falling back to default runtime (runc)")
+            runtime = "runc"
+        runtime, warning = io_profiles.resolve(self.config.io_profile, runtime, self.runtimes())
+        if warning:
+            warn(warning)
+        return runtime
+
+    def image_present(self) -> bool:
+        """Return True if the sandbox image exists (positive answers are cached)."""
+        key = f"image:{self.config.image}"
+        if self.cache.get(key):
+            return True
+        if not self.client.image_exists(self.config.image):
+            return False
+        self.cache.set(key, True)
+        return True
+
+    def build_image(self) -> None:
+        """Build the sandbox image from the configured Dockerfile."""
+        if not self.config.dockerfile.exists():
+            raise SandboxError(f"{self.config.dockerfile} not found")
+        warn(f"Sandbox image '{self.config.image}' not found. Building...")
+        for message in self.client.build_image(self.config.image, self.config.dockerfile):
+            if "stream" in message:
+                sys.stderr.write(message["stream"])
+        info("Sandbox image built successfully")
+        self.cache.set(f"image:{self.config.image}", True)
+
+    def ensure_image(self) -> None:
+        """Build the sandbox image if it is not present."""
+        if not self.image_present():
+            self.build_image()
+
+    # -- Container -----------------------------------------------------------
+
+    def seccomp_profile(self) -> Optional[str]:
+        """Return the seccomp profile JSON (the API takes content, not a path).
+
+        Returns None for Docker's default profile (no profile configured, or
+        the file is missing) and "unconfined" for no filtering.
+        """
+        if self.config.seccomp_profile is not None \
+                and str(self.config.seccomp_profile) == UNCONFINED:
+            return UNCONFINED
+        if self._seccomp is None and self.config.seccomp_profile is not None \
+                and self.config.seccomp_profile.exists():
+            self._seccomp = json.dumps(json.loads(self.config.seccomp_profile.read_text()))
+        return self._seccomp
+
+    def container_config(self, workspace: Path, command: List[str], runtime: str,
+                         mount: Optional[Dict[str, Any]] = None, memory: Optional[str] = None,
+                         cpus: Optional[str] = None, deps: Optional[str] = None) -> Dict[str, Any]:
+        """Build the container create body, equivalent to run-sandbox.sh's DOCKER_OPTS.
+
+        Args:
+            workspace: Directory to bind-mount as /workspace
+            command: Command to run
+            runtime: Container runtime
+            mount: Mount spec to use for /workspace instead of the bind mount
+            memory: Memory limit for this run (default: config.memory)
+            cpus: CPU limit for this run (default: config.cpus)
+            deps: Dependency environment to mount read-only, first on PATH
+        """
+        security_opt = ["no-new-privileges:true"]
+        seccomp = self.seccomp_profile()
+        if seccomp is not None:
+            security_opt.append(f"seccomp={seccomp}")
+
+        config = {
+            "Image": self.config.image,
+            "Cmd": command,
+            "WorkingDir": "/workspace",
+            "AttachStdout": True,
+            "AttachStderr": True,
+            "HostConfig": {
+                "Runtime": runtime,
+                "Memory": parse_memory(memory or self.config.memory),
+                "NanoCpus": int(float(cpus or self.config.cpus) * 1e9),
+                "PidsLimit": self.config.pids_limit,
+                "NetworkMode": self.config.network,
+                "ReadonlyRootfs": True,
+                "Tmpfs": dict(TMPFS),
+                "Binds": [] if mount else [f"{workspace}:/workspace:rw"],
+                "Mounts": [mount] if mount else [],
+                "SecurityOpt": security_opt,
+                "CapDrop": ["ALL"],
+                "CapAdd": list(CAPABILITIES),
+            },
+        }
+        if deps is not None:
+            config["HostConfig"]["Binds"].append(f"{deps}:{DEPS_MOUNT}:ro")
+            config["Env"] = [f"PATH={DEPS_PATH}", f"VIRTUAL_ENV={DEPS_MOUNT}"]
+        return config
+
+    def create_container(self, name: str, config: Dict[str, Any]) -> str:
+        """Create a container, rebuilding the image if it disappeared."""
+        try:
+            return self.client.create_container(name, config)
+        except DockerError as e:
+            if e.status != 404:
+                raise
+            # Image vanished since it was cached as present
+            self.cache.invalidate(f"image:{self.config.image}")
+            self.ensure_image()
+            return self.client.create_container(name, config)
+
+    def check_workspace(self, workspace: os.PathLike) -> Path:
+        """Validate the workspace and workspace mode; return the absolute path."""
+        workspace = Path(workspace).resolve()
+        if not workspace.is_dir():
+            raise SandboxError(f"Workspace directory does not exist: {workspace}")
+        if self.config.workspace_mode not in ("bind", "overlay"):
+            raise SandboxError(f"Invalid workspace mode: {self.config.workspace_mode}")
+        return workspace
+
+    @staticmethod
+    def generate_name() -> str:
+        """Return a unique container name."""
+        return f"claude-sandbox-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+
+    def start_event(self, name: str, workspace: Path, runtime: str, command: List[str],
+                    memory: Optional[str] = None, cpus: Optional[str] = None) -> Dict[str, Any]:
+        """Return the data of a run's start event."""
+        return {
+            "container": name,
+            "workspace": str(workspace),
+            "memory": memory or self.config.memory,
+            "cpus": cpus or self.config.cpus,
+            "network": self.config.network,
+            "runtime": runtime,
+            "pids_limit": str(self.config.pids_limit),
+            "workspace_mode": self.config.workspace_mode,
+            "io_profile": self.config.io_profile,
+            "command": " ".join(command),
+            "signature": rightsize_policy.signature(str(workspace), " ".join(command)),
+        }
+
+    def requirements_file(self, workspace: Path) -> Optional[Path]:
+        """Return the workspace's requirements file, or None if it has none."""
+        if self.config.requirements in ("", "none"):
+            return None
+        path = workspace / self.config.requirements
+        return path if path.is_file() else None
+
+    def dependencies(self, workspace: Path, runtime: str, owner: Optional[int] = None
+                     ) -> Optional[Dict[str, Any]]:
+        """Return the dependency environment for the workspace's requirements.
+
+        The first run of a dependency set installs it offline from the
+        wheelhouse; later runs find it in the cache.
+
+        Args:
+            workspace: Workspace directory
+            runtime: Runtime to install under
+            owner: Process using the environment (default: this one)
+
+        Returns:
+            None if there is nothing to install, else the start event's
+            "deps" fields: key, cached, path and evicted
+
+        Raises:
+            SandboxError: If the requirements cannot be read or installed
+        """
+        path = self.requirements_file(workspace)
+        if path is None:
+            return None
+        try:
+            requirements = read_requirements(path)
+        except OSError as e:
+            raise SandboxError(f"Cannot read {path}: {e}")
+        if not requirements:
+            return None
+
+        owner = owner or os.getpid()
+        image = self.client.call("GET", f"/images/{quote(self.config.image, safe='/:')}/json")
+        key = dependency_key(requirements, image["Id"])
+        cache = DependencyCache(self.config.deps_dir, parse_memory(self.config.deps_cache_size))
+        environment = cache.lookup(key, owner)
+        if environment is not None:
+            return {"key": key, "cached": True, "path": str(environment)}
+
+        started = time.monotonic()
+        with cache.installing(key, owner) as scratch:
+            if scratch is not None:
+                self.install_dependencies(requirements, scratch, runtime)
+                cache.record(scratch, key, requirements,
+                             int((time.monotonic() - started) * 1000))
+        if scratch is None:
+            # Installed by a concurrent launcher while we waited for the lock
+            cache.use(key, owner)
+            return {"key": key, "cached": True, "path": str(cache.path(key))}
+
+        info(f"Installed {len(requirements)} requirements into {cache.path(key)} "
+             f"({time.monotonic() - started:.1f}s)")
+        evicted = cache.evict()
+        return {"key": key, "cached": False, "path": str(cache.path(key)),
+                **({"evicted": evicted} if evicted else {})}
+
+    def install_dependencies(self, requirements: List[str], target: Path, runtime: str) -> None:
+        """Install requirements from the wheelhouse into a virtualenv in target.
+
+        Runs in a sandbox container without network, as the host user so
+        the environment can be evicted later.
+
+        Raises:
+            SandboxError: If pip fails (typically: a package is missing from
+                the wheelhouse)
+        """
+        self.config.wheelhouse.mkdir(parents=True, exist_ok=True)
+        output = io.BytesIO()
+        with tempfile.TemporaryDirectory(prefix="sandbox-deps-") as scratch:
+            (Path(scratch) / "requirements.txt").write_text("\n".join(requirements) + "\n")
+            config = self.container_config(Path(scratch), ["sh", "-c", INSTALL_SCRIPT], runtime)
+            config["User"] = f"{os.getuid()}:{os.getgid()}"
+            config["HostConfig"]["Binds"] += [
+                f"{target}:{DEPS_MOUNT}:rw",
+                f"{self.config.wheelhouse.resolve()}:{WHEELHOUSE_MOUNT}:ro"]
+            exit_code, _, _ = self.run_container(
+                f"{self.generate_name()}-deps", config, PhaseTimer(), output, output,
+                parse_memory(self.config.memory))
+        if exit_code != 0:
+            tail = output.getvalue().decode(errors="replace").strip().splitlines()[-5:]
+            raise SandboxError(
+                f"Installing dependencies failed (exit {exit_code}). Add missing packages to "
+                f"the wheelhouse with: python3 -m claude_sandbox --wheelhouse -r <requirements>"
+                + "".join(f"\n  {line}" for line in tail))
+
+    def fill_wheelhouse(self, requirements: List[str], stdout: Optional[BinaryIO] = None) -> int:
+        """Download or build wheels for requirements (and their dependencies).
+
+        The one step that uses the network: it runs in a sandbox container
+        with the default bridge network.
+
+        Returns:
+            pip's exit code
+        """
+        self.ensure_image()
+        self.config.wheelhouse.mkdir(parents=True, exist_ok=True)
+        stdout = stdout or sys.stdout.buffer
+        with tempfile.TemporaryDirectory(prefix="sandbox-wheelhouse-") as scratch:
+            (Path(scratch) / "requirements.txt").write_text("\n".join(requirements) + "\n")
+            config = self.container_config(Path(scratch), ["sh", "-c", WHEELHOUSE_SCRIPT],
+                                           self.resolve_runtime())
+            config["User"] = f"{os.getuid()}:{os.getgid()}"
+            config["HostConfig"]["NetworkMode"] = "bridge"
+            config["HostConfig"]["Binds"].append(
+                f"{self.config.wheelhouse.resolve()}:{WHEELHOUSE_MOUNT}:rw")
+            exit_code, _, _ = self.run_container(
+                f"{self.generate_name()}-wheelhouse", config, PhaseTimer(), stdout, stdout,
+                parse_memory(self.config.memory))
+        return exit_code
+
+    def admission_queue(self) -> AdmissionQueue:
+        """Return the host's admission queue (SANDBOX_QUEUE=1).
+
+        Capacity not set in the config is taken from the daemon.
+        """
+        if self._queue is None:
+            config = self.config
+            daemon: Dict[str, Any] = {}
+            if config.host_memory is None or config.host_cpus is None:
+                daemon = self.client.info()
+            capacity = Resources(
+                parse_memory(config.host_memory) if config.host_memory else daemon["MemTotal"],
+                float(config.host_cpus) if config.host_cpus else daemon["NCPU"],
+                config.host_pids)
+            self._queue = AdmissionQueue(capacity, config.queue_dir, config.queue_policy,
+                                         self.client)
+        return self._queue
+
+    def admit(self, name: str, memory: str, cpus: str,
+              phases: "PhaseTimer") -> Tuple[str, Dict[str, Any]]:
+        """Wait for the admission queue to reserve a run's limits.
+
+        Returns:
+            Tuple of (ticket to release, admission fields for the log)
+        """
+        queue = self.admission_queue()
+        request = queue.request(name, parse_memory(memory), float(cpus), self.config.pids_limit,
+                                self.config.queue_priority)
+        with phases.phase("queue"):
+            try:
+                admission = queue.admit(request, self.config.queue_timeout or None)
+            except AdmissionError as e:
+                raise SandboxError(str(e)) from e
+        if admission["wait_ms"] >= 1000:
+            info(f"Admitted after {admission['wait_ms'] / 1000:.1f}s in the queue "
+                 f"({admission['queue_depth']} ahead)")
+        return request.ticket, admission
+
+    def right_size(self, workspace: Path, command: List[str]) -> rightsize_policy.Limits:
+        """Derive this run's limits from the workload's history (auto mode).
+
+        The configured memory and cpus are the ceiling.
+        """
+        from .history import HistoryIndex  # not imported by the package, see history.py
+
+        with HistoryIndex(self.config.log_dir) as index:
+            index.refresh()
+            usage = index.usage(rightsize_policy.signature(str(workspace), " ".join(command)),
+                                rightsize_policy.HISTORY_RUNS)
+        return rightsize_policy.recommend(usage, parse_memory(self.config.memory),
+                                          float(self.config.cpus), self.config.rightsize_margin,
+                                          self.config.rightsize_min_runs)
+
+    def workspace_mount(self, name: str, workspace: Path
+                        ) -> Tuple[Optional[OverlayWorkspace], Optional[Dict[str, Any]]]:
+        """Set up the /workspace mount for the configured workspace mode.
+
+        Returns:
+            Tuple of (overlay or None, mount spec or None for a plain bind mount)
+        """
+        if self.config.workspace_mode != "overlay":
+            return None, None
+        overlay = OverlayWorkspace(self.client, name, workspace, self.config.overlay_dir,
+                                   keep=self.config.overlay_keep)
+        return overlay, overlay.setup()
+
+    def start_sampler(self, container_id: str, name: str) -> Optional[CgroupSampler]:
+        """Start sampling a running container's cgroup if sample_hz or rightsize is set.
+
+        Sampling is best effort: without host cgroup v2 access (e.g. Docker
+        Desktop) it warns and returns None.
+        """
+        rate_hz = self.config.sample_hz
+        if not rate_hz and self.config.rightsize != "off":
+            rate_hz = rightsize_policy.SAMPLE_HZ
+        if not rate_hz:
+            return None
+        try:
+            pid = self.client.inspect_container(container_id)["State"]["Pid"]
+            sampler = CgroupSampler(process_cgroup(pid),
+                                    self.config.log_dir / f"{name}.cgroup.jsonl",
+                                    rate_hz, {"container": name})
+        except (CgroupError, OSError) as e:
+            warn(f"cgroup sampling disabled: {e}")
+            return None
+        sampler.start()
+        return sampler
+
+    @staticmethod
+    def stop_sampler(sampler: Optional[CgroupSampler]) -> Dict[str, Any]:
+        """Stop a sampler; return the complete-event fields describing it."""
+        if sampler is None:
+            return {}
+        return {"cgroup_samples": {
+            "file": str(sampler.output),
+            "rate_hz": sampler.rate_hz,
+            "summary": sampler.stop(),
+        }}
+
+    def start_watcher(self, container_id: str) -> Optional[CgroupWatcher]:
+        """Start keeping a running container's OOM, peak memory and throttling counters.
+
+        Always on, and silently skipped without host cgroup v2 access or if
+        the container has already exited.
+        """
+        try:
+            pid = self.client.inspect_container(container_id)["State"]["Pid"]
+            watcher = CgroupWatcher(process_cgroup(pid))
+        except (CgroupError, OSError, KeyError):
+            return None
+        watcher.start()
+        return watcher
+
+    @staticmethod
+    def stop_watcher(watcher: Optional[CgroupWatcher]) -> Dict[str, Any]:
+        """Stop a watcher; return its counters as complete-event fields."""
+        if watcher is None:
+            return {}
+        resources = watcher.stop()
+        return {"resources": resources} if resources else {}
+
+    def run(self, workspace: os.PathLike, command: Optional[List[str]] = None,
+            stdout: Optional[BinaryIO] = None, stderr: Optional[BinaryIO] = None) -> SandboxResult:
+        """Run a command in a new sandbox container and wait for it to exit.
+
+        With rightsize="auto", limits come from the workload's history and an
+        OOM-killed run is retried with more memory (bind workspaces only).
+        With queue set, the run first waits until the host's admission queue
+        has reserved its limits. A requirements file in the workspace gets
+        the run its cached dependency environment, installed on first use.
+
+        Args:
+            workspace: Directory to mount as /workspace
+            command: Command to run (default: /bin/bash)
+            stdout: Stream for container stdout (default: sys.stdout)
+            stderr: Stream for container stderr (default: sys.stderr)
+
+        Returns:
+            SandboxResult with exit code and duration
+        """
+        workspace = self.check_workspace(workspace)
+        command = list(command or ["/bin/bash"])
+        stdout = stdout or sys.stdout.buffer
+        stderr = stderr or sys.stderr.buffer
+        if self.config.rightsize not in rightsize_policy.MODES:
+            raise SandboxError(f"Invalid rightsize mode: {self.config.rightsize}")
+
+        name = self.config.name or self.generate_name()
+        log = RunLog(self.config.log_dir / f"{name}.json")
+        phases = PhaseTimer(log)
+
+        with phases.phase("image_check"):
+            present = self.image_present()
+        if not present:
+            with phases.phase("build"):
+                self.build_image()
+        with phases.phase("runtime"):
+            runtime = self.resolve_runtime()
+
+        memory, cpus = self.config.memory, self.config.cpus
+        start = self.start_event(name, workspace, runtime, command)
+        if self.config.rightsize == "auto":
+            with phases.phase("rightsize"):
+                try:
+                    limits = self.right_size(workspace, command)
+                except (OSError, sqlite3.Error, ValueError) as e:
+                    warn(f"Right-sizing unavailable, using configured limits: {e}")
+                    limits = None
+            if limits is not None:
+                memory = rightsize_policy.format_memory(limits.memory)
+                cpus = rightsize_policy.format_cpus(limits.cpus)
+                start.update(memory=memory, cpus=cpus, rightsize={
+                    "mode": "auto", **limits.event(),
+                    "memory_ceiling": self.config.memory, "cpus_ceiling": self.config.cpus})
+                info(f"Right-sized to {memory} / {cpus} CPUs ({limits.reason})")
+
+        # Admission tickets held by the run (replaced when an OOM retry grows it)
+        tickets: List[str] = []
+        if self.config.queue:
+            ticket, start["admission"] = self.admit(name, memory, cpus, phases)
+            tickets.append(ticket)
+
+        try:
+            deps = None
+            if self.requirements_file(workspace) is not None:
+                with phases.phase("deps"):
+                    deps = self.dependencies(workspace, runtime)
+                if deps is not None:
+                    start["deps"] = deps
+            return self._run_admitted(name, workspace, command, runtime, memory, cpus, start,
+                                      log, phases, stdout, stderr, tickets,
+                                      deps["path"] if deps else None)
+        finally:
+            for ticket in tickets:
+                self.admission_queue().release(ticket)
+
+    def _run_admitted(self, name: str, workspace: Path, command: List[str], runtime: str,
+                      memory: str, cpus: str, start: Dict[str, Any], log: "RunLog",
+                      phases: "PhaseTimer", stdout: BinaryIO, stderr: BinaryIO,
+                      tickets: List[str], deps: Optional[str] = None) -> SandboxResult:
+        """Log the start event and run the container, retrying OOM kills."""
+        started = time.monotonic()
+        log.event("start", start)
+        overlay = mount = None
+        if self.config.workspace_mode == "overlay":
+            with phases.phase("overlay_setup"):
+                overlay, mount = self.workspace_mount(name, workspace)
+
+        exit_code = 1
+        oom_killed = False
+        attempts = 0
+        complete: Dict[str, Any] = {}
+        capture = self.output_writer(name)
+        try:
+            while True:
+                attempts += 1
+                exit_code, oom_killed, complete = self.run_container(
+                    name, self.container_config(workspace, command, runtime, mount, memory, cpus,
+                                                deps),
+                    phases, stdout, stderr, parse_memory(memory), capture)
+                retry = None
+                if oom_killed and self.config.rightsize == "auto" and overlay is None:
+                    retry = rightsize_policy.retry_memory(parse_memory(memory),
+                                                          parse_memory(self.config.memory))
+                if retry is None:
+                    break
+                next_memory = rightsize_policy.format_memory(retry)
+                warn(f"Out of memory at {memory}, retrying with {next_memory}")
+                log.event("oom_retry", {"attempt": attempts, "memory": memory,
+                                        "next_memory": next_memory, "exit_code": exit_code})
+                memory = next_memory
+                if tickets:
+                    self.admission_queue().release(tickets.pop())
+                    tickets.append(self.admit(name, memory, cpus, phases)[0])
+        except KeyboardInterrupt:
+            exit_code = 130
+            raise
+        finally:
+            if capture is not None:
+                capture.close()
+                complete["output"] = capture.summary()
+            if overlay is not None:
+                with phases.phase("overlay_teardown"):
+                    complete["overlay"] = overlay.summary()
+                    overlay.teardown()
+            duration_ms = int((time.monotonic() - started) * 1000)
+            log.event("complete", {
+                "exit_code": exit_code,
+                "duration_seconds": duration_ms // 1000,
+                "duration_ms": duration_ms,
+                "phases_ms": phases.phases_ms,
+                "success": "true" if exit_code == 0 else "false",
+                "oom_killed": oom_killed,
+                **({"attempts": attempts, "memory": memory}
+                   if attempts > 1 else {}),
+                **complete,
+            })
+
+        return SandboxResult(name, exit_code, duration_ms, runtime, overlay, phases.phases_ms,
+                             memory, cpus, attempts, oom_killed)
+
+    def output_writer(self, name: str) -> Optional[OutputWriter]:
+        """Return the writer capturing a run's output, or None if capture is off."""
+        if not self.config.capture:
+            return None
+        return OutputWriter(output_dir(self.config.log_dir, name),
+                            parse_memory(self.config.capture_rotate), self.config.capture_keep,
+                            self.config.capture_compress)
+
+    def run_container(self, name: str, config: Dict[str, Any], phases: "PhaseTimer",
+                      stdout: BinaryIO, stderr: BinaryIO, memory_limit: int,
+                      capture: Optional[OutputWriter] = None
+                      ) -> Tuple[int, bool, Dict[str, Any]]:
+        """Create, run and remove one container.
+
+        Output goes to stdout/stderr and, if given, to the capture writer.
+
+        Returns:
+            Tuple of (exit code, whether it was OOM-killed, complete-event
+            fields from the watcher and sampler)
+        """
+        exit_code = 1
+        oom_flag = False
+        sampler = watcher = None
+        complete: Dict[str, Any] = {}
+        try:
+            with phases.phase("create"):
+                container_id = self.create_container(name, config)
+                # Attach before start so no output is lost; attach holds its own connection
+                attached = self.client.attach(container_id)
+                output = threading.Thread(target=self.pump,
+                                          args=(attached, stdout, stderr, capture),
+                                          daemon=True)
+                output.start()
+
+            with phases.phase("command"):
+                self.client.start_container(container_id)
+                watcher = self.start_watcher(container_id)
+                sampler = self.start_sampler(container_id, name)
+                exit_code = self.client.wait_container(container_id)
+                output.join()
+            oom_flag = bool(self.client.inspect_container(container_id)["State"].get("OOMKilled"))
+        finally:
+            complete.update(self.stop_watcher(watcher))
+            # Force-remove also kills the container if we were interrupted
+            with phases.phase("teardown"):
+                self.client.remove_container(name)
+            complete.update(self.stop_sampler(sampler))
+
+        resources = complete.get("resources", {})
+        oom_flag = oom_flag or resources.get("memory_events", {}).get("oom_kill", 0) > 0
+        memory_peak = resources.get("memory_peak_bytes",
+                                    complete.get("cgroup_samples", {}).get("summary", {})
+                                    .get("memory_peak_bytes"))
+        return exit_code, rightsize_policy.oom_killed(
+            exit_code, oom_flag, memory_peak, memory_limit), complete
+
+    @staticmethod
+    def pump(attached, stdout: BinaryIO, stderr: BinaryIO,
+             capture: Optional[OutputWriter] = None) -> None:
+        """Copy a multiplexed output stream to stdout/stderr until EOF."""
+        try:
+            for stream_id, data in demux(attached):
+                target = stderr if stream_id == STDERR else stdout
+                target.write(data)
+                target.flush()
+                if capture is not None:
+                    capture.write(stream_id, data)
+        finally:
+            attached.close()
+
+
+class PhaseTimer:
+    """Times the phases of a launch in milliseconds.
+
+    Python counterpart of phase_begin/phase_end in sandbox-lib.sh: each phase
+    is logged as a "phase" event and collected for the complete event's
+    "phases_ms".
+    """
+
+    def __init__(self, log: Optional["RunLog"] = None):
+        self.log = log
+        self.phases_ms: Dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            ms = int((time.monotonic() - started) * 1000)
+            self.phases_ms[name] = self.phases_ms.get(name, 0) + ms
+            if self.log is not None:
+                self.log.event("phase", {"phase": name, "ms": ms})
+
+
+class RunLog:
+    """Appends JSON events to a run's log file in run-sandbox.sh's format."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def event(self, event: str, data: Dict[str, Any]) -> None:
+        """Append one event."""
+        record = {"timestamp": utc_timestamp(), "event": event, "data": data}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+# Console output in run-sandbox.sh's style
+GREEN = "\033[0;32m"
+YELLOW = "\033[1;33m"
+RED = "\033[0;31m"
+NC = "\033[0m"
+
+
+def info(message: str) -> None:
+    print(f"{GREEN}[INFO]{NC} {message}", file=sys.stderr)
+
+
+def warn(message: str) -> None:
+    print(f"{YELLOW}[WARN]{NC} {message}", file=sys.stderr)
+
+
+def error(message: str) -> None:
+    print(f"{RED}[ERROR]{NC} {message}", file=sys.stderr)
@@ -0,0 +1,189 @@
+"""Workload-derived minimal seccomp profiles.
+
+seccomp-profile.json is a hand-maintained allowlist. Trace mode runs a
+workload once in a sandbox built from Dockerfile.claude-sandbox-trace (the
+sandbox image plus strace), unconfined so no call takes an error path it
+would not take in production, and records every syscall with `strace -f -c`.
+From the trace it writes:
+
+- a syscall histogram (calls and errors per syscall, hottest first), and
+- a minimal profile: the source profile's default action and architectures,
+  allowing only the traced syscalls plus the few the container runtime makes
+  between installing the filter and exec'ing the command
+
+The allowlist is ordered by call frequency. libseccomp is free to reorder
+rules when it compiles the filter, so this is a hint rather than a
+guarantee; benchmarks/seccomp_overhead.py measures what it buys.
+
+A trace only covers the code paths the workload took, so trace a run that
+exercises the whole job and use the generated profile for that job only
+(SANDBOX_SECCOMP=<profile>).
+"""
+
+import json
+import sys
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .sandbox import (REPO_DIR, UNCONFINED, PhaseTimer, Sandbox, SandboxError, info,
+                      parse_memory, utc_timestamp)
+
+TRACE_IMAGE = "claude-sandbox:trace"
+TRACE_DOCKERFILE = REPO_DIR / "Dockerfile.claude-sandbox-trace"
+TRACE_MOUNT = "/trace"
+
+# With no-new-privileges runc installs the filter last, so between that and
+# exec'ing the command only runc's Go runtime runs (thread wakeups, signals,
+# closing inherited descriptors); strace never sees these calls
+RUNTIME_SYSCALLS = [
+    "close", "close_range", "epoll_pwait", "execve", "exit", "exit_group", "fstat",
+    "futex", "getpid", "gettid", "nanosleep", "newfstatat", "rt_sigaction",
+    "rt_sigprocmask", "rt_sigreturn", "sched_yield", "sigaltstack", "tgkill",
+]
+
+
+@dataclass
+class SyscallCount:
+    """Calls to one syscall during a trace."""
+
+    name: str
+    calls: int
+    errors: int = 0
+
+
+def parse_strace_summary(text: str) -> List[SyscallCount]:
+    """Parse the table `strace -c` writes, hottest syscall first.
+
+    Columns are "% time, seconds, usecs/call, calls, [errors], syscall";
+    errors is blank for syscalls that never failed.
+    """
+    counts = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 5 or fields[-1] == "total" or not fields[3].isdigit():
+            continue
+        errors = int(fields[4]) if len(fields) == 6 and fields[4].isdigit() else 0
+        counts.append(SyscallCount(fields[-1], int(fields[3]), errors))
+    return sorted(counts, key=lambda c: (-c.calls, c.name))
+
+
+def histogram(counts: List[SyscallCount], allowed: Optional[List[str]] = None
+              ) -> Dict[str, Any]:
+    """Return the histogram document for a trace.
+
+    Args:
+        counts: Traced syscalls, hottest first
+        allowed: Syscalls the current profile allows; adds which traced
+            syscalls it would deny and how many of its entries went unused
+    """
+    total = sum(c.calls for c in counts) or 1
+    result: Dict[str, Any] = {
+        "total_calls": sum(c.calls for c in counts),
+        "syscalls": [{"name": c.name, "calls": c.calls, "errors": c.errors,
+                      "percent": round(c.calls * 100 / total, 2)} for c in counts],
+    }
+    if allowed is not None:
+        traced = {c.name for c in counts}
+        result["denied_by_current"] = [c.name for c in counts if c.name not in allowed]
+        result["unused_in_current"] = len(set(allowed) - traced - set(RUNTIME_SYSCALLS))
+    return result
+
+
+def allowed_syscalls(profile: Dict[str, Any]) -> List[str]:
+    """Return the syscalls a profile allows unconditionally."""
+    names: List[str] = []
+    for rule in profile.get("syscalls", []):
+        if rule.get("action") == "SCMP_ACT_ALLOW" and not rule.get("args"):
+            names.extend(rule.get("names", []))
+    return names
+
+
+def minimal_profile(counts: List[SyscallCount], base: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a profile allowing only the traced and runtime syscalls.
+
+    Args:
+        counts: Traced syscalls, hottest first
+        base: Profile to take the default action and architectures from
+
+    Returns:
+        Profile with one allow rule, ordered by call frequency
+    """
+    names = [c.name for c in counts]
+    names += sorted(set(RUNTIME_SYSCALLS) - set(names))
+    return {
+        "defaultAction": base.get("defaultAction", "SCMP_ACT_ERRNO"),
+        "architectures": base.get("architectures", ["SCMP_ARCH_X86_64"]),
+        "syscalls": [{"names": names, "action": "SCMP_ACT_ALLOW"}],
+    }
+
+
+@dataclass
+class SyscallTrace:
+    """Result of tracing a workload."""
+
+    command: List[str]
+    runtime: str
+    exit_code: int
+    counts: List[SyscallCount]
+
+    def histogram(self, allowed: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Return the histogram document, with the trace's metadata."""
+        return {"timestamp": utc_timestamp(), "command": self.command,
+                "runtime": self.runtime, "exit_code": self.exit_code,
+                **histogram(self.counts, allowed)}
+
+
+def trace(sandbox: Sandbox, workspace: Path, command: List[str], runtime: str = "runc",
+          stdout=None, stderr=None) -> SyscallTrace:
+    """Run a command once under strace and count its syscalls.
+
+    The container has the sandbox's limits, user and read-only root, but runs
+    the trace image with seccomp unconfined. The trace image is built (on top
+    of the sandbox image) if missing.
+
+    Args:
+        sandbox: Sandbox whose configuration the trace run copies
+        workspace: Directory to bind-mount as /workspace
+        command: Command to trace
+        runtime: Container runtime (runc: the profile is enforced by the host
+            kernel, so that is the syscall stream it sees)
+        stdout: Stream for the command's stdout (default: sys.stdout)
+        stderr: Stream for the command's stderr (default: sys.stderr)
+
+    Raises:
+        SandboxError: If strace produced no summary
+    """
+    workspace = sandbox.check_workspace(workspace)
+    sandbox.ensure_image()
+    tracer = Sandbox(replace(sandbox.config, image=TRACE_IMAGE, dockerfile=TRACE_DOCKERFILE,
+                             seccomp_profile=Path(UNCONFINED), workspace_mode="bind"),
+                     client=sandbox.client, cache_path=None)
+    tracer.ensure_image()
+
+    with tempfile.TemporaryDirectory(prefix="seccomp-trace-") as scratch:
+        # Written by the sandbox user (uid 1000)
+        Path(scratch).chmod(0o777)
+        config = tracer.container_config(
+            workspace, ["strace", "-f", "-c", "-o", f"{TRACE_MOUNT}/summary.txt", "--",
+                        *command], runtime)
+        config["HostConfig"]["Binds"].append(f"{scratch}:{TRACE_MOUNT}:rw")
+
+        name = f"{tracer.generate_name()}-trace"
+        exit_code, _, _ = tracer.run_container(
+            name, config, PhaseTimer(), stdout or sys.stdout.buffer,
+            stderr or sys.stderr.buffer, parse_memory(tracer.config.memory))
+        summary = Path(scratch) / "summary.txt"
+        counts = parse_strace_summary(summary.read_text()) if summary.exists() else []
+
+    if not counts:
+        raise SandboxError(f"strace recorded no syscalls (exit {exit_code})")
+    info(f"Traced {sum(c.calls for c in counts)} calls to {len(counts)} syscalls")
+    return SyscallTrace(command, runtime, exit_code, counts)
+
+
+def write_json(path: Path, document: Dict[str, Any]) -> None:
+    """Write a JSON document, creating its directory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2) + "\n")
@@ -3,6 +3,7 @@
 #
 # Usage:
 #   ./run-sandbox.sh <workspace-dir> [command]
+#   ./run-sandbox.sh --batch <jobs.jsonl> [--parallel N] <workspace-dir>
 #
 # Arguments:
 #   workspace-dir: Directory to mount as /workspace in container
@@ -13,17 +14,32 @@
 #   SANDBOX_CPUS: CPU limit (default: 4)
 #   SANDBOX_NETWORK: Network mode (default: none)
 #   SANDBOX_RUNTIME: Docker runtime (default: runsc for gVisor)
-#   SANDBOX_NAME: Container name (default: claude-sandbox-<timestamp>)
+#   SANDBOX_NAME: Container name (default: claude-sandbox-<timestamp>-<pid>)
+#   SANDBOX_POOL: Serve the run from a warm container pool (default: 0)
+#   SANDBOX_WORKSPACE_MODE: bind or overlay (default: bind)
+#   SANDBOX_IO_PROFILE: gVisor workspace I/O profile (default: default)
+#   SANDBOX_SAMPLE_HZ: Sample the container's cgroup at this rate (default: 0, off)
+#   SANDBOX_RIGHTSIZE: off, record or auto: size limits from history (default: off)
+#   SANDBOX_QUEUE: Wait for host capacity before starting (default: 0)
+#   SANDBOX_SECCOMP: Seccomp profile or "unconfined" (default: seccomp-profile.json)
+#   SANDBOX_CAPTURE: Keep the container's output in logs/<name>.output (default: 1)
+#   SANDBOX_REQUIREMENTS: Workspace requirements file to install offline (default: requirements.txt)
 
 set -euo pipefail
 
 # Configuration
 SANDBOX_IMAGE="${SANDBOX_IMAGE:-claude-sandbox:latest}"
+SANDBOX_DOCKERFILE="${SANDBOX_DOCKERFILE:-Dockerfile.claude-sandbox}"
 SANDBOX_MEMORY="${SANDBOX_MEMORY:-4g}"
 SANDBOX_CPUS="${SANDBOX_CPUS:-4}"
 SANDBOX_NETWORK="${SANDBOX_NETWORK:-none}"
 SANDBOX_RUNTIME="${SANDBOX_RUNTIME:-runsc}"
 SANDBOX_PIDS_LIMIT="${SANDBOX_PIDS_LIMIT:-512}"
+SANDBOX_POOL="${SANDBOX_POOL:-0}"
+SANDBOX_WORKSPACE_MODE="${SANDBOX_WORKSPACE_MODE:-bind}"
+SANDBOX_IO_PROFILE="${SANDBOX_IO_PROFILE:-default}"
+
+source "$(dirname "${BASH_SOURCE[0]}")/sandbox-lib.sh"
 
 # Colors for output
 RED='\033[0;31m'
@@ -56,6 +72,7 @@ log_json() {
 show_usage() {
     cat <<EOF
 Usage: $0 <workspace-dir> [command]
+       $0 --batch <jobs.jsonl> [--parallel N] [--job-timeout SECS] <workspace-dir>
 
 Run Claude Code in a secure Docker+gVisor sandbox.
 
@@ -69,6 +86,88 @@ Environment Variables:
   SANDBOX_NETWORK     Network mode (default: none)
   SANDBOX_RUNTIME     Docker runtime (default: runsc)
   SANDBOX_PIDS_LIMIT  Process limit (default: 512)
+  SANDBOX_IMAGE       Image to run (default: claude-sandbox:latest)
+  SANDBOX_DOCKERFILE  Dockerfile used if the image is missing
+                      (default: Dockerfile.claude-sandbox; see
+                      Dockerfile.claude-sandbox-optimized)
+  SANDBOX_SECCOMP     Seccomp profile (default: seccomp-profile.json; Docker's
+                      default profile if missing). Generate a minimal one for
+                      a workload with:
+                      python3 -m claude_sandbox --seccomp-trace <workspace-dir> <command>
+
+Output Capture (read with sandbox-history.sh --output <name>):
+  SANDBOX_CAPTURE          Set to 0 to not keep the container's output in
+                           logs/<name>.output (default: 1; not for SANDBOX_POOL=1)
+  SANDBOX_CAPTURE_ROTATE   Segment size before rotation (default: 8m)
+  SANDBOX_CAPTURE_KEEP     Segments kept per run, oldest removed (default: 0, all)
+  SANDBOX_CAPTURE_COMPRESS Set to 1 to gzip rotated segments (default: 0)
+
+Project Dependencies (see claude_sandbox/deps.py):
+  SANDBOX_REQUIREMENTS    Requirements file in the workspace, installed without
+                          network from the wheelhouse into a cached environment
+                          mounted at /opt/sandbox-deps (default: requirements.txt;
+                          "none" to skip)
+  SANDBOX_WHEELHOUSE      Wheel directory (default: .sandbox-wheelhouse). Fill it,
+                          with network, using:
+                          python3 -m claude_sandbox --wheelhouse -r <requirements>
+  SANDBOX_DEPS_DIR        Environment cache (default: .sandbox-cache/deps)
+  SANDBOX_DEPS_CACHE_SIZE Cache size before least recently used environments
+                          are evicted (default: 10g). List it with:
+                          python3 -m claude_sandbox --deps-cache
+
+Warm Pool (see sandbox-pool.sh):
+  SANDBOX_POOL            Set to 1 to exec into a pre-started container (default: 0)
+  SANDBOX_POOL_SIZE       Idle containers kept per workspace/config (default: 2)
+  SANDBOX_POOL_MAX_USES   Runs served before a container is destroyed (default: 20)
+  SANDBOX_POOL_IDLE_TTL   Seconds before an idle container is evicted (default: 600)
+
+Copy-on-Write Workspace:
+  SANDBOX_WORKSPACE_MODE  bind (default) or overlay: mount workspace-dir as a
+                          read-only base with a per-run writable layer
+  SANDBOX_OVERLAY_DIR     Where per-run layers are kept (default: .sandbox-overlays)
+  SANDBOX_OVERLAY_KEEP    Set to 0 to discard the run's changes afterwards (default: 1)
+
+Workspace I/O under gVisor (see claude_sandbox/io_profiles.py):
+  SANDBOX_IO_PROFILE      default, gofer, directfs, cached or overlay. Each
+                          non-default profile uses a runsc runtime registered
+                          as runsc-<profile>; cached and overlay cannot be
+                          combined with SANDBOX_POOL=1, and overlay discards
+                          writes to the workspace. List them with:
+                          python3 -m claude_sandbox --io-profiles
+
+Resource Sampling:
+  SANDBOX_SAMPLE_HZ       Read the container's cgroup v2 stats this many times a
+                          second (10-100 typical) into logs/<name>.cgroup.jsonl
+                          (default: 0, off; Linux hosts)
+
+Right-Sizing (see claude_sandbox/rightsize.py):
+  SANDBOX_RIGHTSIZE       off (default), record (sample every run so its peaks
+                          are in the history) or auto (also derive memory and
+                          CPU limits from the workload's recent peaks;
+                          SANDBOX_MEMORY/SANDBOX_CPUS become the ceiling and an
+                          OOM-killed run is retried with double the memory)
+  SANDBOX_RIGHTSIZE_MARGIN    Headroom over the observed peaks (default: 0.3)
+  SANDBOX_RIGHTSIZE_MIN_RUNS  Sampled runs needed before auto applies (default: 3)
+
+Admission Queue (see claude_sandbox/admission.py):
+  SANDBOX_QUEUE           Set to 1 to wait until the run's memory/CPU/pids limits
+                          fit the host capacity next to the other sandboxes
+                          (default: 0; SANDBOX_POOL=1 runs are not queued)
+  SANDBOX_QUEUE_POLICY    fifo or priority (default: fifo); smaller runs may pass
+                          one that doesn't fit yet for up to 60 seconds
+  SANDBOX_PRIORITY        Higher is admitted first under priority (default: 0)
+  SANDBOX_QUEUE_TIMEOUT   Seconds to wait before failing (default: 0, forever)
+  SANDBOX_HOST_MEMORY     Capacity (default: the Docker daemon's memory)
+  SANDBOX_HOST_CPUS       Capacity (default: the Docker daemon's CPUs)
+  SANDBOX_HOST_PIDS       Capacity (default: 32768)
+  Show the queue with: python3 -m claude_sandbox --queue
+
+Batch Mode (runs via python3 -m claude_sandbox):
+  --batch FILE        Run every job in FILE in one shared container. One JSON
+                      object per line: {"id": ..., "command": [...] or "...",
+                      "timeout": secs}. Output goes to logs/<batch>/<id>.out/.err
+  --parallel N        Jobs to run concurrently (default: 1)
+  --job-timeout SECS  Timeout for jobs that don't set one (default: none)
 
 Examples:
   # Interactive shell
@@ -80,6 +179,21 @@ Examples:
   # With custom resource limits
   SANDBOX_MEMORY=2g SANDBOX_CPUS=2 ./run-sandbox.sh ./my-project
 
+  # Share one copy of a dataset between concurrent runs
+  SANDBOX_WORKSPACE_MODE=overlay ./run-sandbox.sh ./dataset python3 process.py
+
+  # Size limits from the workload's history, up to 4g / 4 CPUs
+  SANDBOX_RIGHTSIZE=auto ./run-sandbox.sh ./my-project python3 process.py
+
+  # Many concurrent callers without overcommitting the host
+  SANDBOX_QUEUE=1 SANDBOX_MEMORY=2g ./run-sandbox.sh ./my-project python3 process.py
+
+  # Reuse a warm container between runs
+  SANDBOX_POOL=1 ./run-sandbox.sh ./my-project python3 hello.py
+
+  # Run a batch of jobs, four at a time, in one container
+  ./run-sandbox.sh --batch jobs.jsonl --parallel 4 ./my-project
+
 EOF
 }
 
@@ -90,6 +204,17 @@ if [ $# -lt 1 ]; then
     exit 1
 fi
 
+# Batch mode needs concurrent exec streams; hand over to the Python launcher
+if [ "$1" = "--batch" ]; then
+    SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    export SANDBOX_IMAGE SANDBOX_DOCKERFILE SANDBOX_MEMORY SANDBOX_CPUS \
+        SANDBOX_NETWORK SANDBOX_RUNTIME SANDBOX_PIDS_LIMIT SANDBOX_WORKSPACE_MODE \
+        SANDBOX_IO_PROFILE SANDBOX_CAPTURE SANDBOX_CAPTURE_ROTATE SANDBOX_CAPTURE_KEEP \
+        SANDBOX_CAPTURE_COMPRESS SANDBOX_REQUIREMENTS SANDBOX_WHEELHOUSE SANDBOX_DEPS_DIR \
+        SANDBOX_DEPS_CACHE_SIZE
+    exec env PYTHONPATH="${SCRIPT_DIR}${PYTHONPATH:+:$PYTHONPATH}" python3 -m claude_sandbox "$@"
+fi
+
 WORKSPACE_DIR="$1"
 shift
 COMMAND=("$@")
@@ -108,9 +233,54 @@ fi
 # Convert to absolute path
 WORKSPACE_DIR="$(cd "$WORKSPACE_DIR" && pwd)"
 
-# Generate unique container name and log file
+case "$SANDBOX_WORKSPACE_MODE" in
+    bind) ;;
+    overlay)
+        if [ "$SANDBOX_POOL" = "1" ]; then
+            log_error "SANDBOX_WORKSPACE_MODE=overlay cannot be combined with SANDBOX_POOL=1"
+            exit 1
+        fi
+        ;;
+    *)
+        log_error "Invalid SANDBOX_WORKSPACE_MODE: $SANDBOX_WORKSPACE_MODE (expected bind or overlay)"
+        exit 1
+        ;;
+esac
+
+case "$SANDBOX_IO_PROFILE" in
+    default|gofer|directfs) ;;
+    cached|overlay)
+        # The pool serves many runs from one container; the host changes the
+        # workspace between them, which exclusive file access would not notice
+        if [ "$SANDBOX_POOL" = "1" ]; then
+            log_error "SANDBOX_IO_PROFILE=$SANDBOX_IO_PROFILE cannot be combined with SANDBOX_POOL=1"
+            exit 1
+        fi
+        ;;
+    *)
+        log_error "Invalid SANDBOX_IO_PROFILE: $SANDBOX_IO_PROFILE (expected default, gofer, directfs, cached or overlay)"
+        exit 1
+        ;;
+esac
+
+case "$SANDBOX_RIGHTSIZE" in
+    off|record) ;;
+    auto)
+        if [ "$SANDBOX_POOL" = "1" ]; then
+            log_warn "SANDBOX_RIGHTSIZE=auto is ignored with SANDBOX_POOL=1 (pool containers are shared); recording only"
+            SANDBOX_RIGHTSIZE="record"
+        fi
+        ;;
+    *)
+        log_error "Invalid SANDBOX_RIGHTSIZE: $SANDBOX_RIGHTSIZE (expected off, record or auto)"
+        exit 1
+        ;;
+esac
+
+# Generate unique container name and log file. The pid keeps launches started
+# in the same second (typically queued ones) apart, as Sandbox.generate_name does.
 TIMESTAMP=$(date +%Y%m%d-%H%M%S)
-SANDBOX_NAME="${SANDBOX_NAME:-claude-sandbox-${TIMESTAMP}}"
+SANDBOX_NAME="${SANDBOX_NAME:-claude-sandbox-${TIMESTAMP}-$$}"
 LOG_DIR="logs"
 LOG_FILE="${LOG_DIR}/${SANDBOX_NAME}.json"
 
@@ -118,34 +288,76 @@ LOG_FILE="${LOG_DIR}/${SANDBOX_NAME}.json"
 mkdir -p "${LOG_DIR}"
 
 # Check if Docker is running
+phase_begin
 if ! docker info >/dev/null 2>&1; then
     log_error "Docker is not running. Please start Docker Desktop."
     exit 1
 fi
+phase_end "docker_check"
 
 # Check if sandbox image exists
+phase_begin
 if ! docker image inspect "$SANDBOX_IMAGE" >/dev/null 2>&1; then
+    phase_end "image_check"
     log_warn "Sandbox image '$SANDBOX_IMAGE' not found. Building..."
 
-    if [ ! -f "Dockerfile.claude-sandbox" ]; then
-        log_error "Dockerfile.claude-sandbox not found in current directory"
+    if [ ! -f "$SANDBOX_DOCKERFILE" ]; then
+        log_error "$SANDBOX_DOCKERFILE not found in current directory"
         exit 1
     fi
 
-    docker build -t "$SANDBOX_IMAGE" -f Dockerfile.claude-sandbox .
+    phase_begin
+    docker build -t "$SANDBOX_IMAGE" -f "$SANDBOX_DOCKERFILE" .
+    phase_end "build"
     log_info "Sandbox image built successfully"
+else
+    phase_end "image_check"
 fi
 
 # Check if gVisor runtime is available (optional, fallback to runc)
-if ! docker info 2>/dev/null | grep -q "Runtimes:.*runsc"; then
-    log_warn "gVisor runtime (runsc) not available, falling back to default runtime (runc)"
-    log_warn "Install gVisor for enhanced security: brew install gvisor"
-    SANDBOX_RUNTIME="runc"
+phase_begin
+resolve_runtime
+phase_end "runtime"
+
+# Size limits from the workload's history
+SIGNATURE=$(sandbox_signature "$WORKSPACE_DIR" "${COMMAND[*]}")
+RIGHTSIZE_FIELDS=""
+RIGHTSIZE_CEILING_MEMORY="$SANDBOX_MEMORY"
+if [ "$SANDBOX_RIGHTSIZE" = "auto" ]; then
+    phase_begin
+    if rightsize_apply "$SIGNATURE"; then
+        log_info "Right-sized to ${SANDBOX_MEMORY} / ${SANDBOX_CPUS} CPUs (${RIGHTSIZE_REASON})"
+    else
+        log_warn "Right-sizing unavailable, using configured limits"
+    fi
+    phase_end "rightsize"
+fi
+
+# Wait for host capacity
+if [ "$SANDBOX_QUEUE" = "1" ] && [ "$SANDBOX_POOL" != "1" ]; then
+    phase_begin
+    if ! admission_admit "$SANDBOX_NAME"; then
+        log_error "Admission queue failed"
+        exit 1
+    fi
+    phase_end "queue"
+fi
+
+# Install or reuse the workspace's dependency environment
+if deps_wanted "$WORKSPACE_DIR"; then
+    phase_begin
+    if ! deps_prepare "$WORKSPACE_DIR"; then
+        log_error "Dependency install failed"
+        admission_release
+        exit 1
+    fi
+    phase_end "deps"
 fi
 
 # Log execution start
 START_TIME=$(date +%s)
-log_json "start" "{\"container\":\"${SANDBOX_NAME}\",\"workspace\":\"${WORKSPACE_DIR}\",\"memory\":\"${SANDBOX_MEMORY}\",\"cpus\":\"${SANDBOX_CPUS}\",\"network\":\"${SANDBOX_NETWORK}\",\"runtime\":\"${SANDBOX_RUNTIME}\",\"pids_limit\":\"${SANDBOX_PIDS_LIMIT}\",\"command\":\"${COMMAND[*]}\"}"
+START_MS=$(now_ms)
+log_json "start" "{\"container\":\"${SANDBOX_NAME}\",\"workspace\":\"${WORKSPACE_DIR}\",\"memory\":\"${SANDBOX_MEMORY}\",\"cpus\":\"${SANDBOX_CPUS}\",\"network\":\"${SANDBOX_NETWORK}\",\"runtime\":\"${SANDBOX_RUNTIME}\",\"pids_limit\":\"${SANDBOX_PIDS_LIMIT}\",\"pool\":$([ "$SANDBOX_POOL" = "1" ] && echo true || echo false),\"workspace_mode\":\"${SANDBOX_WORKSPACE_MODE}\",\"io_profile\":\"${SANDBOX_IO_PROFILE}\",\"command\":\"${COMMAND[*]}\",\"signature\":\"${SIGNATURE}\"${RIGHTSIZE_FIELDS}${ADMISSION_FIELDS}${DEPS_FIELDS}}"
 
 # Run the sandbox
 log_info "Starting sandbox container: $SANDBOX_NAME"
@@ -157,41 +369,133 @@ log_info "  Runtime: $SANDBOX_RUNTIME"
 log_info "  Command: ${COMMAND[*]}"
 log_info "  Log file: $LOG_FILE"
 
-# Docker run options
-DOCKER_OPTS=(
-    --rm                                    # Remove container after exit
-    --name "$SANDBOX_NAME"                  # Container name
-    --runtime="$SANDBOX_RUNTIME"            # Use gVisor if available
-    --memory="$SANDBOX_MEMORY"              # Memory limit
-    --cpus="$SANDBOX_CPUS"                  # CPU limit
-    --pids-limit="$SANDBOX_PIDS_LIMIT"      # Process limit
-    --network="$SANDBOX_NETWORK"            # Network isolation
-    --read-only                             # Read-only root filesystem
-    --tmpfs /tmp/claude-tmp:rw,noexec,nosuid,size=1g  # Writable temp
-    -v "${WORKSPACE_DIR}:/workspace:rw"     # Mount workspace
-    -w /workspace                           # Set working directory
-    --security-opt=no-new-privileges:true   # Prevent privilege escalation
-    --cap-drop=ALL                          # Drop all capabilities
-    --cap-add=CHOWN                         # Allow chown (for file ownership)
-    --cap-add=DAC_OVERRIDE                  # Allow file access override
-    --cap-add=SETGID                        # Allow setgid (for group changes)
-    --cap-add=SETUID                        # Allow setuid (for user changes)
-)
-
-# Add seccomp profile if it exists
-if [ -f "seccomp-profile.json" ]; then
-    DOCKER_OPTS+=(--security-opt seccomp="$(pwd)/seccomp-profile.json")
-fi
+EXIT_CODE=0
+ATTEMPTS=1
+POOL_FIELDS=""
+OVERLAY_FIELDS=""
+RETRY_FIELDS=""
+SAMPLES_FILE="${LOG_DIR}/${SANDBOX_NAME}.cgroup.jsonl"
+WATCHER_FILE="${LOG_DIR}/${SANDBOX_NAME}.resources"
+CAPTURE_FILE="${LOG_DIR}/${SANDBOX_NAME}.output.summary"
+
+# Create, run and remove a container as separate steps so each is timed.
+# Behaves like `docker run --rm`: the trap removes the container if we are
+# interrupted while it runs.
+run_container() {
+    phase_begin
+    docker create "${DOCKER_OPTS[@]}" "$SANDBOX_IMAGE" "${COMMAND[@]}" >/dev/null || return $?
+    trap 'docker rm -f "$SANDBOX_NAME" >/dev/null 2>&1' EXIT
+    phase_end "create"
+
+    watcher_start "$SANDBOX_NAME" "$WATCHER_FILE"
+    sampler_start "$SANDBOX_NAME" "$SAMPLES_FILE"
+    capture_start "$SANDBOX_NAME" "$CAPTURE_FILE"
+    phase_begin
+    docker start -a "$SANDBOX_NAME" || EXIT_CODE=$?
+    phase_end "command"
+    watcher_stop
+
+    phase_begin
+    capture_stop
+    OOM_KILLED=$(docker inspect -f '{{.State.OOMKilled}}' "$SANDBOX_NAME" 2>/dev/null || echo false)
+    docker rm -f "$SANDBOX_NAME" >/dev/null 2>&1 || true
+    trap - EXIT
+    phase_end "teardown"
+}
 
-# Run the container
-docker run "${DOCKER_OPTS[@]}" "$SANDBOX_IMAGE" "${COMMAND[@]}"
+if [ "$SANDBOX_POOL" = "1" ]; then
+    # Serve from the warm pool: claim an idle container, or start one cold
+    phase_begin
+    pool_evict
+    POOL_KEY=$(pool_key "$WORKSPACE_DIR")
+
+    if CLAIMED=$(pool_claim "$POOL_KEY"); then
+        read -r POOL_CONTAINER POOL_USES BOOT_MS <<< "$CLAIMED"
+        SERVED="warm"
+        LATENCY_SAVED_MS=$BOOT_MS
+        phase_end "pool_claim"
+    elif STARTED=$(pool_start "$POOL_KEY" "$WORKSPACE_DIR"); then
+        read -r POOL_CONTAINER BOOT_MS <<< "$STARTED"
+        POOL_USES=0
+        SERVED="cold"
+        LATENCY_SAVED_MS=0
+        phase_end "create"
+    else
+        log_error "Failed to start pool container"
+        exit 1
+    fi
+    log_info "  Pool: ${SERVED} (container ${POOL_CONTAINER}, boot ${BOOT_MS}ms)"
+    # Like run_container's trap: if we are interrupted, destroy the container
+    # (and the command running in it) rather than leave it busy forever
+    trap 'pool_destroy "$POOL_KEY" "$POOL_CONTAINER"' EXIT
+
+    watcher_start "$POOL_CONTAINER" "$WATCHER_FILE"
+    sampler_start "$POOL_CONTAINER" "$SAMPLES_FILE"
+    phase_begin
+    docker exec -w /workspace "$POOL_CONTAINER" "${COMMAND[@]}" || EXIT_CODE=$?
+    phase_end "command"
+    watcher_stop
+
+    phase_begin
+    pool_release "$POOL_KEY" "$POOL_CONTAINER" "$POOL_USES" "$BOOT_MS"
+    trap - EXIT
+    # Top the pool back up without holding up the caller
+    (pool_fill "$POOL_KEY" "$WORKSPACE_DIR" >/dev/null 2>&1 &)
+    phase_end "teardown"
+
+    POOL_FIELDS=",\"served\":\"${SERVED}\",\"pool_container\":\"${POOL_CONTAINER}\",\"boot_ms\":${BOOT_MS},\"latency_saved_ms\":${LATENCY_SAVED_MS}"
+elif [ "$SANDBOX_WORKSPACE_MODE" = "overlay" ]; then
+    phase_begin
+    overlay_setup "$SANDBOX_NAME" "$WORKSPACE_DIR" || exit 1
+    phase_end "overlay_setup"
+    log_info "  Overlay: ${OVERLAY_UPPER}"
+
+    build_docker_opts "$SANDBOX_NAME" "$WORKSPACE_DIR" "$WORKSPACE_MOUNT"
+    run_container || EXIT_CODE=$?
+
+    phase_begin
+    OVERLAY_FIELDS=",\"overlay\":$(overlay_summary)"
+    overlay_teardown
+    phase_end "overlay_teardown"
+else
+    # Run the container; with SANDBOX_RIGHTSIZE=auto an OOM-killed run is
+    # retried with double the memory until it reaches the ceiling
+    while true; do
+        build_docker_opts "$SANDBOX_NAME" "$WORKSPACE_DIR"
+        run_container || EXIT_CODE=$?
+        sampler_stop
+        oom_check
+
+        [ "$OOM_KILLED" = "true" ] && [ "$SANDBOX_RIGHTSIZE" = "auto" ] || break
+        # Fails quietly (no retry) once the ceiling is reached
+        NEXT_MEMORY=$(rightsize_query "$SIGNATURE" --oom-at "$SANDBOX_MEMORY") || break
+        log_warn "Out of memory at ${SANDBOX_MEMORY}, retrying with ${NEXT_MEMORY}"
+        log_json "oom_retry" "{\"attempt\":${ATTEMPTS},\"memory\":\"${SANDBOX_MEMORY}\",\"next_memory\":\"${NEXT_MEMORY}\",\"exit_code\":${EXIT_CODE}}"
+        if [ -n "$ADMISSION_TICKET" ]; then
+            admission_release
+            phase_begin
+            SANDBOX_MEMORY="$NEXT_MEMORY" admission_admit "$SANDBOX_NAME" || break
+            phase_end "queue"
+        fi
+        SANDBOX_MEMORY="$NEXT_MEMORY"
+        ATTEMPTS=$((ATTEMPTS + 1))
+        EXIT_CODE=0
+        OOM_KILLED="false"
+    done
+    if [ "$ATTEMPTS" -gt 1 ]; then
+        RETRY_FIELDS=",\"attempts\":${ATTEMPTS},\"memory\":\"${SANDBOX_MEMORY}\""
+    fi
+fi
 
-EXIT_CODE=$?
+sampler_stop
+oom_check
+admission_release
 END_TIME=$(date +%s)
 DURATION=$((END_TIME - START_TIME))
+DURATION_MS=$(($(now_ms) - START_MS))
 
 # Log execution completion
-log_json "complete" "{\"exit_code\":${EXIT_CODE},\"duration_seconds\":${DURATION},\"success\":$([ $EXIT_CODE -eq 0 ] && echo \"true\" || echo \"false\")}"
+log_json "complete" "{\"exit_code\":${EXIT_CODE},\"duration_seconds\":${DURATION},\"duration_ms\":${DURATION_MS},\"phases_ms\":{${PHASES_JSON}},\"success\":$([ $EXIT_CODE -eq 0 ] && echo \"true\" || echo \"false\"),\"oom_killed\":${OOM_KILLED}${RETRY_FIELDS}${POOL_FIELDS}${OVERLAY_FIELDS}${RESOURCES_FIELDS}${SAMPLES_FIELDS}${OUTPUT_FIELDS}}"
 
 if [ $EXIT_CODE -eq 0 ]; then
     log_info "Sandbox exited successfully (${DURATION}s)"
@@ -2,26 +2,53 @@
 """CSV Sales Data Processor
 
 Reads sales data and generates a summary report.
+
+Usage:
+    python3 processor.py [csv] [output] [--engine rows|pandas] [--workers N]
+                         [--chunk-size MB] [--incremental [--state FILE]]
+
+The rows engine (default) converts the CSV row by row. The pandas engine
+parses it in chunks across a process pool (see sales_engine.py) and writes
+the same report; use it for large exports. With --incremental, the totals
+are saved with the offset they cover and later runs parse only the rows
+appended since (see sales_state.py).
 """
 
+import argparse
 import csv
+import os
 from collections import defaultdict
-from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
 
+from sales_state import complete_end, decode_totals, load_state, save_state
 
-def process_sales_data(csv_path: str, output_path: str) -> None:
-    """Process sales data and generate summary report.
+ENGINES = ("rows", "pandas")
+DEFAULT_STATE = ".sales-state.json"
+
+
+def aggregate_rows(csv_path: str, start: int = 0, end: Optional[int] = None,
+                   revenue_by_product: Optional[Dict[str, float]] = None,
+                   quantity_by_product: Optional[Dict[str, int]] = None
+                   ) -> Tuple[Dict[str, float], Dict[str, int]]:
+    """Aggregate revenue and quantity per product, one row at a time.
 
     Args:
         csv_path: Path to input CSV file
-        output_path: Path to output summary file
+        start: Byte offset of the first line to read (default: after the header)
+        end: Byte offset to stop at, a line boundary (default: end of file)
+        revenue_by_product: Totals to add to, from earlier lines
+        quantity_by_product: Totals to add to, from earlier lines
+
+    Returns:
+        (revenue_by_product, quantity_by_product), in order of first appearance
     """
-    # Read and process data
-    revenue_by_product = defaultdict(float)
-    quantity_by_product = defaultdict(int)
+    revenue_by_product = defaultdict(float, revenue_by_product or {})
+    quantity_by_product = defaultdict(int, quantity_by_product or {})
 
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
+    with open(csv_path, 'rb') as f:
+        fieldnames = next(csv.reader([f.readline().decode()]), None)
+        f.seek(max(start, f.tell()))
+        reader = csv.DictReader(_lines(f, end), fieldnames=fieldnames)
         for row in reader:
             product = row['product']
             quantity = int(row['quantity'])
@@ -31,6 +58,112 @@ def process_sales_data(csv_path: str, output_path: str) -> None:
             revenue_by_product[product] += revenue
             quantity_by_product[product] += quantity
 
+    return revenue_by_product, quantity_by_product
+
+
+def _lines(f: BinaryIO, end: Optional[int]) -> Iterator[str]:
+    """Yield the lines of a binary file from its position up to byte end."""
+    position = f.tell()
+    for line in f:
+        if end is not None and position >= end:
+            return
+        position += len(line)
+        yield line.decode()
+
+
+def aggregate(csv_path: str, engine: str = "rows", workers: int = 0, chunk_bytes: int = 0,
+              start: int = 0, end: Optional[int] = None,
+              revenue_by_product: Optional[Dict] = None,
+              quantity_by_product: Optional[Dict[str, int]] = None) -> Tuple[Dict, Dict[str, int]]:
+    """Aggregate a byte range of the CSV with an engine, adding to earlier totals.
+
+    Returns:
+        (revenue_by_product, quantity_by_product); the pandas engine's
+        revenue is exact (Fraction)
+    """
+    if engine == "pandas":
+        from sales_engine import DEFAULT_CHUNK_BYTES, aggregate_chunked  # needs pandas
+        return aggregate_chunked(csv_path, workers, chunk_bytes or DEFAULT_CHUNK_BYTES,
+                                 start, end, revenue_by_product, quantity_by_product)
+    return aggregate_rows(csv_path, start, end, revenue_by_product, quantity_by_product)
+
+
+def aggregate_incremental(csv_path: str, state_path: str, engine: str = "rows",
+                          workers: int = 0, chunk_bytes: int = 0
+                          ) -> Tuple[Dict, Dict[str, int], str]:
+    """Aggregate the CSV, parsing only what was appended since the saved state.
+
+    Falls back to a full rebuild if there is no usable state or the file
+    changed before the state's offset, then saves the new state.
+
+    Returns:
+        (revenue_by_product, quantity_by_product, what was done)
+    """
+    state, reason = load_state(state_path, csv_path, engine)
+    end = complete_end(csv_path)
+    if state is None:
+        start, revenue_by_product, quantity_by_product = 0, None, None
+        done = f"Rebuilt from the start: {reason}"
+    else:
+        start = state["offset"]
+        revenue_by_product, quantity_by_product = decode_totals(state)
+        done = f"Resumed at byte {start:,}: parsed {end - start:,} new bytes"
+
+    revenue_by_product, quantity_by_product = aggregate(
+        csv_path, engine, workers, chunk_bytes, start, end,
+        revenue_by_product, quantity_by_product)
+    save_state(state_path, csv_path, engine, max(start, end),
+               revenue_by_product, quantity_by_product)
+
+    # A last line still being written is reported but not saved
+    if end < os.path.getsize(csv_path):
+        revenue_by_product, quantity_by_product = aggregate(
+            csv_path, engine, workers, chunk_bytes, end, None,
+            revenue_by_product, quantity_by_product)
+    return revenue_by_product, quantity_by_product, done
+
+
+def process_sales_data(csv_path: str, output_path: str, engine: str = "rows",
+                       workers: int = 0, chunk_bytes: int = 0,
+                       state_path: Optional[str] = None) -> Optional[str]:
+    """Process sales data and generate summary report.
+
+    Args:
+        csv_path: Path to input CSV file
+        output_path: Path to output summary file
+        engine: "rows" or "pandas"
+        workers: pandas engine worker processes (default: one per CPU)
+        chunk_bytes: pandas engine bytes parsed at a time per worker
+            (default: sales_engine.DEFAULT_CHUNK_BYTES)
+        state_path: Aggregate state file; run incrementally if given
+
+    Returns:
+        What an incremental run did (resumed or rebuilt), else None
+    """
+    done = None
+    if state_path is None:
+        revenue_by_product, quantity_by_product = aggregate(csv_path, engine, workers,
+                                                            chunk_bytes)
+    else:
+        revenue_by_product, quantity_by_product, done = aggregate_incremental(
+            csv_path, state_path, engine, workers, chunk_bytes)
+
+    write_report({product: float(revenue) for product, revenue in revenue_by_product.items()},
+                 quantity_by_product, output_path)
+    return done
+
+
+def write_report(revenue_by_product: Dict[str, float], quantity_by_product: Dict[str, int],
+                 output_path: str) -> None:
+    """Write the summary report.
+
+    Ties are listed in the order of the dictionaries (first appearance).
+
+    Args:
+        revenue_by_product: Revenue per product
+        quantity_by_product: Units sold per product
+        output_path: Path to output summary file
+    """
     # Find best-selling product
     best_seller = max(quantity_by_product.items(), key=lambda x: x[1])
 
@@ -70,9 +203,32 @@ def process_sales_data(csv_path: str, output_path: str) -> None:
         f.write(f"Total Units Sold: {total_quantity:,}\n")
 
 
-if __name__ == "__main__":
-    csv_path = "data/sales.csv"
-    output_path = "summary.txt"
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Generate a sales summary report.")
+    parser.add_argument("csv_path", nargs="?", default="data/sales.csv",
+                        help="Input CSV (default: data/sales.csv)")
+    parser.add_argument("output_path", nargs="?", default="summary.txt",
+                        help="Report to write (default: summary.txt)")
+    parser.add_argument("--engine", choices=ENGINES, default="rows",
+                        help="rows (default) or pandas: chunked, multi-core")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="pandas engine worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=0, metavar="MB",
+                        help="pandas engine chunk size per worker (default: 32)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only parse rows appended since the last incremental run")
+    parser.add_argument("--state", default=DEFAULT_STATE,
+                        help=f"Aggregate state for --incremental (default: {DEFAULT_STATE})")
+    args = parser.parse_args()
+
+    done = process_sales_data(args.csv_path, args.output_path, args.engine, args.workers,
+                              args.chunk_size * 1024 * 1024,
+                              args.state if args.incremental else None)
+    if done:
+        print(done)
+    print(f"✅ Summary report generated: {args.output_path}")
 
-    process_sales_data(csv_path, output_path)
-    print(f"✅ Summary report generated: {output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Precomputed product x day rollup of the sales data, for date-range queries.
+
+`build` reads the CSV once and writes a compact columnar cube: for every
+product, running totals of revenue and units per day since the first sale
+day (prefix sums). Any date range's totals for a product are then the
+difference of two array cells. A query over P products costs O(P), however
+large the CSV and however wide the range, and never reads the CSV.
+
+Usage:
+    python3 sales_cube.py build [csv] [--cube FILE]
+    python3 sales_cube.py query [--cube FILE] [--from DATE] [--to DATE]
+                                [--product NAME ...] [--by day|month|quarter|year]
+                                [--json]
+
+Dates are inclusive YYYY-MM-DD. Revenue is stored in integer units of
+1/10000 when every price is a whole number of them, so totals are exact and
+the full range matches summary.txt; otherwise it falls back to float64.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CUBE = "sales-cube.npz"
+CHUNK_ROWS = 1_000_000
+SCALE = 10_000
+PERIODS = {"day": "D", "month": "M", "quarter": "Q", "year": "Y"}
+
+
+class SalesCube:
+    """Per-product prefix sums of daily revenue and units.
+
+    revenue[p, d] and quantity[p, d] are product p's totals over the days
+    before first_day + d, so row p's totals for days [i, j] are
+    cube[p, j + 1] - cube[p, i].
+    """
+
+    def __init__(self, products: List[str], first_day: np.datetime64,
+                 revenue: np.ndarray, quantity: np.ndarray, scale: int):
+        self.products = products
+        self.first_day = first_day
+        self.revenue = revenue
+        self.quantity = quantity
+        self.scale = scale
+        self._index = {product: index for index, product in enumerate(products)}
+
+    @property
+    def days(self) -> int:
+        """Number of days covered."""
+        return self.quantity.shape[1] - 1
+
+    @property
+    def last_day(self) -> np.datetime64:
+        """Last day covered."""
+        return self.first_day + np.timedelta64(self.days - 1, "D")
+
+    @classmethod
+    def load(cls, path: str) -> "SalesCube":
+        """Read a cube written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["products"].tolist(), data["first_day"][0], data["revenue"],
+                       data["quantity"], int(data["scale"][0]))
+
+    def save(self, path: str) -> None:
+        """Write the cube as a compressed .npz file."""
+        with open(path, "wb") as f:
+            np.savez_compressed(f, products=np.array(self.products, dtype=str),
+                                first_day=np.array([self.first_day]), revenue=self.revenue,
+                                quantity=self.quantity, scale=np.array([self.scale]))
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None,
+              products: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Return revenue, units and best seller for a date range.
+
+        Args:
+            start: First day, YYYY-MM-DD (default: first day with sales)
+            end: Last day, inclusive (default: last day with sales)
+            products: Products to include (default: all); unknown ones sell nothing
+
+        Returns:
+            Dictionary with start, end, revenue_by_product and
+            quantity_by_product (in order of first appearance in the CSV),
+            best_seller [product, units] (None without sales), total_revenue
+            and total_quantity
+        """
+        first = self._day(start, 0)
+        last = self._day(end, self.days - 1)
+        wanted = self.products if products is None else products
+        rows = np.array([self._index[p] for p in wanted if p in self._index], dtype=np.int64)
+
+        lo, hi = max(first, 0), min(last + 1, self.days)
+        if hi > lo:
+            revenue = self.revenue[rows, hi] - self.revenue[rows, lo]
+            quantity = self.quantity[rows, hi] - self.quantity[rows, lo]
+        else:
+            revenue = quantity = np.zeros(len(rows), dtype=np.int64)
+
+        names = [self.products[row] for row in rows]
+        revenue_by_product = {name: value / self.scale
+                              for name, value in zip(names, revenue.tolist())}
+        quantity_by_product = dict(zip(names, quantity.tolist()))
+        sold = {name: units for name, units in quantity_by_product.items() if units}
+        best_seller = list(max(sold.items(), key=lambda x: x[1])) if sold else None
+        return {
+            "start": str(self.first_day + np.timedelta64(first, "D")),
+            "end": str(self.first_day + np.timedelta64(last, "D")),
+            "revenue_by_product": revenue_by_product,
+            "quantity_by_product": quantity_by_product,
+            "best_seller": best_seller,
+            "total_revenue": revenue.sum().item() / self.scale,
+            "total_quantity": int(quantity.sum()),
+        }
+
+    def periods(self, period: str, start: Optional[str] = None, end: Optional[str] = None
+                ) -> List[str]:
+        """Return the first days of the periods ("day", "month", ...) in a range."""
+        first = self.first_day + np.timedelta64(self._day(start, 0), "D")
+        last = self.first_day + np.timedelta64(self._day(end, self.days - 1), "D")
+        if last < first:
+            return []
+        starts = pd.period_range(pd.Timestamp(first), pd.Timestamp(last),
+                                 freq=PERIODS[period]).start_time
+        return [str(day.date()) for day in starts.to_pydatetime()]
+
+    def _day(self, date: Optional[str], default: int) -> int:
+        if date is None:
+            return default
+        return int((np.datetime64(date, "D") - self.first_day).astype(np.int64))
+
+
+def build_cube(csv_path: str, chunk_rows: int = CHUNK_ROWS) -> SalesCube:
+    """Read the CSV once, in chunks, and return its cube.
+
+    Memory is one chunk plus the products x days arrays.
+    """
+    products: List[str] = []
+    index: Dict[str, int] = {}
+    base: Optional[int] = None  # day number of column 0
+    revenue = np.zeros((0, 0), dtype=np.int64)
+    quantity = np.zeros((0, 0), dtype=np.int64)
+
+    reader = pd.read_csv(csv_path, usecols=["date", "product", "quantity", "price"],
+                         na_filter=False, chunksize=chunk_rows,
+                         dtype={"product": str, "quantity": np.int64, "price": np.float64})
+    for frame in reader:
+        if frame.empty:
+            continue
+        for product in pd.unique(frame["product"]):
+            if product not in index:
+                index[product] = len(products)
+                products.append(product)
+
+        day = pd.to_datetime(frame["date"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        # Widen the arrays to the chunk's days and products
+        low, high = int(day.min()), int(day.max()) + 1
+        if base is None:
+            base = low
+        new_base = min(base, low)
+        width = max(high, base + revenue.shape[1]) - new_base
+        if (len(products), width) != revenue.shape:
+            revenue = _grow(revenue, len(products), width, base - new_base)
+            quantity = _grow(quantity, len(products), width, base - new_base)
+            base = new_base
+
+        price = frame["price"].to_numpy()
+        units = np.rint(price * SCALE)
+        if revenue.dtype == np.int64 and not np.array_equal(units / SCALE, price):
+            revenue = revenue / SCALE  # a price finer than 1/SCALE: fall back to float
+        cell = frame["product"].map(index).to_numpy() * revenue.shape[1] + (day - base)
+        sales = frame["quantity"].to_numpy()
+        cells = revenue.size
+        if revenue.dtype == np.int64:
+            revenue += np.bincount(cell, sales * units, cells).astype(np.int64).reshape(
+                revenue.shape)
+        else:
+            revenue += np.bincount(cell, sales * price, cells).reshape(revenue.shape)
+        quantity += np.bincount(cell, sales, cells).astype(np.int64).reshape(quantity.shape)
+
+    if base is None:
+        raise ValueError(f"{csv_path}: no sales rows")
+
+    def prefix(daily: np.ndarray) -> np.ndarray:
+        summed = np.zeros((daily.shape[0], daily.shape[1] + 1), dtype=daily.dtype)
+        np.cumsum(daily, axis=1, out=summed[:, 1:])
+        return summed
+
+    return SalesCube(products, np.datetime64(base, "D"), prefix(revenue), prefix(quantity),
+                     SCALE if revenue.dtype == np.int64 else 1)
+
+
+def _grow(daily: np.ndarray, rows: int, columns: int, shift: int) -> np.ndarray:
+    """Return daily padded to rows x columns, its columns moved right by shift."""
+    grown = np.zeros((rows, columns), dtype=daily.dtype)
+    grown[:daily.shape[0], shift:shift + daily.shape[1]] = daily
+    return grown
+
+
+def check_range(start: Optional[str], end: Optional[str]) -> None:
+    """Raise ValueError unless start and end are valid dates, in order."""
+    days = []
+    for date in (start, end):
+        if date is None:
+            continue
+        try:
+            days.append(np.datetime64(date, "D"))
+        except ValueError:
+            raise ValueError(f"Invalid date {date!r}: expected YYYY-MM-DD")
+    if start is not None and end is not None and days[1] < days[0]:
+        raise ValueError(f"--to {end} is before --from {start}")
+
+
+def print_summary(result: Dict[str, Any]) -> None:
+    """Print a query result like the summary report."""
+    print(f"Sales {result['start']} to {result['end']}")
+    print("-" * 50)
+    for product, revenue in sorted(result["revenue_by_product"].items(),
+                                   key=lambda x: x[1], reverse=True):
+        print(f"{product}: ${revenue:,.2f} ({result['quantity_by_product'][product]:,} units)")
+    if result["best_seller"]:
+        print(f"Best-Selling Product: {result['best_seller'][0]}: "
+              f"{result['best_seller'][1]:,} units")
+    print(f"Total Revenue: ${result['total_revenue']:,.2f}")
+    print(f"Total Units Sold: {result['total_quantity']:,}")
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Build or query the sales rollup cube.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Read the CSV once and write the cube")
+    build.add_argument("csv_path", nargs="?", default="data/sales.csv",
+                       help="Input CSV (default: data/sales.csv)")
+    build.add_argument("--cube", default=DEFAULT_CUBE, help=f"Cube file (default: {DEFAULT_CUBE})")
+    query = commands.add_parser("query", help="Totals for a date range and products")
+    query.add_argument("--cube", default=DEFAULT_CUBE, help=f"Cube file (default: {DEFAULT_CUBE})")
+    query.add_argument("--from", dest="start", help="First day, YYYY-MM-DD (default: first sale)")
+    query.add_argument("--to", dest="end", help="Last day, inclusive (default: last sale)")
+    query.add_argument("--product", action="append", help="Only this product (repeatable)")
+    query.add_argument("--by", choices=PERIODS, help="One result per day, month, quarter or year")
+    query.add_argument("--json", action="store_true", help="Print JSON lines")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            cube = build_cube(args.csv_path)
+            cube.save(args.cube)
+            print(f"✅ Cube written: {args.cube} ({len(cube.products)} products, "
+                  f"{cube.first_day} to {cube.last_day})")
+            return 0
+
+        cube = SalesCube.load(args.cube)
+        check_range(args.start, args.end)
+        if args.by:
+            bounds = cube.periods(args.by, args.start, args.end)
+            ends = [str(np.datetime64(day) - np.timedelta64(1, "D")) for day in bounds[1:]]
+            ranges = [(max(day, args.start or day), end) for day, end
+                      in zip(bounds, ends + [args.end or str(cube.last_day)])]
+        else:
+            ranges = [(args.start, args.end)]
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    for number, (start, end) in enumerate(ranges):
+        result = cube.query(start, end, args.product)
+        if args.json:
+            print(json.dumps(result))
+            continue
+        if number:
+            print()
+        print_summary(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Chunked, multi-core sales aggregation with pandas.
+
+The row engine in processor.py converts every row in Python. This engine
+splits the CSV into byte ranges of about chunk_bytes, each starting at a line
+boundary, and a process pool parses them with pandas' C parser and groups
+them by product with NumPy. Workers return per-product partials, which are
+merged in file order. A worker holds one range at a time, so peak memory
+depends on chunk_bytes and the number of workers, not on the file size.
+
+Revenue is summed in integer cents (or the smallest decimal unit, up to
+MAX_PRICE_DIGITS, that every price in a range is a whole number of) and
+partials are merged as exact fractions, so grouping cannot change a total
+and the report matches the row engine's. Totals are exact, where the row
+engine accumulates float error; the two can only differ when an exact total
+falls on a half cent. Products keep the order of their first
+appearance in the file, which is how the row engine breaks ties.
+
+Ranges are split at newlines, so quoted fields must not contain line breaks
+(sales exports do not).
+"""
+
+import csv
+import io
+import os
+from fractions import Fraction
+from multiprocessing import Pool
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_BYTES = 32 * 1024 * 1024
+COLUMNS = ["product", "quantity", "price"]
+# Finer units could overflow int64 sums within a chunk
+MAX_PRICE_DIGITS = 4
+
+# product -> [first appearance (range start, rank), revenue, quantity]
+Partial = Dict[str, list]
+
+
+def split_ranges(csv_path: str, chunk_bytes: int, start: int = 0, end: Optional[int] = None
+                 ) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Return the header's column names and the byte ranges of the data.
+
+    Each range ends at a line boundary, about chunk_bytes after it starts.
+    start and end, if given, must be line boundaries.
+    """
+    size = os.path.getsize(csv_path) if end is None else end
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        columns = next(csv.reader([header.decode()]))
+        missing = [column for column in COLUMNS if column not in columns]
+        if missing:
+            raise ValueError(f"{csv_path}: missing columns {', '.join(missing)}")
+
+        starts = [max(start, len(header))]
+        while starts[-1] + chunk_bytes < size:
+            f.seek(starts[-1] + chunk_bytes)
+            f.readline()
+            if f.tell() >= size:
+                break
+            starts.append(f.tell())
+    return columns, list(zip(starts, starts[1:] + [size]))
+
+
+def aggregate_range(csv_path: str, columns: List[str], start: int, end: int) -> Partial:
+    """Aggregate the rows in one byte range of the CSV."""
+    if start >= end:
+        return {}
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    frame = pd.read_csv(io.BytesIO(data), header=None, names=columns, usecols=COLUMNS,
+                        na_filter=False, dtype={"product": "category", "quantity": np.int64,
+                               "price": np.float64})
+
+    price = frame["price"].to_numpy()
+    units, scale = price, 1
+    for digits in range(2, MAX_PRICE_DIGITS + 1):
+        scaled = np.rint(price * 10 ** digits)
+        if np.array_equal(scaled / 10 ** digits, price):
+            units, scale = scaled.astype(np.int64), 10 ** digits
+            break
+    frame["revenue"] = frame["quantity"].to_numpy() * units
+
+    # sort=False keeps the groups in order of first appearance
+    totals = frame.groupby("product", sort=False, observed=True)[["revenue", "quantity"]].sum()
+    return {product: [(start, rank), Fraction(revenue) / scale, quantity]
+            for rank, (product, revenue, quantity) in enumerate(zip(
+                totals.index.tolist(), totals["revenue"].tolist(),
+                totals["quantity"].tolist()))}
+
+
+def _aggregate_task(task: Tuple[str, List[str], int, int]) -> Partial:
+    return aggregate_range(*task)
+
+
+def aggregate_chunked(csv_path: str, workers: int = 0,
+                      chunk_bytes: int = DEFAULT_CHUNK_BYTES, start: int = 0,
+                      end: Optional[int] = None,
+                      revenue_by_product: Optional[Dict[str, Fraction]] = None,
+                      quantity_by_product: Optional[Dict[str, int]] = None
+                      ) -> Tuple[Dict[str, Fraction], Dict[str, int]]:
+    """Aggregate revenue and quantity per product.
+
+    Args:
+        csv_path: Path to input CSV file
+        workers: Worker processes (default: one per CPU; 1 parses in this process)
+        chunk_bytes: Approximate bytes parsed at a time per worker
+        start: Byte offset of the first line to read (default: after the header)
+        end: Byte offset to stop at (default: end of file)
+        revenue_by_product: Totals to add to, from earlier lines
+        quantity_by_product: Totals to add to, from earlier lines
+
+    Returns:
+        (revenue_by_product, quantity_by_product), in order of first
+        appearance. Revenue is exact; convert it with float() to report it.
+    """
+    columns, ranges = split_ranges(csv_path, chunk_bytes, start, end)
+    tasks = [(csv_path, columns, start, end) for start, end in ranges]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    # Earlier totals come first, in their order
+    merged: Partial = {product: [(-1, rank), Fraction(revenue), quantity_by_product[product]]
+                       for rank, (product, revenue)
+                       in enumerate((revenue_by_product or {}).items())}
+    if workers <= 1:
+        _merge(merged, map(_aggregate_task, tasks))
+    else:
+        with Pool(workers) as pool:
+            _merge(merged, pool.imap(_aggregate_task, tasks))
+
+    products = sorted(merged, key=lambda product: merged[product][0])
+    revenue_by_product = {product: merged[product][1] for product in products}
+    quantity_by_product = {product: merged[product][2] for product in products}
+    return revenue_by_product, quantity_by_product
+
+
+def _merge(merged: Partial, partials: Iterable[Partial]) -> None:
+    for partial in partials:
+        for product, (first, revenue, quantity) in partial.items():
+            total = merged.setdefault(product, [first, Fraction(0), 0])
+            total[1] += revenue
+            total[2] += quantity
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Aggregate state for incremental runs over an append-only sales CSV.
+
+processor.py --incremental keeps its per-product totals in a state file with
+the byte offset they cover and a fingerprint of the file up to that offset.
+The next run checks the fingerprint. If the prefix is unchanged, it parses
+only the lines appended since; otherwise it rebuilds from the start.
+
+The fingerprint hashes the prefix length and 64KB blocks at its start, its
+end and 14 points in between, so checking it costs the same for any file
+size. An edit or truncation that touches the header, the last rows or a
+sampled block triggers a rebuild; run without --incremental after rewriting
+the middle of the file in place.
+
+Only complete lines are recorded: a last line without its newline (a writer
+mid-append) is counted in the report, but parsed again on the next run.
+"""
+
+import hashlib
+import json
+import os
+from fractions import Fraction
+from typing import Any, Dict, Optional, Tuple, Union
+
+STATE_VERSION = 1
+BLOCK = 64 * 1024
+SAMPLES = 16
+
+Revenue = Union[float, Fraction]
+
+
+def complete_end(csv_path: str) -> int:
+    """Return the byte offset just after the file's last newline (0 if none)."""
+    with open(csv_path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - BLOCK)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+def prefix_fingerprint(csv_path: str, length: int) -> str:
+    """Return a fingerprint of the file's first length bytes."""
+    digest = hashlib.sha256(str(length).encode())
+    last = max(0, length - BLOCK)
+    offsets = sorted({last * index // (SAMPLES - 1) for index in range(SAMPLES)})
+    with open(csv_path, 'rb') as f:
+        for offset in offsets:
+            f.seek(offset)
+            digest.update(f.read(min(BLOCK, length - offset)))
+    return digest.hexdigest()
+
+
+def load_state(state_path: str, csv_path: str, engine: str
+               ) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Return the saved state if it still covers a prefix of the file.
+
+    Returns:
+        (state or None, reason): reason says why the state was not usable
+    """
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None, "no state"
+    except (OSError, ValueError) as e:
+        return None, f"unreadable state ({e})"
+
+    if state.get("version") != STATE_VERSION or state.get("engine") != engine:
+        return None, "state from another version or engine"
+    if state["offset"] > os.path.getsize(csv_path):
+        return None, "file is shorter than the state"
+    if prefix_fingerprint(csv_path, state["offset"]) != state["fingerprint"]:
+        return None, "file changed before the state's offset"
+    return state, ""
+
+
+def decode_totals(state: Dict[str, Any]) -> Tuple[Dict[str, Revenue], Dict[str, int]]:
+    """Return the state's (revenue_by_product, quantity_by_product)."""
+    revenue_by_product = {}
+    quantity_by_product = {}
+    for product, totals in state["products"].items():
+        revenue = totals["revenue"]
+        revenue_by_product[product] = Fraction(revenue) if isinstance(revenue, str) else revenue
+        quantity_by_product[product] = totals["quantity"]
+    return revenue_by_product, quantity_by_product
+
+
+def save_state(state_path: str, csv_path: str, engine: str, offset: int,
+               revenue_by_product: Dict[str, Revenue],
+               quantity_by_product: Dict[str, int]) -> Dict[str, Any]:
+    """Write the totals covering the file's first offset bytes; return the state.
+
+    Exact (Fraction) revenue is stored as "numerator/denominator". The file
+    is replaced atomically, so an interrupted run leaves the previous state.
+    """
+    best_seller = max(quantity_by_product.items(), key=lambda x: x[1], default=(None, 0))
+    state = {
+        "version": STATE_VERSION,
+        "engine": engine,
+        "offset": offset,
+        "fingerprint": prefix_fingerprint(csv_path, offset),
+        "products": {product: {"revenue": str(revenue) if isinstance(revenue, Fraction)
+                               else revenue,
+                               "quantity": quantity_by_product[product]}
+                     for product, revenue in revenue_by_product.items()},
+        "best_seller": {"product": best_seller[0], "quantity": best_seller[1]},
+        "total_revenue": float(sum(revenue_by_product.values())),
+        "total_quantity": sum(quantity_by_product.values()),
+    }
+    with open(f"{state_path}.tmp", 'w') as f:
+        json.dump(state, f, indent=2)
+        f.write("\n")
+    os.replace(f"{state_path}.tmp", state_path)
+    return state
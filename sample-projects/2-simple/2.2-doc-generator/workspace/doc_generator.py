@@ -2,19 +2,53 @@
 """Documentation Generator
 
 Extracts docstrings from Python files and generates Markdown documentation.
+
+Usage:
+    python3 doc_generator.py [--src DIR] [--docs DIR] [--recursive]
+                             [--workers N] [--cache [FILE]] [--index [FILE]]
+
+By default every .py file directly in src/ is documented in docs/. For large
+trees, --recursive documents the whole tree (docs/ mirrors its layout),
+--workers parses files in a process pool and --cache keeps each file's
+extracted symbols keyed by a hash of its content: files unchanged since
+the last run are neither parsed nor rendered again. --index also writes the
+symbols to a SQLite index that symbol_index.py searches.
 """
 
+import argparse
 import ast
-import inspect
+import hashlib
+import json
+import os
+import time
+from multiprocessing import Pool
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+from symbol_index import DEFAULT_INDEX, SymbolIndex, dotted_module
+
+DEFAULT_CACHE = ".doc-cache.json"
+# Bump when the extracted information or the Markdown changes
+CACHE_VERSION = 2
 
+FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
 
-def extract_function_info(node: ast.FunctionDef) -> Dict[str, Any]:
+
+def format_arg(name: str, default: Optional[ast.expr]) -> str:
+    """Format an argument, with its default value if it is a literal."""
+    if default is None:
+        return name
+    try:
+        return f"{name}={repr(ast.literal_eval(default))}"
+    except Exception:
+        return f"{name}=..."
+
+
+def extract_function_info(node: FunctionNode) -> Dict[str, Any]:
     """Extract information from a function definition node.
 
     Args:
-        node: AST FunctionDef node
+        node: AST FunctionDef or AsyncFunctionDef node
 
     Returns:
         Dictionary with function information
@@ -23,20 +57,21 @@ def extract_function_info(node: ast.FunctionDef) -> Dict[str, Any]:
     docstring = ast.get_docstring(node) or "No documentation available."
 
     # Get function signature
-    args = []
-    for arg in node.args.args:
-        arg_name = arg.arg
-        # Check for default values
-        default_idx = len(node.args.args) - len(node.args.defaults)
-        if node.args.args.index(arg) >= default_idx:
-            default_val = node.args.defaults[node.args.args.index(arg) - default_idx]
-            try:
-                default_str = ast.literal_eval(default_val)
-                args.append(f"{arg_name}={repr(default_str)}")
-            except:
-                args.append(f"{arg_name}=...")
-        else:
-            args.append(arg_name)
+    arguments = node.args
+    positional = arguments.posonlyargs + arguments.args
+    # Defaults belong to the last len(defaults) positional arguments
+    defaults = [None] * (len(positional) - len(arguments.defaults)) + arguments.defaults
+    args = [format_arg(arg.arg, default) for arg, default in zip(positional, defaults)]
+    if arguments.posonlyargs:
+        args.insert(len(arguments.posonlyargs), "/")
+    if arguments.vararg:
+        args.append(f"*{arguments.vararg.arg}")
+    elif arguments.kwonlyargs:
+        args.append("*")
+    args += [format_arg(arg.arg, default)
+             for arg, default in zip(arguments.kwonlyargs, arguments.kw_defaults)]
+    if arguments.kwarg:
+        args.append(f"**{arguments.kwarg.arg}")
 
     signature = f"{node.name}({', '.join(args)})"
 
@@ -44,29 +79,99 @@ def extract_function_info(node: ast.FunctionDef) -> Dict[str, Any]:
         'name': node.name,
         'signature': signature,
         'docstring': docstring,
+        'async': isinstance(node, ast.AsyncFunctionDef),
     }
 
 
+def extract_class_info(node: ast.ClassDef) -> Dict[str, Any]:
+    """Extract information from a class definition node.
+
+    Args:
+        node: AST ClassDef node
+
+    Returns:
+        Dictionary with class information; the signature lists the bases
+    """
+    bases = [ast.unparse(base) for base in node.bases + node.keywords]
+    return {
+        'name': node.name,
+        'signature': f"{node.name}({', '.join(bases)})" if bases else node.name,
+        'docstring': ast.get_docstring(node) or "No documentation available.",
+        'async': False,
+    }
+
+
+class SymbolVisitor(ast.NodeVisitor):
+    """Collect classes, functions, methods and async functions in one pass.
+
+    Symbols are listed in source order. Each has the information of
+    extract_function_info or extract_class_info, plus its kind ("class",
+    "function" or "method"), its line, the first line of its docstring
+    ("summary") and its qualified name as in __qualname__: "Class.method",
+    "outer.<locals>.inner".
+    """
+
+    def __init__(self):
+        self.symbols: List[Dict[str, Any]] = []
+        self._scopes: List[Tuple[str, str]] = []  # (qualname, kind) of enclosing definitions
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._add(node, "class", extract_class_info(node))
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._add_function(node)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        self._add_function(node)
+
+    def _add_function(self, node: FunctionNode) -> None:
+        in_class = bool(self._scopes) and self._scopes[-1][1] == "class"
+        self._add(node, "method" if in_class else "function", extract_function_info(node))
+
+    def _add(self, node: Union[ast.ClassDef, FunctionNode], kind: str,
+             info: Dict[str, Any]) -> None:
+        if not self._scopes:
+            qualname = node.name
+        else:
+            parent, parent_kind = self._scopes[-1]
+            locals_ = "" if parent_kind == "class" else ".<locals>"
+            qualname = f"{parent}{locals_}.{node.name}"
+        docstring = ast.get_docstring(node)
+        self.symbols.append({**info, 'qualname': qualname, 'kind': kind, 'line': node.lineno,
+                             'summary': docstring.splitlines()[0] if docstring else ""})
+
+        self._scopes.append((qualname, kind))
+        self.generic_visit(node)
+        self._scopes.pop()
+
+
 def parse_python_file(filepath: Path) -> List[Dict[str, Any]]:
-    """Parse a Python file and extract function documentation.
+    """Parse a Python file and extract its symbols' documentation.
 
     Args:
         filepath: Path to Python file
 
     Returns:
-        List of function information dictionaries
+        List of symbol information dictionaries (see SymbolVisitor)
     """
     with open(filepath, 'r') as f:
         content = f.read()
 
-    tree = ast.parse(content)
-    functions = []
+    return parse_python_source(content)
 
-    for node in ast.walk(tree):
-        if isinstance(node, ast.FunctionDef):
-            functions.append(extract_function_info(node))
 
-    return functions
+def parse_python_source(content: str) -> List[Dict[str, Any]]:
+    """Extract the documentation of classes and functions from Python source code.
+
+    Args:
+        content: Python source code
+
+    Returns:
+        List of symbol information dictionaries (see SymbolVisitor)
+    """
+    visitor = SymbolVisitor()
+    visitor.visit(ast.parse(content))
+    return visitor.symbols
 
 
 def generate_markdown(module_name: str, functions: List[Dict[str, Any]]) -> str:
@@ -74,7 +179,7 @@ def generate_markdown(module_name: str, functions: List[Dict[str, Any]]) -> str:
 
     Args:
         module_name: Name of the module
-        functions: List of function information
+        functions: List of symbol information; functions and methods are listed
 
     Returns:
         Markdown-formatted documentation string
@@ -89,7 +194,10 @@ def generate_markdown(module_name: str, functions: List[Dict[str, Any]]) -> str:
     ]
 
     for func in functions:
-        lines.append(f"### `{func['signature']}`")
+        if func.get('kind') == "class":
+            continue
+        prefix = "async " if func.get('async') else ""
+        lines.append(f"### `{prefix}{func['signature']}`")
         lines.append("")
         lines.append(func['docstring'])
         lines.append("")
@@ -99,19 +207,168 @@ def generate_markdown(module_name: str, functions: List[Dict[str, Any]]) -> str:
     return "\n".join(lines)
 
 
+def document_file(task: Tuple[str, str, str]) -> Tuple[str, str, Optional[List[Dict[str, Any]]], str]:
+    """Parse one source file and write its Markdown (runs in a pool worker).
+
+    Args:
+        task: (source path, module name, doc path)
+
+    Returns:
+        (source path, content hash, symbols or None, error message)
+    """
+    src_path, module_name, doc_path = task
+    try:
+        content = Path(src_path).read_bytes()
+        symbols = parse_python_source(content.decode())
+    except (OSError, SyntaxError, UnicodeDecodeError, ValueError, RecursionError) as e:
+        return src_path, "", None, str(e)
+
+    doc_file = Path(doc_path)
+    doc_file.parent.mkdir(parents=True, exist_ok=True)
+    doc_file.write_text(generate_markdown(module_name, symbols))
+    return src_path, hashlib.sha256(content).hexdigest(), symbols, ""
+
+
+def load_cache(cache_path: Path) -> Dict[str, Dict[str, Any]]:
+    """Return the cached entries by source path ({} if missing or outdated)."""
+    try:
+        cache = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return cache.get("files", {}) if cache.get("version") == CACHE_VERSION else {}
+
+
+def save_cache(cache_path: Path, entries: Dict[str, Dict[str, Any]]) -> None:
+    """Write the cache atomically."""
+    tmp = cache_path.with_name(cache_path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": entries}))
+    os.replace(tmp, cache_path)
+
+
+def file_hash(path: Path, stat: os.stat_result, entry: Optional[Dict[str, Any]]) -> str:
+    """Return the content hash of a file, trusting the cache while size and mtime match."""
+    if entry and (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+        return entry["sha256"]
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def generate_docs(src_dir: Path, docs_dir: Path, recursive: bool = False, workers: int = 1,
+                  cache_path: Optional[Path] = None,
+                  index_path: Optional[Path] = None) -> Dict[str, int]:
+    """Document every Python file in src_dir, reusing cached results.
+
+    Args:
+        src_dir: Source directory
+        docs_dir: Output directory; with recursive it mirrors src_dir's layout
+        recursive: Include subdirectories
+        workers: Parser processes (0: one per CPU; 1: parse in this process)
+        cache_path: Cache of extracted symbols by content hash (default: none)
+        index_path: Symbol index to bring up to date (default: none)
+
+    Returns:
+        Counts of files parsed, cached (skipped), failed and (re)indexed
+    """
+    py_files = sorted(src_dir.rglob("*.py") if recursive else src_dir.glob("*.py"))
+    cached_entries = load_cache(cache_path) if cache_path else {}
+    entries: Dict[str, Dict[str, Any]] = {}
+    stats: Dict[str, os.stat_result] = {}
+    tasks = []
+
+    for py_file in py_files:
+        module_name = py_file.relative_to(src_dir).with_suffix("").as_posix()
+        doc_file = docs_dir / f"{module_name}.md"
+        key = str(py_file)
+        stats[key] = py_file.stat()
+        entry = cached_entries.get(key)
+        if entry and entry["doc"] == str(doc_file) and doc_file.exists() \
+                and file_hash(py_file, stats[key], entry) == entry["sha256"]:
+            entries[key] = {**entry, "size": stats[key].st_size,
+                            "mtime_ns": stats[key].st_mtime_ns}
+            continue
+        tasks.append((key, module_name, str(doc_file)))
+
+    counts = {"files": len(py_files), "parsed": 0, "cached": len(entries), "failed": 0,
+              "indexed": 0}
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        with Pool(workers) as pool:
+            results = list(pool.imap_unordered(document_file, tasks, chunksize=16))
+    else:
+        results = [document_file(task) for task in tasks]
+
+    for key, digest, symbols, error in results:
+        if symbols is None:
+            print(f"  ⚠️  Skipped {key}: {error}")
+            counts["failed"] += 1
+            continue
+        counts["parsed"] += 1
+        module_name = Path(key).relative_to(src_dir).with_suffix("").as_posix()
+        entries[key] = {"sha256": digest, "size": stats[key].st_size,
+                        "mtime_ns": stats[key].st_mtime_ns,
+                        "doc": str(docs_dir / f"{module_name}.md"), "symbols": symbols}
+
+    if cache_path:
+        # Docs of deleted source files go with them
+        current_docs = {entry["doc"] for entry in entries.values()}
+        for key, entry in cached_entries.items():
+            if key not in stats and entry["doc"] not in current_docs:
+                Path(entry["doc"]).unlink(missing_ok=True)
+        if entries != cached_entries:
+            save_cache(cache_path, entries)
+
+    if index_path:
+        # Files that no longer parse are dropped with the deleted ones
+        with SymbolIndex(index_path) as index:
+            counts["indexed"] = index.update(
+                ({"path": key, "module": dotted_module(Path(key).relative_to(src_dir)),
+                  "sha256": entry["sha256"], "symbols": entry["symbols"]}
+                 for key, entry in entries.items()), keep=entries)
+    return counts
+
+
 def main():
     """Main entry point for documentation generator."""
-    src_dir = Path("src")
-    docs_dir = Path("docs")
+    parser = argparse.ArgumentParser(description="Generate Markdown docs from docstrings.")
+    parser.add_argument("--src", type=Path, default=Path("src"),
+                        help="Source directory (default: src)")
+    parser.add_argument("--docs", type=Path, default=Path("docs"),
+                        help="Output directory (default: docs)")
+    parser.add_argument("--recursive", action="store_true",
+                        help="Document the whole tree under --src")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parser processes (default: 1; 0: one per CPU)")
+    parser.add_argument("--cache", type=Path, nargs="?", const=Path(DEFAULT_CACHE),
+                        help=f"Skip files unchanged since the last run (default file: "
+                             f"{DEFAULT_CACHE})")
+    parser.add_argument("--index", type=Path, nargs="?", const=DEFAULT_INDEX,
+                        help=f"Update the symbol index searched by symbol_index.py "
+                             f"(default file: {DEFAULT_INDEX})")
+    args = parser.parse_args()
+    src_dir = args.src
+    docs_dir = args.docs
 
     # Create docs directory
     docs_dir.mkdir(exist_ok=True)
 
+    if args.recursive or args.workers != 1 or args.cache or args.index:
+        start = time.monotonic()
+        counts = generate_docs(src_dir, docs_dir, args.recursive, args.workers, args.cache,
+                               args.index)
+        if not counts["files"]:
+            print(f"❌ No Python files found in {src_dir}/")
+            return
+        print(f"\n✅ Documentation generated in {docs_dir}/: {counts['files']} files, "
+              f"{counts['parsed']} parsed, {counts['cached']} unchanged, "
+              f"{counts['failed']} failed ({time.monotonic() - start:.1f}s)")
+        if args.index:
+            print(f"✅ Symbol index {args.index}: {counts['indexed']} files updated")
+        return
+
     # Process each Python file
     py_files = list(src_dir.glob("*.py"))
 
     if not py_files:
-        print("❌ No Python files found in src/")
+        print(f"❌ No Python files found in {src_dir}/")
         return
 
     for py_file in py_files:
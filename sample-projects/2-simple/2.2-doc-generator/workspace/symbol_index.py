@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Persistent symbol index over the sources doc_generator.py documents.
+
+`doc_generator.py --index` writes every class, function, method and async
+function it extracts into a SQLite file (default .symbol-index.sqlite):
+name, module, qualified name, kind, signature, line and the first line of
+the docstring. Files are keyed by content hash, so a rebuild only rewrites
+the rows of changed files.
+
+Lookups never touch the sources:
+
+- Prefix: symbols whose name (or, for a dotted query, qualified name)
+  starts with the query, case-insensitively, through a B-tree index.
+- Full text: an FTS5 index over name, qualified name, module, signature and
+  summary. Queries use FTS5 syntax ("parse file", "pars*", "tax OR rate").
+
+Usage:
+    python3 symbol_index.py find PREFIX [--kind KIND] [--limit N] [--json] [--index FILE]
+    python3 symbol_index.py search TEXT [--kind KIND] [--limit N] [--json] [--index FILE]
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_INDEX = Path(".symbol-index.sqlite")
+SCHEMA_VERSION = 1
+KINDS = ("class", "function", "method")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    module TEXT NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    module TEXT NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    qualname TEXT NOT NULL COLLATE NOCASE,
+    kind TEXT NOT NULL,
+    is_async INTEGER NOT NULL,
+    signature TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_qualname ON symbols (qualname);
+CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path);
+CREATE VIRTUAL TABLE IF NOT EXISTS symbols_fts USING fts5 (
+    name, qualname, module, signature, summary
+);
+"""
+
+COLUMNS = "path, module, name, qualname, kind, is_async, signature, line, summary"
+# Sorts below any other character NOCASE compares, to close a prefix range
+PREFIX_END = "\U0010ffff"
+
+
+def dotted_module(relative: Path) -> str:
+    """Return the dotted module of a source path relative to the tree root."""
+    parts = relative.with_suffix("").parts
+    if parts and parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+class SymbolIndex:
+    """SQLite index of the symbols in a source tree."""
+
+    def __init__(self, path: Path = DEFAULT_INDEX):
+        self.path = path
+        self.db = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        row = None
+        try:
+            row = self.db.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        except sqlite3.OperationalError:
+            pass  # no meta table yet
+        if row is not None and row[0] != str(SCHEMA_VERSION):
+            # The index is only a cache of the sources: start over
+            self.db.executescript("DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS files; "
+                                  "DROP TABLE IF EXISTS symbols; "
+                                  "DROP TABLE IF EXISTS symbols_fts;")
+        self.db.executescript(SCHEMA)
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                        (str(SCHEMA_VERSION),))
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "SymbolIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # -- Updates -------------------------------------------------------------
+
+    def hashes(self) -> Dict[str, str]:
+        """Return the content hash of every indexed file by path."""
+        return {row["path"]: row["sha256"] for row in self.db.execute(
+            "SELECT path, sha256 FROM files")}
+
+    def update(self, files: Iterable[Dict[str, Any]], keep: Iterable[str]) -> int:
+        """Replace the symbols of changed files and drop files no longer present.
+
+        Args:
+            files: {"path", "module", "sha256", "symbols"} per file; files
+                whose hash is already indexed are skipped
+            keep: Every path still in the tree
+
+        Returns:
+            Number of files (re)indexed
+        """
+        indexed = self.hashes()
+        keep = set(keep)
+        changed = 0
+        self.db.execute("BEGIN")
+        try:
+            for path in indexed.keys() - keep:
+                self._remove(path)
+            for entry in files:
+                if indexed.get(entry["path"]) == entry["sha256"]:
+                    continue
+                self._remove(entry["path"])
+                self.db.execute("INSERT INTO files (path, module, sha256) VALUES (?, ?, ?)",
+                                (entry["path"], entry["module"], entry["sha256"]))
+                for symbol in entry["symbols"]:
+                    cursor = self.db.execute(
+                        f"INSERT INTO symbols ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (entry["path"], entry["module"], symbol["name"], symbol["qualname"],
+                         symbol["kind"], int(symbol["async"]), symbol["signature"],
+                         symbol["line"], symbol["summary"]))
+                    self.db.execute(
+                        "INSERT INTO symbols_fts (rowid, name, qualname, module, signature, "
+                        "summary) VALUES (?, ?, ?, ?, ?, ?)",
+                        (cursor.lastrowid, symbol["name"], symbol["qualname"], entry["module"],
+                         symbol["signature"], symbol["summary"]))
+                changed += 1
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return changed
+
+    def _remove(self, path: str) -> None:
+        self.db.execute("DELETE FROM symbols_fts WHERE rowid IN "
+                        "(SELECT id FROM symbols WHERE path = ?)", (path,))
+        self.db.execute("DELETE FROM symbols WHERE path = ?", (path,))
+        self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    # -- Lookups -------------------------------------------------------------
+
+    def find(self, prefix: str, kind: Optional[str] = None, limit: int = 20
+             ) -> List[sqlite3.Row]:
+        """Return symbols whose name starts with prefix (case-insensitive).
+
+        A dotted prefix ("Parser.par") matches qualified names instead.
+        Exact matches come first, then shorter names.
+        """
+        column = "qualname" if "." in prefix else "name"
+        sql = (f"SELECT {COLUMNS} FROM symbols WHERE {column} >= ? AND {column} < ?"
+               + (" AND kind = ?" if kind else "")
+               + f" ORDER BY {column} != ?, length({column}), {column}, module LIMIT ?")
+        params = [prefix, prefix + PREFIX_END, *([kind] if kind else []), prefix, limit]
+        return self.db.execute(sql, params).fetchall()
+
+    def search(self, text: str, kind: Optional[str] = None, limit: int = 20
+               ) -> List[sqlite3.Row]:
+        """Return the symbols best matching an FTS5 query, most relevant first.
+
+        Raises:
+            ValueError: If the query is not valid FTS5 syntax
+        """
+        sql = (f"SELECT {', '.join('s.' + c for c in COLUMNS.split(', '))} "
+               "FROM symbols_fts JOIN symbols s ON s.id = symbols_fts.rowid "
+               "WHERE symbols_fts MATCH ?" + (" AND s.kind = ?" if kind else "")
+               + " ORDER BY bm25(symbols_fts, 10.0, 5.0, 2.0, 1.0, 1.0) LIMIT ?")
+        try:
+            return self.db.execute(sql, [text, *([kind] if kind else []), limit]).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search {text!r}: {e}")
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of indexed files and symbols."""
+        return {"files": self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+                "symbols": self.db.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]}
+
+
+def format_symbol(row: sqlite3.Row) -> str:
+    """Format a lookup result: definition, location and docstring summary."""
+    keyword = "class" if row["kind"] == "class" else "async def" if row["is_async"] else "def"
+    # The qualified name's enclosing scopes, before the signature's name
+    scope = row["qualname"][:-len(row["name"])]
+    module = f"{row['module']}." if row["module"] else ""
+    lines = [f"{keyword} {module}{scope}{row['signature']}",
+             f"    {row['path']}:{row['line']}"]
+    if row["summary"]:
+        lines.append(f"    {row['summary']}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Look up symbols indexed by doc_generator.py.")
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX,
+                        help=f"Index file (default: {DEFAULT_INDEX})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (("find", "Symbols whose name starts with PREFIX"),
+                               ("search", "Full-text search (FTS5 syntax)")):
+        sub = commands.add_parser(command, help=help_text)
+        sub.add_argument("query")
+        sub.add_argument("--kind", choices=KINDS, help="Only classes, functions or methods")
+        sub.add_argument("--limit", type=int, default=20, help="Results (default: 20)")
+        sub.add_argument("--json", action="store_true", help="Print JSON lines")
+    args = parser.parse_args()
+
+    if not args.index.exists():
+        print(f"❌ No index at {args.index}; build it with: "
+              f"python3 doc_generator.py --recursive --index", file=sys.stderr)
+        return 1
+
+    with SymbolIndex(args.index) as index:
+        try:
+            rows = (index.find if args.command == "find" else index.search)(
+                args.query, args.kind, args.limit)
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+
+    for row in rows:
+        print(json.dumps(dict(row)) if args.json else format_symbol(row))
+    if not rows and not args.json:
+        print(f"No symbols match {args.query!r}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,17 @@
 #!/bin/bash
 # Run all sample project tests
+#
+# Usage:
+#   ./run-all-tests.sh              Run projects one after another
+#   ./run-all-tests.sh --parallel   Run projects concurrently (see run_all_tests.py)
 
 set -euo pipefail
 
+if [ "${1:-}" = "--parallel" ]; then
+    shift
+    exec python3 "$(dirname "${BASH_SOURCE[0]}")/run_all_tests.py" "$@"
+fi
+
 echo "========================================"
 echo "Claude Sandbox - Sample Project Tests"
 echo "========================================"
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""Parallel Sample Project Test Runner
+
+Runs every project's test.sh concurrently, scheduling them across the host
+within a global CPU/memory budget. Each project reserves the limits declared
+in its README ("Resource Limits" section), which are also passed to the
+sandbox as SANDBOX_MEMORY/SANDBOX_CPUS. Timeouts are enforced by the runner.
+
+Writes per-project wall time to a JSON report and a JUnit XML report.
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parent
+LEVELS = ["1-trivial", "2-simple", "3-moderate", "4-complex"]
+
+# Used when a README does not declare a limit
+DEFAULT_MEMORY_MB = 1024
+DEFAULT_CPUS = 1
+DEFAULT_TIMEOUT_S = 300
+
+POLL_INTERVAL_S = 0.05
+
+
+@dataclass
+class Project:
+    """A sample project and the resources it reserves while running."""
+
+    name: str
+    path: Path
+    memory_mb: int = DEFAULT_MEMORY_MB
+    cpus: int = DEFAULT_CPUS
+    network: str = "none"
+    timeout_s: float = DEFAULT_TIMEOUT_S
+
+    # Filled in by the scheduler
+    status: str = "pending"
+    exit_code: Optional[int] = None
+    started: float = 0.0
+    wall_time_s: float = 0.0
+    output: str = ""
+    process: Optional[subprocess.Popen] = field(default=None, repr=False)
+    log_path: Optional[Path] = field(default=None, repr=False)
+
+
+def parse_size_mb(value: str) -> int:
+    """Parse a size such as '512MB', '1GB' or '4g' into megabytes.
+
+    Args:
+        value: Size string
+
+    Returns:
+        Size in megabytes
+    """
+    match = re.fullmatch(r'\s*([\d.]+)\s*([kmgt]?)b?\s*', value, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+
+    number = float(match.group(1))
+    unit = match.group(2).lower()
+    scale = {'k': 1 / 1024, '': 1, 'm': 1, 'g': 1024, 't': 1024 * 1024}[unit]
+    return max(1, int(number * scale))
+
+
+def parse_resource_limits(readme: Path, project: Project) -> None:
+    """Fill in a project's limits from the Resource Limits section of its README.
+
+    Handles both the bulleted ("- Memory: 512MB") and the single-line
+    ("Memory: 1GB, CPU: 4 cores, ...") forms used in this repo.
+
+    Args:
+        readme: Path to README.md
+        project: Project to update
+    """
+    if not readme.exists():
+        return
+
+    text = readme.read_text()
+    section = re.search(r'## Resource Limits\s*\n(.*?)(?:\n## |\Z)', text, re.DOTALL)
+    if not section:
+        return
+    limits = section.group(1)
+
+    memory = re.search(r'Memory:\s*([\d.]+\s*[KMGT]?B?)', limits, re.IGNORECASE)
+    if memory:
+        project.memory_mb = parse_size_mb(memory.group(1))
+
+    cpu = re.search(r'CPU:\s*(\d+)', limits, re.IGNORECASE)
+    if cpu:
+        project.cpus = int(cpu.group(1))
+
+    network = re.search(r'Network:\s*([^,\n]+)', limits, re.IGNORECASE)
+    if network:
+        project.network = network.group(1).strip()
+
+    timeout = re.search(r'Timeout:\s*([\d.]+)\s*(s|sec|second|min|minute|h|hour)',
+                        limits, re.IGNORECASE)
+    if timeout:
+        unit = timeout.group(2).lower()
+        scale = 1 if unit.startswith('s') else 3600 if unit.startswith('h') else 60
+        project.timeout_s = float(timeout.group(1)) * scale
+
+
+def discover_projects(names: List[str]) -> List[Project]:
+    """Find sample projects, optionally restricted to the given names.
+
+    Args:
+        names: Project names or prefixes (e.g. '2.1', '3.1-static-site-generator');
+            empty for all projects
+
+    Returns:
+        Projects in level order
+    """
+    projects = []
+    for level in LEVELS:
+        level_dir = ROOT / level
+        if not level_dir.is_dir():
+            continue
+        for path in sorted(p for p in level_dir.iterdir() if p.is_dir()):
+            if names and not any(path.name.startswith(n) for n in names):
+                continue
+            project = Project(name=path.name, path=path)
+            parse_resource_limits(path / "README.md", project)
+            projects.append(project)
+    return projects
+
+
+def host_memory_mb() -> int:
+    """Return total physical memory in megabytes (8GB if unknown)."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return 8192
+
+
+def sandbox_memory(memory_mb: int) -> str:
+    """Format megabytes as a docker --memory value."""
+    return f"{memory_mb // 1024}g" if memory_mb % 1024 == 0 else f"{memory_mb}m"
+
+
+class Scheduler:
+    """Runs projects concurrently without exceeding the CPU/memory budget."""
+
+    def __init__(self, projects: List[Project], cpus: int, memory_mb: int,
+                 max_jobs: int, log_dir: Path):
+        self.projects = projects
+        self.cpus = cpus
+        self.memory_mb = memory_mb
+        self.max_jobs = max_jobs
+        self.log_dir = log_dir
+
+        self.reserved_cpus = 0
+        self.reserved_memory_mb = 0
+        self.running: List[Project] = []
+
+    def _reservation(self, project: Project) -> tuple[int, int]:
+        # A project larger than the whole budget still runs, alone
+        return min(project.cpus, self.cpus), min(project.memory_mb, self.memory_mb)
+
+    def _fits(self, project: Project) -> bool:
+        cpus, memory_mb = self._reservation(project)
+        return (len(self.running) < self.max_jobs
+                and self.reserved_cpus + cpus <= self.cpus
+                and self.reserved_memory_mb + memory_mb <= self.memory_mb)
+
+    def _start(self, project: Project) -> None:
+        test_script = project.path / "test.sh"
+        if not test_script.exists():
+            project.status = "skipped"
+            project.output = "No test.sh found"
+            return
+
+        env = dict(os.environ)
+        env["SANDBOX_MEMORY"] = sandbox_memory(project.memory_mb)
+        env["SANDBOX_CPUS"] = str(project.cpus)
+        if project.network.lower().startswith("none"):
+            env["SANDBOX_NETWORK"] = "none"
+
+        project.log_path = self.log_dir / f"{project.name}.log"
+        log_file = open(project.log_path, "w")
+        project.process = subprocess.Popen(
+            ["bash", str(test_script)],
+            cwd=project.path,
+            env=env,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,  # own process group, so timeouts kill children too
+        )
+        log_file.close()
+
+        project.status = "running"
+        project.started = time.monotonic()
+        cpus, memory_mb = self._reservation(project)
+        self.reserved_cpus += cpus
+        self.reserved_memory_mb += memory_mb
+        self.running.append(project)
+        print(f"▶️  {project.name} (memory {project.memory_mb}MB, "
+              f"cpus {project.cpus}, timeout {project.timeout_s:.0f}s)", flush=True)
+
+    def _finish(self, project: Project, status: str) -> None:
+        project.wall_time_s = time.monotonic() - project.started
+        project.status = status
+        project.exit_code = project.process.returncode
+        project.output = project.log_path.read_text(errors="replace")
+
+        cpus, memory_mb = self._reservation(project)
+        self.reserved_cpus -= cpus
+        self.reserved_memory_mb -= memory_mb
+        self.running.remove(project)
+
+        icon = {"passed": "✅", "failed": "❌", "timeout": "⏱️ "}[status]
+        print(f"{icon} {project.name}: {status.upper()} ({project.wall_time_s:.2f}s)",
+              flush=True)
+
+    def _kill(self, project: Project) -> None:
+        try:
+            os.killpg(project.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        project.process.wait()
+
+    def run(self) -> None:
+        """Run all projects to completion."""
+        # Longest timeout first: big jobs start early instead of trailing at the end
+        pending = sorted(self.projects, key=lambda p: p.timeout_s, reverse=True)
+
+        while pending or self.running:
+            for project in list(pending):
+                if self._fits(project):
+                    pending.remove(project)
+                    self._start(project)
+
+            for project in list(self.running):
+                if project.process.poll() is not None:
+                    status = "passed" if project.process.returncode == 0 else "failed"
+                    self._finish(project, status)
+                elif time.monotonic() - project.started > project.timeout_s:
+                    self._kill(project)
+                    self._finish(project, "timeout")
+
+            time.sleep(POLL_INTERVAL_S)
+
+    def interrupt(self) -> None:
+        """Kill all running projects."""
+        for project in list(self.running):
+            self._kill(project)
+            self._finish(project, "failed")
+
+
+def write_json_report(projects: List[Project], path: Path, wall_time_s: float,
+                      budget: dict) -> None:
+    """Write the JSON report.
+
+    Args:
+        projects: Finished projects
+        path: Output path
+        wall_time_s: Wall time of the whole run
+        budget: Scheduler budget
+    """
+    report = {
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "wall_time_seconds": round(wall_time_s, 3),
+        "serial_time_seconds": round(sum(p.wall_time_s for p in projects), 3),
+        "budget": budget,
+        "projects": [
+            {
+                "name": p.name,
+                "status": p.status,
+                "exit_code": p.exit_code,
+                "wall_time_seconds": round(p.wall_time_s, 3),
+                "memory_mb": p.memory_mb,
+                "cpus": p.cpus,
+                "network": p.network,
+                "timeout_seconds": p.timeout_s,
+            }
+            for p in projects
+        ],
+    }
+    path.write_text(json.dumps(report, indent=2) + "\n")
+
+
+def write_junit_report(projects: List[Project], path: Path, wall_time_s: float) -> None:
+    """Write the JUnit XML report.
+
+    Args:
+        projects: Finished projects
+        path: Output path
+        wall_time_s: Wall time of the whole run
+    """
+    suite = ET.Element("testsuite", {
+        "name": "sample-projects",
+        "tests": str(len(projects)),
+        "failures": str(sum(p.status == "failed" for p in projects)),
+        "errors": str(sum(p.status == "timeout" for p in projects)),
+        "skipped": str(sum(p.status == "skipped" for p in projects)),
+        "time": f"{wall_time_s:.3f}",
+    })
+
+    for p in projects:
+        case = ET.SubElement(suite, "testcase", {
+            "classname": p.path.parent.name,
+            "name": p.name,
+            "time": f"{p.wall_time_s:.3f}",
+        })
+        if p.status == "failed":
+            ET.SubElement(case, "failure", {"message": f"exit code {p.exit_code}"})
+        elif p.status == "timeout":
+            ET.SubElement(case, "error", {"message": f"timed out after {p.timeout_s:.0f}s"})
+        elif p.status == "skipped":
+            ET.SubElement(case, "skipped", {"message": p.output})
+        ET.SubElement(case, "system-out").text = p.output
+
+    ET.indent(suite)
+    ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Run sample project tests in parallel.")
+    parser.add_argument("projects", nargs="*",
+                        help="Project names or prefixes to run (default: all)")
+    parser.add_argument("--cpus", type=int, default=os.cpu_count() or 1,
+                        help="Global CPU budget (default: host cores)")
+    parser.add_argument("--memory", default=None,
+                        help="Global memory budget, e.g. 8g (default: host memory)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Maximum concurrent projects (default: unlimited)")
+    parser.add_argument("--report-dir", type=Path, default=ROOT / "test-results",
+                        help="Directory for reports and per-project logs")
+    args = parser.parse_args()
+
+    memory_mb = parse_size_mb(args.memory) if args.memory else host_memory_mb()
+    projects = discover_projects(args.projects)
+    if not projects:
+        print("⚠️  No tests were run")
+        return 1
+
+    args.report_dir.mkdir(parents=True, exist_ok=True)
+    log_dir = args.report_dir / "logs"
+    log_dir.mkdir(exist_ok=True)
+
+    print("========================================")
+    print("Claude Sandbox - Sample Project Tests")
+    print("========================================")
+    print(f"Budget: {args.cpus} CPUs, {memory_mb}MB memory")
+    print()
+
+    scheduler = Scheduler(projects, args.cpus, memory_mb,
+                          args.jobs or len(projects), log_dir)
+    started = time.monotonic()
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.interrupt()
+        print("\n⏸️  Interrupted")
+    wall_time_s = time.monotonic() - started
+
+    budget = {"cpus": args.cpus, "memory_mb": memory_mb}
+    write_json_report(projects, args.report_dir / "report.json", wall_time_s, budget)
+    write_junit_report(projects, args.report_dir / "junit.xml", wall_time_s)
+
+    passed = [p for p in projects if p.status == "passed"]
+    failed = [p for p in projects if p.status in ("failed", "timeout", "pending", "running")]
+    skipped = [p for p in projects if p.status == "skipped"]
+
+    print()
+    print("========================================")
+    print("Test Summary")
+    print("========================================")
+    print(f"Passed:  {len(passed)}")
+    print(f"Failed:  {len(failed)}")
+    print(f"Skipped: {len(skipped)}")
+    print(f"Wall time: {wall_time_s:.2f}s "
+          f"(serial: {sum(p.wall_time_s for p in projects):.2f}s)")
+    print(f"Reports: {args.report_dir}/report.json, {args.report_dir}/junit.xml")
+    print()
+
+    if failed:
+        print("Failed tests:")
+        for p in failed:
+            print(f"  ❌ {p.name} ({p.status})")
+        return 1
+
+    if not passed:
+        print("⚠️  No tests were run")
+        return 1
+
+    print("✅ All tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,58 +10,29 @@
 #   --success      Show only successful executions
 #   --since DATE   Show executions since DATE (YYYY-MM-DD)
 #   --container NAME  Show specific container
+#   --oom          Show only OOM-killed executions
+#   --throttled    Show only CPU-throttled executions
+#   --peak-above PCT  Show executions whose peak memory reached PCT% of the limit
 #   --json         Output raw JSON
 #   --stats        Show aggregate statistics
+#   --phases       Show where launch time goes, per runtime and config
+#   --report       Latency percentiles, failure rate, throughput and
+#                  regressions per configuration (exit 2 on regression)
+#   --output NAME  Print a run's captured output (--tail N: last N lines)
+#
+# Requires python3 (standard library only).
 
 set -euo pipefail
 
-LOG_DIR="logs"
-RECENT=10
-SHOW_FAILED=false
-SHOW_SUCCESS=false
-SHOW_JSON=false
-SHOW_STATS=false
-SINCE_DATE=""
-CONTAINER_FILTER=""
-
-# Colors
-GREEN='\033[0;32m'
-RED='\033[0;31m'
-YELLOW='\033[1;33m'
-CYAN='\033[0;36m'
-NC='\033[0m'
-
-# Parse arguments
-while [[ $# -gt 0 ]]; do
-    case "$1" in
-        --recent)
-            RECENT="$2"
-            shift 2
-            ;;
-        --failed)
-            SHOW_FAILED=true
-            shift
-            ;;
-        --success)
-            SHOW_SUCCESS=true
-            shift
-            ;;
-        --since)
-            SINCE_DATE="$2"
-            shift 2
-            ;;
-        --container)
-            CONTAINER_FILTER="$2"
-            shift 2
-            ;;
-        --json)
-            SHOW_JSON=true
-            shift
-            ;;
-        --stats)
-            SHOW_STATS=true
-            shift
-            ;;
+# The logs are queried through an incremental SQLite index
+# (.sandbox-cache/history.sqlite, see claude_sandbox/history.py): each call
+# only reads log lines appended since the previous one, so queries stay fast
+# with hundreds of thousands of runs. Delete the index file to rebuild it.
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+for arg in "$@"; do
+    case "$arg" in
         --help|-h)
             cat <<EOF
 Usage: $0 [options]
@@ -73,9 +44,38 @@ Options:
   --failed           Show only failed executions
   --success          Show only successful executions
   --since DATE       Show executions since DATE (YYYY-MM-DD)
-  --container NAME   Show specific container
+  --until DATE       Show executions started before DATE (YYYY-MM-DD)
+  --container NAME   Show specific container (regular expression)
+  --oom              Show only OOM-killed executions
+  --throttled        Show only executions whose CPU quota was throttled
+  --peak-above PCT   Show only executions whose peak memory reached PCT% of
+                     their memory limit
   --json             Output raw JSON
-  --stats            Show aggregate statistics
+  --stats            Show aggregate statistics, including OOM kills, peak
+                     memory against the limit and CPU throttling (filters apply)
+  --phases           Show average launch phase timings (image check, runtime
+                     detection, build, create, command, teardown) per
+                     runtime and per resource config (filters apply)
+
+Output options:
+  --output NAME      Print the stdout and stderr of run NAME, kept by
+                     run-sandbox.sh in logs/NAME.output (SANDBOX_CAPTURE=1)
+  --tail N           Only the last N lines (read through the capture's line
+                     index, so as fast for a 10GB log as for a 10KB one)
+
+Report options:
+  --report           Show p50/p90/p99 duration, failure rate and throughput
+                     per group, and flag configurations whose recent
+                     percentiles regressed against a baseline window.
+                     Exits with status 2 if any regression is flagged
+  --by KEYS          Comma-separated grouping keys: command, runtime, memory,
+                     cpus, hour, day, week (default: runtime,memory,cpus)
+  --current SPAN     Recent window, ending at the newest run (default: 1d)
+  --baseline SPAN    Baseline window just before it (default: 7d)
+                     SPAN is a number followed by m, h, d or w
+  --threshold PCT    Flag percentiles that grew by more than PCT% (default: 20)
+  --min-runs N       Never flag groups with fewer than N runs in either
+                     window (default: 5)
 
 Examples:
   # Show last 10 executions
@@ -90,144 +90,30 @@ Examples:
   # Show statistics
   ./sandbox-history.sh --stats
 
+  # Where launch latency goes, runsc vs runc
+  ./sandbox-history.sh --phases
+
+  # Runs that came within 10% of their memory limit, and their totals
+  ./sandbox-history.sh --peak-above 90
+  ./sandbox-history.sh --stats --peak-above 90
+
+  # Statistics for this month's runs
+  ./sandbox-history.sh --stats --since 2025-10-01
+
+  # The last 100 lines a run printed
+  ./sandbox-history.sh --output claude-sandbox-20251027-123456 --tail 100
+
+  # Daily latency per runtime; did the last day regress against the week?
+  ./sandbox-history.sh --report --by runtime,day
+
+  # Per command, comparing the last 6 hours with the 3 days before
+  ./sandbox-history.sh --report --by command --current 6h --baseline 3d
+
 EOF
             exit 0
             ;;
-        *)
-            echo "Unknown option: $1"
-            exit 1
-            ;;
     esac
 done
 
-# Check if logs directory exists
-if [ ! -d "$LOG_DIR" ]; then
-    echo "No logs directory found. Run some sandbox executions first."
-    exit 1
-fi
-
-# Count log files
-LOG_COUNT=$(find "$LOG_DIR" -name "*.json" 2>/dev/null | wc -l | tr -d ' ')
-
-if [ "$LOG_COUNT" -eq 0 ]; then
-    echo "No execution logs found."
-    exit 0
-fi
-
-# Show statistics
-if [ "$SHOW_STATS" = true ]; then
-    echo -e "${CYAN}=== Sandbox Execution Statistics ===${NC}"
-    echo ""
-
-    TOTAL=0
-    SUCCESS=0
-    FAILED=0
-    TOTAL_DURATION=0
-
-    for log_file in "$LOG_DIR"/*.json; do
-        if [ -f "$log_file" ]; then
-            # Extract completion events
-            while IFS= read -r line; do
-                if echo "$line" | grep -q '"event":"complete"'; then
-                    TOTAL=$((TOTAL + 1))
-
-                    # Check if successful
-                    if echo "$line" | grep -q '"success":"true"'; then
-                        SUCCESS=$((SUCCESS + 1))
-                    else
-                        FAILED=$((FAILED + 1))
-                    fi
-
-                    # Sum duration
-                    DURATION=$(echo "$line" | grep -o '"duration_seconds":[0-9]*' | cut -d':' -f2 || echo "0")
-                    TOTAL_DURATION=$((TOTAL_DURATION + DURATION))
-                fi
-            done < "$log_file"
-        fi
-    done
-
-    echo "Total Executions: $TOTAL"
-    echo -e "Successful: ${GREEN}$SUCCESS${NC}"
-    echo -e "Failed: ${RED}$FAILED${NC}"
-
-    if [ $TOTAL -gt 0 ]; then
-        SUCCESS_RATE=$((SUCCESS * 100 / TOTAL))
-        AVG_DURATION=$((TOTAL_DURATION / TOTAL))
-        echo "Success Rate: ${SUCCESS_RATE}%"
-        echo "Average Duration: ${AVG_DURATION}s"
-        echo "Total Runtime: ${TOTAL_DURATION}s"
-    fi
-
-    exit 0
-fi
-
-# Show execution history
-echo -e "${CYAN}=== Sandbox Execution History ===${NC}"
-echo ""
-
-# Find and sort log files by modification time
-LOG_FILES=$(find "$LOG_DIR" -name "*.json" -type f | sort -r | head -n "$RECENT")
-
-for log_file in $LOG_FILES; do
-    CONTAINER=$(basename "$log_file" .json)
-
-    # Apply container filter
-    if [ -n "$CONTAINER_FILTER" ] && [[ ! "$CONTAINER" =~ $CONTAINER_FILTER ]]; then
-        continue
-    fi
-
-    # Parse log file
-    START_TIME=""
-    COMMAND=""
-    EXIT_CODE=""
-    DURATION=""
-    SUCCESS=""
-
-    while IFS= read -r line; do
-        # Skip empty lines
-        [ -z "$line" ] && continue
-
-        if [ "$SHOW_JSON" = true ]; then
-            echo "$line"
-            continue
-        fi
-
-        EVENT=$(echo "$line" | grep -o '"event":"[^"]*"' | cut -d'"' -f4)
-
-        if [ "$EVENT" = "start" ]; then
-            START_TIME=$(echo "$line" | grep -o '"timestamp":"[^"]*"' | cut -d'"' -f4)
-            COMMAND=$(echo "$line" | grep -o '"command":"[^"]*"' | cut -d'"' -f4)
-        elif [ "$EVENT" = "complete" ]; then
-            EXIT_CODE=$(echo "$line" | grep -o '"exit_code":[0-9]*' | cut -d':' -f2)
-            DURATION=$(echo "$line" | grep -o '"duration_seconds":[0-9]*' | cut -d':' -f2)
-            SUCCESS=$(echo "$line" | grep -o '"success":"[^"]*"' | cut -d'"' -f4)
-        fi
-    done < "$log_file"
-
-    # Apply success/failed filter
-    if [ "$SHOW_FAILED" = true ] && [ "$SUCCESS" = "true" ]; then
-        continue
-    fi
-    if [ "$SHOW_SUCCESS" = true ] && [ "$SUCCESS" = "false" ]; then
-        continue
-    fi
-
-    # Skip if no completion event
-    if [ -z "$EXIT_CODE" ]; then
-        continue
-    fi
-
-    # Print execution summary
-    if [ "$SUCCESS" = "true" ]; then
-        STATUS="${GREEN}✓ SUCCESS${NC}"
-    else
-        STATUS="${RED}✗ FAILED${NC}"
-    fi
-
-    echo -e "${YELLOW}Container:${NC} $CONTAINER"
-    echo -e "  Status: $STATUS (exit code: $EXIT_CODE)"
-    echo -e "  Started: $START_TIME"
-    echo -e "  Duration: ${DURATION}s"
-    echo -e "  Command: $COMMAND"
-    echo ""
-done
+exec env PYTHONPATH="${SCRIPT_DIR}${PYTHONPATH:+:$PYTHONPATH}" \
+    python3 -m claude_sandbox.history "$@"
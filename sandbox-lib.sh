@@ -0,0 +1,784 @@
+#!/bin/bash
+# sandbox-lib.sh - Shared helpers for the sandbox scripts
+#
+# Sourced by run-sandbox.sh and sandbox-pool.sh. Expects the SANDBOX_*
+# configuration variables to be set by the caller.
+
+# Current time in milliseconds since the epoch.
+# Uses bash 5's EPOCHREALTIME when available, then GNU date, then python3
+# (macOS ships bash 3.2 and BSD date, neither of which has sub-second time).
+now_ms() {
+    if [ -n "${EPOCHREALTIME:-}" ]; then
+        local usec="${EPOCHREALTIME/[.,]/}"
+        echo $((usec / 1000))
+    elif [ "$(date +%N)" != "N" ]; then
+        echo $(($(date +%s%N) / 1000000))
+    else
+        python3 -c 'import time; print(int(time.time() * 1000))'
+    fi
+}
+
+# ---------------------------------------------------------------------------
+# Launch phase timing
+#
+# phase_begin/phase_end bracket each step of a launch. Every phase is logged
+# as a "phase" event and collected into PHASES_JSON, which run-sandbox.sh
+# records as "phases_ms" in the complete event for sandbox-history.sh
+# --phases to aggregate. A phase that runs more than once (a retried
+# container) is summed.
+# ---------------------------------------------------------------------------
+
+PHASES_JSON=""
+PHASE_NAMES=()
+PHASE_TOTALS=()
+
+phase_begin() {
+    PHASE_T0=$(now_ms)
+}
+
+# Arguments:
+#   $1: Phase name
+phase_end() {
+    local ms=$(($(now_ms) - PHASE_T0))
+    local i=0
+    log_json "phase" "{\"phase\":\"$1\",\"ms\":${ms}}"
+
+    while [ $i -lt ${#PHASE_NAMES[@]} ] && [ "${PHASE_NAMES[$i]}" != "$1" ]; do
+        i=$((i + 1))
+    done
+    if [ $i -lt ${#PHASE_NAMES[@]} ]; then
+        PHASE_TOTALS[$i]=$((PHASE_TOTALS[$i] + ms))
+    else
+        PHASE_NAMES[$i]="$1"
+        PHASE_TOTALS[$i]=$ms
+    fi
+
+    PHASES_JSON=""
+    for ((i = 0; i < ${#PHASE_NAMES[@]}; i++)); do
+        PHASES_JSON="${PHASES_JSON:+${PHASES_JSON},}\"${PHASE_NAMES[$i]}\":${PHASE_TOTALS[$i]}"
+    done
+}
+
+# Resolve SANDBOX_RUNTIME, falling back to runc if gVisor is not installed.
+resolve_runtime() {
+    if [ "$SANDBOX_RUNTIME" = "runsc" ] && \
+        ! docker info 2>/dev/null | grep -q "Runtimes:.*runsc"; then
+        log_warn "gVisor runtime (runsc) not available, falling back to default runtime (runc)"
+        log_warn "Install gVisor for enhanced security: brew install gvisor"
+        SANDBOX_RUNTIME="runc"
+    fi
+
+    # A non-default I/O profile runs under the runsc runtime registered for it
+    local io_profile="${SANDBOX_IO_PROFILE:-default}"
+    local io_runtime runtimes
+    [ "$io_profile" = "default" ] && return 0
+    io_runtime=$(io_profile_runtime "$io_profile")
+    runtimes=$(docker info --format '{{range $name, $_ := .Runtimes}}{{$name}} {{end}}' \
+        2>/dev/null || true)
+    if [ "$SANDBOX_RUNTIME" != "runsc" ]; then
+        log_warn "I/O profile '$io_profile' only applies to runsc, ignored under $SANDBOX_RUNTIME"
+    elif [[ " $runtimes " == *" $io_runtime "* ]]; then
+        SANDBOX_RUNTIME="$io_runtime"
+        if [ "$io_profile" = "overlay" ]; then
+            log_warn "I/O profile 'overlay': writes to /workspace are discarded when the run ends"
+        fi
+    else
+        log_warn "Runtime $io_runtime for I/O profile '$io_profile' is not registered, using runsc"
+        log_warn "Register it with: sudo runsc install --runtime=$io_runtime -- $(io_profile_flags "$io_profile")"
+    fi
+}
+
+# ---------------------------------------------------------------------------
+# Workspace I/O profiles (see claude_sandbox/io_profiles.py)
+#
+# Each profile is a runsc runtime registered with Docker under its own name,
+# since runsc flags cannot be set per container. Must match PROFILES in
+# claude_sandbox/io_profiles.py.
+# ---------------------------------------------------------------------------
+
+# Print the runtime of an I/O profile, or nothing if there is no such profile.
+io_profile_runtime() {
+    case "$1" in
+        default) echo "runsc" ;;
+        gofer|directfs|cached|overlay) echo "runsc-$1" ;;
+    esac
+}
+
+# Print the runsc flags of an I/O profile.
+io_profile_flags() {
+    case "$1" in
+        gofer) echo "--directfs=false" ;;
+        directfs) echo "--directfs=true" ;;
+        cached) echo "--directfs=true --file-access-mounts=exclusive" ;;
+        overlay) echo "--directfs=true --file-access-mounts=exclusive --overlay2=all:memory" ;;
+    esac
+}
+
+# Populate the DOCKER_OPTS array with the locked-down container options.
+# Callers add --rm themselves if the daemon should remove the container.
+#
+# Arguments:
+#   $1: Container name
+#   $2: Absolute workspace directory to mount as /workspace
+#   $3: Optional --mount spec to use for /workspace instead of a bind mount
+build_docker_opts() {
+    local name="$1"
+    local workspace="$2"
+    local mount="${3:-}"
+
+    DOCKER_OPTS=(
+        --name "$name"                          # Container name
+        --runtime="$SANDBOX_RUNTIME"            # Use gVisor if available
+        --memory="$SANDBOX_MEMORY"              # Memory limit
+        --cpus="$SANDBOX_CPUS"                  # CPU limit
+        --pids-limit="$SANDBOX_PIDS_LIMIT"      # Process limit
+        --network="$SANDBOX_NETWORK"            # Network isolation
+        --read-only                             # Read-only root filesystem
+        --tmpfs /tmp/claude-tmp:rw,noexec,nosuid,size=1g  # Writable temp
+        -w /workspace                           # Set working directory
+        --security-opt=no-new-privileges:true   # Prevent privilege escalation
+        --cap-drop=ALL                          # Drop all capabilities
+        --cap-add=CHOWN                         # Allow chown (for file ownership)
+        --cap-add=DAC_OVERRIDE                  # Allow file access override
+        --cap-add=SETGID                        # Allow setgid (for group changes)
+        --cap-add=SETUID                        # Allow setuid (for user changes)
+    )
+
+    # Mount workspace
+    if [ -n "$mount" ]; then
+        DOCKER_OPTS+=(--mount "$mount")
+    else
+        DOCKER_OPTS+=(-v "${workspace}:/workspace:rw")
+    fi
+
+    # Project dependencies (see deps_prepare)
+    if [ -n "$DEPS_ENV_DIR" ]; then
+        DOCKER_OPTS+=(-v "${DEPS_ENV_DIR}:${DEPS_MOUNT}:ro" -e "PATH=${DEPS_PATH}"
+            -e "VIRTUAL_ENV=${DEPS_MOUNT}")
+    fi
+
+    # Add seccomp profile if it exists
+    local seccomp
+    seccomp=$(seccomp_opt)
+    if [ -n "$seccomp" ]; then
+        DOCKER_OPTS+=(--security-opt seccomp="$seccomp")
+    fi
+}
+
+# Print the --security-opt seccomp value for SANDBOX_SECCOMP (default:
+# seccomp-profile.json): the profile's absolute path, "unconfined", or
+# nothing if the file is missing, which leaves Docker's default profile.
+seccomp_opt() {
+    local profile="${SANDBOX_SECCOMP:-seccomp-profile.json}"
+    if [ "$profile" = "unconfined" ]; then
+        echo "unconfined"
+    elif [ -f "$profile" ]; then
+        echo "$(cd "$(dirname "$profile")" && pwd)/$(basename "$profile")"
+    fi
+}
+
+# ---------------------------------------------------------------------------
+# Warm container pool
+#
+# Pool containers are started with the same options as a normal run but with
+# a long-running placeholder process, and commands are handed to them with
+# `docker exec`. A container can only serve the workspace and limits it was
+# created with, so the pool is partitioned by a key derived from those.
+#
+# State lives on disk so concurrent run-sandbox.sh invocations share it:
+#
+#   ${SANDBOX_POOL_DIR}/<key>/idle/<container>   ready to be claimed
+#   ${SANDBOX_POOL_DIR}/<key>/busy/<container>   currently serving a run
+#
+# Each state file holds "<uses> <last_used_epoch> <boot_ms> [<owner_pid>]".
+# Claiming is a rename from idle/ to busy/, which is atomic, so exactly one
+# caller wins. A busy entry records the launcher that owns it, so one that
+# died without releasing it (killed before its trap ran) can be reaped.
+# ---------------------------------------------------------------------------
+
+SANDBOX_POOL_DIR="${SANDBOX_POOL_DIR:-.sandbox-pool}"
+SANDBOX_POOL_SIZE="${SANDBOX_POOL_SIZE:-2}"
+SANDBOX_POOL_MAX_USES="${SANDBOX_POOL_MAX_USES:-20}"
+SANDBOX_POOL_IDLE_TTL="${SANDBOX_POOL_IDLE_TTL:-600}"
+
+# Print the pool key for a workspace under the current configuration.
+pool_key() {
+    local workspace="$1"
+    local seccomp
+    seccomp=$(seccomp_opt)
+
+    printf '%s|%s|%s|%s|%s|%s|%s|%s|%s' "$SANDBOX_IMAGE" "$workspace" \
+        "$SANDBOX_MEMORY" "$SANDBOX_CPUS" "$SANDBOX_NETWORK" \
+        "$SANDBOX_RUNTIME" "$SANDBOX_PIDS_LIMIT" "$seccomp" "$DEPS_ENV_DIR" \
+        | cksum | cut -d' ' -f1
+}
+
+# Start a new pool container and register it as busy.
+# Prints "<container> <boot_ms>" on success.
+pool_start() {
+    local key="$1"
+    local workspace="$2"
+    local name="claude-sandbox-pool-${key}-$(date +%s)-${RANDOM}"
+    local t0 boot_ms
+
+    mkdir -p "${SANDBOX_POOL_DIR}/${key}/idle" "${SANDBOX_POOL_DIR}/${key}/busy"
+
+    t0=$(now_ms)
+    build_docker_opts "$name" "$workspace"
+    docker run -d --rm "${DOCKER_OPTS[@]}" \
+        --label "claude-sandbox.pool=${key}" \
+        "$SANDBOX_IMAGE" sleep infinity >/dev/null || return 1
+
+    # Count the first exec as part of boot: under runsc it is noticeably
+    # slower than later ones and is exactly what a warm run avoids.
+    if ! docker exec "$name" true >/dev/null 2>&1; then
+        docker rm -f "$name" >/dev/null 2>&1 || true
+        return 1
+    fi
+    boot_ms=$(($(now_ms) - t0))
+
+    echo "0 $(date +%s) ${boot_ms} ${POOL_OWNER:-$$}" > "${SANDBOX_POOL_DIR}/${key}/busy/${name}"
+    echo "$name $boot_ms"
+}
+
+# Remove a pool container and its state file.
+pool_destroy() {
+    local key="$1"
+    local name="$2"
+
+    docker rm -f "$name" >/dev/null 2>&1 || true
+    rm -f "${SANDBOX_POOL_DIR}/${key}/busy/${name}" "${SANDBOX_POOL_DIR}/${key}/idle/${name}"
+}
+
+# Claim an idle container for the key.
+# Prints "<container> <uses> <boot_ms>"; returns 1 if none is available.
+pool_claim() {
+    local key="$1"
+    local idle_dir="${SANDBOX_POOL_DIR}/${key}/idle"
+    local busy_dir="${SANDBOX_POOL_DIR}/${key}/busy"
+    local state name uses last_used boot_ms owner
+
+    [ -d "$idle_dir" ] || return 1
+
+    for state in "$idle_dir"/*; do
+        [ -f "$state" ] || continue
+        name=$(basename "$state")
+        mv "$state" "${busy_dir}/${name}" 2>/dev/null || continue
+
+        read -r uses last_used boot_ms owner < "${busy_dir}/${name}"
+        if [ $(($(date +%s) - last_used)) -gt "$SANDBOX_POOL_IDLE_TTL" ] || \
+            [ "$(docker inspect -f '{{.State.Running}}' "$name" 2>/dev/null)" != "true" ]; then
+            pool_destroy "$key" "$name"
+            continue
+        fi
+        echo "${uses} ${last_used} ${boot_ms} $$" > "${busy_dir}/${name}"
+
+        echo "$name $uses $boot_ms"
+        return 0
+    done
+
+    return 1
+}
+
+# Return a container to the pool after a run, or destroy it once it has
+# reached SANDBOX_POOL_MAX_USES.
+pool_release() {
+    local key="$1"
+    local name="$2"
+    local uses="$3"
+    local boot_ms="$4"
+
+    uses=$((uses + 1))
+    if [ "$uses" -ge "$SANDBOX_POOL_MAX_USES" ]; then
+        pool_destroy "$key" "$name"
+        return 0
+    fi
+
+    # Recycle: kill anything the run left behind and wipe the scratch tmpfs.
+    # kill -1 never signals PID 1, so the placeholder process survives.
+    if ! docker exec "$name" sh -c \
+        'kill -9 -1 2>/dev/null; find /tmp/claude-tmp -mindepth 1 -delete 2>/dev/null; true' \
+        >/dev/null 2>&1; then
+        pool_destroy "$key" "$name"
+        return 0
+    fi
+
+    echo "${uses} $(date +%s) ${boot_ms}" > "${SANDBOX_POOL_DIR}/${key}/busy/${name}"
+    mv "${SANDBOX_POOL_DIR}/${key}/busy/${name}" "${SANDBOX_POOL_DIR}/${key}/idle/${name}"
+}
+
+# Start idle containers until the key has SANDBOX_POOL_SIZE of them.
+pool_fill() {
+    local key="$1"
+    local workspace="$2"
+    local idle_dir="${SANDBOX_POOL_DIR}/${key}/idle"
+    local started name boot_ms
+    # Runs in the background: own the containers being started, not the launcher
+    local POOL_OWNER=$BASHPID
+
+    mkdir -p "$idle_dir"
+    while [ "$(find "$idle_dir" -type f | wc -l | tr -d ' ')" -lt "$SANDBOX_POOL_SIZE" ]; do
+        started=$(pool_start "$key" "$workspace") || return 1
+        read -r name boot_ms <<< "$started"
+        mv "${SANDBOX_POOL_DIR}/${key}/busy/${name}" "${idle_dir}/${name}"
+    done
+}
+
+# Destroy idle containers past SANDBOX_POOL_IDLE_TTL, any beyond
+# SANDBOX_POOL_SIZE per key, and busy ones whose launcher is gone.
+pool_evict() {
+    local key_dir state name uses last_used boot_ms owner kept
+
+    [ -d "$SANDBOX_POOL_DIR" ] || return 0
+
+    for key_dir in "$SANDBOX_POOL_DIR"/*; do
+        [ -d "${key_dir}/idle" ] || continue
+        kept=0
+        for state in "${key_dir}/idle"/*; do
+            [ -f "$state" ] || continue
+            name=$(basename "$state")
+            read -r uses last_used boot_ms owner < "$state" || continue
+
+            if [ $(($(date +%s) - last_used)) -le "$SANDBOX_POOL_IDLE_TTL" ] && \
+                [ "$kept" -lt "$SANDBOX_POOL_SIZE" ]; then
+                kept=$((kept + 1))
+                continue
+            fi
+
+            # Claim before destroying so a concurrent run can't grab it
+            mv "$state" "${key_dir}/busy/${name}" 2>/dev/null || continue
+            pool_destroy "$(basename "$key_dir")" "$name"
+        done
+
+        # Orphans of launchers that died mid-run. Entries changed in the last
+        # minute are skipped: a claim renames the entry before recording its pid.
+        for state in "${key_dir}/busy"/*; do
+            [ -f "$state" ] || continue
+            read -r uses last_used boot_ms owner < "$state" || continue
+            [ -n "$owner" ] || continue
+            ps -p "$owner" >/dev/null 2>&1 && continue
+            [ -n "$(find "$state" -cmin +1 2>/dev/null)" ] || continue
+            pool_destroy "$(basename "$key_dir")" "$(basename "$state")"
+        done
+    done
+}
+
+# ---------------------------------------------------------------------------
+# Copy-on-write workspace
+#
+# With SANDBOX_WORKSPACE_MODE=overlay the workspace directory becomes the
+# read-only lower layer of an overlay filesystem and each run gets its own
+# upper layer:
+#
+#   ${SANDBOX_OVERLAY_DIR}/<run>/upper   files the run created or modified
+#   ${SANDBOX_OVERLAY_DIR}/<run>/work    overlayfs scratch space
+#
+# The overlay is mounted by the Docker daemon as a local volume, so setup is
+# zero-copy and any number of concurrent runs share one copy of the base.
+# Deleted files show up in upper/ as 0:0 character devices (whiteouts).
+# Requires a Linux host (Docker Desktop's VM cannot overlay host paths).
+# ---------------------------------------------------------------------------
+
+SANDBOX_OVERLAY_DIR="${SANDBOX_OVERLAY_DIR:-.sandbox-overlays}"
+SANDBOX_OVERLAY_KEEP="${SANDBOX_OVERLAY_KEEP:-1}"
+
+# Create the per-run layer and overlay volume.
+# Sets OVERLAY_VOLUME, OVERLAY_UPPER and WORKSPACE_MOUNT.
+overlay_setup() {
+    local name="$1"
+    local base="$2"
+    local run_dir
+
+    if [ "$(uname -s)" != "Linux" ]; then
+        log_error "Overlay workspaces require a Linux Docker host"
+        return 1
+    fi
+
+    mkdir -p "${SANDBOX_OVERLAY_DIR}/${name}/upper" "${SANDBOX_OVERLAY_DIR}/${name}/work"
+    run_dir="$(cd "${SANDBOX_OVERLAY_DIR}/${name}" && pwd)"
+    OVERLAY_UPPER="${run_dir}/upper"
+    OVERLAY_VOLUME="${name}-workspace"
+
+    docker volume create --driver local \
+        --opt type=overlay \
+        --opt device=overlay \
+        --opt "o=lowerdir=${base},upperdir=${OVERLAY_UPPER},workdir=${run_dir}/work" \
+        "$OVERLAY_VOLUME" >/dev/null || return 1
+
+    WORKSPACE_MOUNT="type=volume,src=${OVERLAY_VOLUME},dst=/workspace"
+}
+
+# Remove the overlay volume, keeping the upper layer unless
+# SANDBOX_OVERLAY_KEEP=0.
+overlay_teardown() {
+    local run_dir
+    run_dir="$(dirname "$OVERLAY_UPPER")"
+
+    docker volume rm "$OVERLAY_VOLUME" >/dev/null 2>&1 || true
+
+    # The kernel leaves an empty root-owned work/work behind; removing an
+    # empty directory only needs write access to its parent
+    rmdir "${run_dir}/work/work" "${run_dir}/work" 2>/dev/null || true
+
+    if [ "$SANDBOX_OVERLAY_KEEP" = "0" ]; then
+        rm -rf "$run_dir"
+    fi
+}
+
+# Print a JSON object describing the run's changes to the base.
+overlay_summary() {
+    local changed deleted
+    changed=$(find "$OVERLAY_UPPER" -type f 2>/dev/null | wc -l | tr -d ' ')
+    deleted=$(find "$OVERLAY_UPPER" -type c 2>/dev/null | wc -l | tr -d ' ')
+    echo "{\"upper\":\"${OVERLAY_UPPER}\",\"changed_files\":${changed},\"deleted_files\":${deleted},\"kept\":$([ "$SANDBOX_OVERLAY_KEEP" = "0" ] && echo false || echo true)}"
+}
+
+# ---------------------------------------------------------------------------
+# cgroup sampler
+#
+# With SANDBOX_SAMPLE_HZ set, a background sampler (`python3 -m
+# claude_sandbox --sample`) reads the container's cgroup v2 files on the host
+# at that rate and streams them to ${LOG_DIR}/<run>.cgroup.jsonl. It stops by
+# itself when the container exits; sampler_stop covers pool containers, which
+# outlive the run.
+# ---------------------------------------------------------------------------
+
+SANDBOX_SAMPLE_HZ="${SANDBOX_SAMPLE_HZ:-0}"
+SAMPLER_PID=""
+SAMPLES_FIELDS=""
+
+# Start sampling a container in the background. Right-sizing samples at
+# RIGHTSIZE_SAMPLE_HZ when SANDBOX_SAMPLE_HZ is off.
+# Sets SAMPLER_PID, SAMPLER_RATE and SAMPLES_FILE.
+#
+# Arguments:
+#   $1: Container name (it may not have started yet)
+#   $2: Samples file
+sampler_start() {
+    SAMPLER_PID=""
+    SAMPLES_FILE="$2"
+    SAMPLER_RATE="$SANDBOX_SAMPLE_HZ"
+    if [ "$SAMPLER_RATE" = "0" ] && [ "$SANDBOX_RIGHTSIZE" != "off" ]; then
+        SAMPLER_RATE="$RIGHTSIZE_SAMPLE_HZ"
+    fi
+    [ "$SAMPLER_RATE" = "0" ] && return 0
+
+    local lib_dir
+    lib_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    PYTHONPATH="${lib_dir}${PYTHONPATH:+:$PYTHONPATH}" python3 -m claude_sandbox --sample \
+        "$1" --rate "$SAMPLER_RATE" --output "$SAMPLES_FILE" \
+        > "${SAMPLES_FILE}.summary" 2>/dev/null &
+    SAMPLER_PID=$!
+}
+
+# Stop the sampler. Sets SAMPLES_FIELDS to ',"cgroup_samples":{...}' for the
+# complete event (empty if sampling failed; unchanged if no sampler runs).
+sampler_stop() {
+    [ -z "$SAMPLER_PID" ] && return 0
+    kill -TERM "$SAMPLER_PID" 2>/dev/null || true
+    wait "$SAMPLER_PID" 2>/dev/null || true
+    SAMPLER_PID=""
+
+    local summary
+    summary=$(cat "${SAMPLES_FILE}.summary" 2>/dev/null || true)
+    rm -f "${SAMPLES_FILE}.summary"
+    SAMPLES_FIELDS=""
+    if [ -n "$summary" ]; then
+        SAMPLES_FIELDS=",\"cgroup_samples\":{\"file\":\"${SAMPLES_FILE}\",\"rate_hz\":${SAMPLER_RATE},\"summary\":${summary}}"
+    fi
+}
+
+# ---------------------------------------------------------------------------
+# cgroup watcher
+#
+# A container's cgroup disappears as soon as it exits, taking its OOM
+# counters with it. On Linux hosts a background watcher (`python3 -m
+# claude_sandbox --watch`) keeps memory.events (high, max, oom, oom_kill),
+# the peak memory and the cpu.stat throttling counters up to date and reads
+# them a last time when the container's last process exits; run-sandbox.sh
+# records them as "resources" in the complete event.
+# ---------------------------------------------------------------------------
+
+WATCHER_PID=""
+RESOURCES_FIELDS=""
+
+# Start watching a container in the background. Sets WATCHER_PID.
+#
+# Arguments:
+#   $1: Container name (it may not have started yet)
+#   $2: File for the watcher's output
+watcher_start() {
+    WATCHER_PID=""
+    WATCHER_FILE="$2"
+    [ "$(uname -s)" = "Linux" ] || return 0
+
+    local lib_dir
+    lib_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    PYTHONPATH="${lib_dir}${PYTHONPATH:+:$PYTHONPATH}" python3 -m claude_sandbox --watch \
+        "$1" > "$WATCHER_FILE" 2>/dev/null &
+    WATCHER_PID=$!
+}
+
+# Stop the watcher. Sets RESOURCES_FIELDS to ',"resources":{...}' for the
+# complete event (empty if the cgroup could not be read).
+watcher_stop() {
+    [ -z "$WATCHER_PID" ] && return 0
+    kill -TERM "$WATCHER_PID" 2>/dev/null || true
+    wait "$WATCHER_PID" 2>/dev/null || true
+    WATCHER_PID=""
+
+    local resources
+    resources=$(cat "$WATCHER_FILE" 2>/dev/null || true)
+    rm -f "$WATCHER_FILE"
+    RESOURCES_FIELDS=""
+    if [ -n "$resources" ] && [ "$resources" != "{}" ]; then
+        RESOURCES_FIELDS=",\"resources\":${resources}"
+    fi
+}
+
+# ---------------------------------------------------------------------------
+# Output capture
+#
+# The container is removed when the run ends, taking `docker logs` with it.
+# With SANDBOX_CAPTURE=1 (the default) a background capture (`python3 -m
+# claude_sandbox --capture`) streams the container's stdout and stderr into
+# logs/<container>.output/: segments rotated at SANDBOX_CAPTURE_ROTATE,
+# gzip-compressed with SANDBOX_CAPTURE_COMPRESS=1, at most
+# SANDBOX_CAPTURE_KEEP kept (0: all), plus a line index that
+# sandbox-monitor.sh and sandbox-history.sh read instead of the daemon.
+# Warm pool runs (docker exec) are not captured.
+# ---------------------------------------------------------------------------
+
+SANDBOX_CAPTURE="${SANDBOX_CAPTURE:-1}"
+SANDBOX_CAPTURE_ROTATE="${SANDBOX_CAPTURE_ROTATE:-8m}"
+SANDBOX_CAPTURE_KEEP="${SANDBOX_CAPTURE_KEEP:-0}"
+SANDBOX_CAPTURE_COMPRESS="${SANDBOX_CAPTURE_COMPRESS:-0}"
+# How long capture_stop waits for the capture to drain the log
+CAPTURE_DRAIN_S=5
+CAPTURE_PID=""
+OUTPUT_FIELDS=""
+
+# Start capturing a container's output in the background. Sets CAPTURE_PID.
+#
+# Arguments:
+#   $1: Container name (created, it may not have started yet)
+#   $2: File for the capture's summary
+capture_start() {
+    CAPTURE_PID=""
+    CAPTURE_FILE="$2"
+    [ "$SANDBOX_CAPTURE" = "1" ] || return 0
+
+    local lib_dir
+    lib_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    PYTHONPATH="${lib_dir}${PYTHONPATH:+:$PYTHONPATH}" \
+        SANDBOX_CAPTURE_ROTATE="$SANDBOX_CAPTURE_ROTATE" \
+        SANDBOX_CAPTURE_KEEP="$SANDBOX_CAPTURE_KEEP" \
+        SANDBOX_CAPTURE_COMPRESS="$SANDBOX_CAPTURE_COMPRESS" \
+        python3 -m claude_sandbox --capture "$1" --output "${LOG_DIR}/$1.output" \
+        > "$CAPTURE_FILE" 2>/dev/null &
+    CAPTURE_PID=$!
+}
+
+# Stop the capture once the container has exited; it ends by itself when it
+# has read the whole log, and is stopped after CAPTURE_DRAIN_S otherwise.
+# Sets OUTPUT_FIELDS to ',"output":{...}' for the complete event (empty if
+# the output could not be captured).
+capture_stop() {
+    [ -z "$CAPTURE_PID" ] && return 0
+    local waited=0
+    while kill -0 "$CAPTURE_PID" 2>/dev/null && [ $waited -lt $((CAPTURE_DRAIN_S * 10)) ]; do
+        sleep 0.1
+        waited=$((waited + 1))
+    done
+    kill -TERM "$CAPTURE_PID" 2>/dev/null || true
+    wait "$CAPTURE_PID" 2>/dev/null || true
+    CAPTURE_PID=""
+
+    local output
+    output=$(cat "$CAPTURE_FILE" 2>/dev/null || true)
+    rm -f "$CAPTURE_FILE"
+    OUTPUT_FIELDS=""
+    if [ -n "$output" ] && [ "$output" != "{}" ]; then
+        OUTPUT_FIELDS=",\"output\":${output}"
+    fi
+}
+
+# ---------------------------------------------------------------------------
+# Right-sizing
+#
+# Runs are grouped by a workload signature (workspace + command) that
+# run-sandbox.sh records in every start event. With SANDBOX_RIGHTSIZE=record
+# or auto every run is sampled, so its peak memory and CPU reach the history
+# index; auto additionally asks claude_sandbox/rightsize.py for limits
+# derived from the signature's recent runs, with SANDBOX_MEMORY/SANDBOX_CPUS
+# as the ceiling, and retries an OOM-killed run with more memory.
+# ---------------------------------------------------------------------------
+
+SANDBOX_RIGHTSIZE="${SANDBOX_RIGHTSIZE:-off}"
+SANDBOX_RIGHTSIZE_MARGIN="${SANDBOX_RIGHTSIZE_MARGIN:-0.3}"
+SANDBOX_RIGHTSIZE_MIN_RUNS="${SANDBOX_RIGHTSIZE_MIN_RUNS:-3}"
+# Keep in sync with SAMPLE_HZ in claude_sandbox/rightsize.py
+RIGHTSIZE_SAMPLE_HZ=2
+OOM_KILLED="false"
+
+# Print the workload signature of a command in a workspace.
+# Must match signature() in claude_sandbox/rightsize.py.
+#
+# Arguments:
+#   $1: Absolute workspace directory
+#   $2: Command, space-joined
+sandbox_signature() {
+    local sha1="sha1sum"
+    command -v sha1sum >/dev/null 2>&1 || sha1="shasum"
+    printf '%s\n%s' "$1" "$2" | $sha1 | cut -c1-16
+}
+
+# Run claude_sandbox's right-sizing with the current configuration.
+rightsize_query() {
+    local lib_dir
+    lib_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    SANDBOX_MEMORY="$RIGHTSIZE_CEILING_MEMORY" SANDBOX_CPUS="$RIGHTSIZE_CEILING_CPUS" \
+        SANDBOX_RIGHTSIZE_MARGIN="$SANDBOX_RIGHTSIZE_MARGIN" \
+        SANDBOX_RIGHTSIZE_MIN_RUNS="$SANDBOX_RIGHTSIZE_MIN_RUNS" \
+        PYTHONPATH="${lib_dir}${PYTHONPATH:+:$PYTHONPATH}" \
+        python3 -m claude_sandbox --rightsize "$@"
+}
+
+# Replace SANDBOX_MEMORY/SANDBOX_CPUS with limits derived from the
+# signature's history. Sets RIGHTSIZE_FIELDS to ',"rightsize":{...}' for the
+# start event; returns 1 (limits unchanged) if no recommendation is available.
+#
+# Arguments:
+#   $1: Workload signature
+rightsize_apply() {
+    local limits memory cpus runs reason
+    RIGHTSIZE_CEILING_MEMORY="$SANDBOX_MEMORY"
+    RIGHTSIZE_CEILING_CPUS="$SANDBOX_CPUS"
+    limits=$(rightsize_query "$1" 2>/dev/null) || return 1
+    read -r memory cpus runs reason <<< "$limits"
+
+    SANDBOX_MEMORY="$memory"
+    SANDBOX_CPUS="$cpus"
+    RIGHTSIZE_REASON="$reason"
+    RIGHTSIZE_FIELDS=",\"rightsize\":{\"mode\":\"auto\",\"runs\":${runs},\"reason\":\"${reason}\",\"memory_ceiling\":\"${RIGHTSIZE_CEILING_MEMORY}\",\"cpus_ceiling\":\"${RIGHTSIZE_CEILING_CPUS}\"}"
+}
+
+# Print a docker memory size (512m, 4g, 1073741824) in bytes.
+memory_bytes() {
+    local value="$1"
+    local number="${value%[bBkKmMgG]}"
+    case "$value" in
+        *[kK]) echo $((number * 1024)) ;;
+        *[mM]) echo $((number * 1024 * 1024)) ;;
+        *[gG]) echo $((number * 1024 * 1024 * 1024)) ;;
+        *) echo "$number" ;;
+    esac
+}
+
+# Decide whether the last container was OOM-killed: Docker's OOMKilled flag
+# (read by run_container before removal) or the watcher's oom_kill count, or
+# a SIGKILL exit with the memory peak at the limit for runtimes that report
+# neither. Sets OOM_KILLED to true or false.
+oom_check() {
+    local peak
+    [ "$OOM_KILLED" = "true" ] && return 0
+    OOM_KILLED="false"
+    if echo "$RESOURCES_FIELDS" | grep -q '"oom_kill":[1-9]'; then
+        OOM_KILLED="true"
+        return 0
+    fi
+    [ "$EXIT_CODE" -eq 137 ] || return 0
+
+    peak=$(echo "${RESOURCES_FIELDS}${SAMPLES_FIELDS}" \
+        | grep -o '"memory_peak_bytes":[0-9]*' | head -1 | cut -d: -f2)
+    if [ -n "$peak" ] && [ $((peak * 100)) -ge $(($(memory_bytes "$SANDBOX_MEMORY") * 95)) ]; then
+        OOM_KILLED="true"
+    fi
+}
+
+# ---------------------------------------------------------------------------
+# Admission queue
+#
+# With SANDBOX_QUEUE=1 a launch waits until its memory, CPU and pids limits
+# fit the host capacity next to every other reservation and running sandbox
+# container (see claude_sandbox/admission.py). The reservation is a ticket
+# file owned by this shell's pid: it is released after teardown, and reaped
+# by the next waiting launcher if this process dies first.
+# ---------------------------------------------------------------------------
+
+SANDBOX_QUEUE="${SANDBOX_QUEUE:-0}"
+SANDBOX_QUEUE_DIR="${SANDBOX_QUEUE_DIR:-.sandbox-queue}"
+ADMISSION_TICKET=""
+ADMISSION_FIELDS=""
+
+# Block until the run's limits are reserved. Sets ADMISSION_TICKET and
+# ADMISSION_FIELDS to ',"admission":{...}' for the start event.
+#
+# Arguments:
+#   $1: Container name
+admission_admit() {
+    local lib_dir admitted
+    lib_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    admitted=$(SANDBOX_MEMORY="$SANDBOX_MEMORY" SANDBOX_CPUS="$SANDBOX_CPUS" \
+        SANDBOX_PIDS_LIMIT="$SANDBOX_PIDS_LIMIT" SANDBOX_QUEUE_DIR="$SANDBOX_QUEUE_DIR" \
+        PYTHONPATH="${lib_dir}${PYTHONPATH:+:$PYTHONPATH}" \
+        python3 -m claude_sandbox --admit "$1" --owner $$) || return 1
+
+    ADMISSION_TICKET="${admitted%% *}"
+    ADMISSION_FIELDS=",\"admission\":${admitted#* }"
+}
+
+# Give up the reservation. Removing the ticket is all a release is.
+admission_release() {
+    [ -z "$ADMISSION_TICKET" ] && return 0
+    rm -f "${SANDBOX_QUEUE_DIR}/admitted/${ADMISSION_TICKET}.json"
+    ADMISSION_TICKET=""
+}
+
+# ---------------------------------------------------------------------------
+# Project dependencies
+#
+# A requirements file in the workspace (SANDBOX_REQUIREMENTS) is installed
+# without network from the local wheelhouse into a virtualenv on the host,
+# cached by a hash of the requirements and the image (see
+# claude_sandbox/deps.py). The run mounts it read-only with its bin/ first
+# on PATH; only the first run of a dependency set pays for the install.
+# ---------------------------------------------------------------------------
+
+SANDBOX_REQUIREMENTS="${SANDBOX_REQUIREMENTS:-requirements.txt}"
+DEPS_MOUNT="/opt/sandbox-deps"
+# The image's PATH with the environment's scripts first; must match DEPS_PATH
+# in claude_sandbox/deps.py
+DEPS_PATH="${DEPS_MOUNT}/bin:/home/claudeuser/.local/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+DEPS_ENV_DIR=""
+DEPS_FIELDS=""
+
+# Succeed if the workspace has a requirements file to install.
+#
+# Arguments:
+#   $1: Absolute workspace directory
+deps_wanted() {
+    [ "$SANDBOX_REQUIREMENTS" != "none" ] && [ -f "$1/$SANDBOX_REQUIREMENTS" ]
+}
+
+# Find or install the workspace's dependency environment. Sets DEPS_ENV_DIR
+# and DEPS_FIELDS to ',"deps":{...}' for the start event.
+#
+# Arguments:
+#   $1: Absolute workspace directory
+deps_prepare() {
+    local lib_dir prepared
+    DEPS_ENV_DIR=""
+    DEPS_FIELDS=""
+    deps_wanted "$1" || return 0
+
+    lib_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    prepared=$(SANDBOX_IMAGE="$SANDBOX_IMAGE" SANDBOX_RUNTIME="$SANDBOX_RUNTIME" \
+        SANDBOX_REQUIREMENTS="$SANDBOX_REQUIREMENTS" \
+        PYTHONPATH="${lib_dir}${PYTHONPATH:+:$PYTHONPATH}" \
+        python3 -m claude_sandbox --deps "$1" --owner $$) || return 1
+    [ -z "$prepared" ] && return 0
+
+    DEPS_ENV_DIR="${prepared%%$'\n'*}"
+    DEPS_FIELDS=",\"deps\":${prepared#*$'\n'}"
+}
@@ -3,8 +3,10 @@
 #
 # Usage:
 #   ./sandbox-monitor.sh [container-name-or-id]
+#   ./sandbox-monitor.sh --top [--sort KEY] [--interval SECS] [--once]
 #
-# Shows real-time resource usage, logs, and status
+# Shows real-time resource usage, logs, and status; --top shows every running
+# sandbox in one table (python3 -m claude_sandbox --top)
 
 set -euo pipefail
 
@@ -14,14 +16,24 @@ YELLOW='\033[1;33m'
 CYAN='\033[0;36m'
 NC='\033[0m'
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+LOG_DIR="logs"
+
 show_usage() {
     cat <<EOF
 Usage: $0 [container-name-or-id]
+       $0 --top [--sort KEY] [--interval SECS] [--once]
 
 Monitor a running sandbox container in real-time.
 
 If no container specified, shows all claude-sandbox containers.
 
+With --top, shows CPU, memory vs limit, pids, block and network I/O and
+uptime of every running sandbox in one refreshing table. It holds one
+streaming stats subscription per container, so it stays cheap with hundreds
+of sandboxes. Sort keys: cpu, mem, pids, io, net, uptime, name; while it
+runs, press c/m/p/i/n/u/a to sort, r to reverse, q to quit.
+
 Commands:
   l - View logs (last 50 lines)
   f - Follow logs (tail -f)
@@ -37,9 +49,32 @@ Examples:
   # List all sandbox containers
   ./sandbox-monitor.sh
 
+  # All running sandboxes, busiest memory first
+  ./sandbox-monitor.sh --top --sort mem
+
 EOF
 }
 
+# Print a container's output: from its capture in logs/<name>.output when
+# run-sandbox.sh keeps one (an index read, however long the output), else
+# from the daemon.
+#
+# Arguments:
+#   $1: Container name
+#   $2: --tail N or --follow
+show_logs() {
+    local container="$1"
+    shift
+    if [ -d "${LOG_DIR}/${container}.output" ]; then
+        PYTHONPATH="${SCRIPT_DIR}${PYTHONPATH:+:$PYTHONPATH}" python3 -m claude_sandbox \
+            --logs "${LOG_DIR}/${container}.output" "$@"
+    elif [ "$1" = "--follow" ]; then
+        docker logs -f "$container" 2>&1
+    else
+        docker logs --tail "$2" "$container" 2>&1
+    fi
+}
+
 list_containers() {
     echo -e "${CYAN}=== Claude Sandbox Containers ===${NC}"
     docker ps -a --filter "name=claude-sandbox" \
@@ -79,7 +114,7 @@ monitor_container() {
 
         # Recent logs
         echo -e "${GREEN}Recent Logs (last 10 lines):${NC}"
-        docker logs --tail 10 "${CONTAINER}" 2>&1 | sed 's/^/  /'
+        show_logs "${CONTAINER}" --tail 10 | sed 's/^/  /'
         echo ""
 
         echo -e "${YELLOW}Commands: [l]ogs [f]ollow [s]tats [i]nfo [e]xec [q]uit${NC}"
@@ -91,12 +126,12 @@ monitor_container() {
             l)
                 clear
                 echo -e "${CYAN}=== Logs: $CONTAINER ===${NC}"
-                docker logs --tail 50 "${CONTAINER}" 2>&1 | less
+                show_logs "${CONTAINER}" --tail 50 | less
                 ;;
             f)
                 clear
                 echo -e "${CYAN}=== Following Logs: $CONTAINER (Ctrl+C to stop) ===${NC}"
-                docker logs -f "${CONTAINER}" 2>&1
+                show_logs "${CONTAINER}" --follow
                 ;;
             s)
                 clear
@@ -135,5 +170,10 @@ else
         show_usage
         exit 0
     fi
+    if [ "$1" == "--top" ]; then
+        shift
+        exec env PYTHONPATH="${SCRIPT_DIR}${PYTHONPATH:+:$PYTHONPATH}" \
+            python3 -m claude_sandbox --top "$@"
+    fi
     monitor_container "$1"
 fi
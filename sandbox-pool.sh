@@ -0,0 +1,173 @@
+#!/bin/bash
+# sandbox-pool.sh - Manage the warm container pool used by SANDBOX_POOL=1
+#
+# Usage:
+#   ./sandbox-pool.sh <command> [args]
+#
+# Commands:
+#   warm <workspace-dir> [N]   Pre-start N idle containers (default: SANDBOX_POOL_SIZE)
+#   status                     Show pooled containers and their state
+#   evict                      Remove idle containers past SANDBOX_POOL_IDLE_TTL
+#   drain                      Remove all pooled containers
+
+set -euo pipefail
+
+SANDBOX_IMAGE="${SANDBOX_IMAGE:-claude-sandbox:latest}"
+SANDBOX_MEMORY="${SANDBOX_MEMORY:-4g}"
+SANDBOX_CPUS="${SANDBOX_CPUS:-4}"
+SANDBOX_NETWORK="${SANDBOX_NETWORK:-none}"
+SANDBOX_RUNTIME="${SANDBOX_RUNTIME:-runsc}"
+SANDBOX_PIDS_LIMIT="${SANDBOX_PIDS_LIMIT:-512}"
+
+source "$(dirname "${BASH_SOURCE[0]}")/sandbox-lib.sh"
+
+# Colors
+GREEN='\033[0;32m'
+RED='\033[0;31m'
+YELLOW='\033[1;33m'
+CYAN='\033[0;36m'
+NC='\033[0m'
+
+log_info() {
+    echo -e "${GREEN}[INFO]${NC} $1"
+}
+
+log_warn() {
+    echo -e "${YELLOW}[WARN]${NC} $1"
+}
+
+log_error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+}
+
+show_usage() {
+    cat <<EOF
+Usage: $0 <command> [args]
+
+Manage the warm container pool used by SANDBOX_POOL=1 ./run-sandbox.sh.
+
+Pool containers are keyed by workspace, image and resource limits, so warm
+with the same SANDBOX_* environment you run with.
+
+Commands:
+  warm <workspace-dir> [N]   Pre-start N idle containers (default: SANDBOX_POOL_SIZE)
+  status                     Show pooled containers and their state
+  evict                      Remove idle containers past SANDBOX_POOL_IDLE_TTL
+  drain                      Remove all pooled containers
+
+Environment Variables:
+  SANDBOX_POOL_DIR        Pool state directory (default: .sandbox-pool)
+  SANDBOX_POOL_SIZE       Idle containers kept per key (default: 2)
+  SANDBOX_POOL_MAX_USES   Runs served before a container is destroyed (default: 20)
+  SANDBOX_POOL_IDLE_TTL   Seconds before an idle container is evicted (default: 600)
+
+Examples:
+  # Keep 4 warm containers for a project
+  ./sandbox-pool.sh warm ./my-project 4
+  SANDBOX_POOL=1 ./run-sandbox.sh ./my-project python3 hello.py
+
+  # Clean up
+  ./sandbox-pool.sh drain
+
+EOF
+}
+
+cmd_warm() {
+    if [ $# -lt 1 ] || [ ! -d "$1" ]; then
+        log_error "Missing or invalid workspace directory"
+        show_usage
+        exit 1
+    fi
+
+    local workspace
+    workspace="$(cd "$1" && pwd)"
+    SANDBOX_POOL_SIZE="${2:-$SANDBOX_POOL_SIZE}"
+
+    resolve_runtime
+    # The dependency environment is part of the key: prepare it as
+    # run-sandbox.sh does, or the warmed containers would never be claimed
+    if deps_wanted "$workspace" && ! deps_prepare "$workspace"; then
+        log_error "Dependency install failed"
+        exit 1
+    fi
+    local key
+    key=$(pool_key "$workspace")
+
+    log_info "Warming ${SANDBOX_POOL_SIZE} container(s) for ${workspace} (key ${key})"
+    if ! pool_fill "$key" "$workspace"; then
+        log_error "Failed to start pool container"
+        exit 1
+    fi
+    log_info "Pool ready"
+}
+
+cmd_status() {
+    echo -e "${CYAN}=== Sandbox Container Pool ===${NC}"
+
+    if [ ! -d "$SANDBOX_POOL_DIR" ]; then
+        echo "Pool is empty"
+        return 0
+    fi
+
+    local now key_dir state uses last_used boot_ms owner
+    now=$(date +%s)
+    printf "%-12s %-6s %-5s %-9s %-8s %s\n" "KEY" "STATE" "USES" "IDLE(s)" "BOOT(ms)" "CONTAINER"
+    for key_dir in "$SANDBOX_POOL_DIR"/*; do
+        for state in "$key_dir"/idle/* "$key_dir"/busy/*; do
+            [ -f "$state" ] || continue
+            read -r uses last_used boot_ms owner < "$state" || continue
+            printf "%-12s %-6s %-5s %-9s %-8s %s\n" \
+                "$(basename "$key_dir")" "$(basename "$(dirname "$state")")" \
+                "$uses" "$((now - last_used))" "$boot_ms" "$(basename "$state")"
+        done
+    done
+}
+
+cmd_drain() {
+    local key_dir state
+
+    [ -d "$SANDBOX_POOL_DIR" ] || return 0
+    for key_dir in "$SANDBOX_POOL_DIR"/*; do
+        for state in "$key_dir"/idle/* "$key_dir"/busy/*; do
+            [ -f "$state" ] || continue
+            pool_destroy "$(basename "$key_dir")" "$(basename "$state")"
+        done
+    done
+
+    # Catch containers whose state files were lost
+    docker ps -aq --filter "label=claude-sandbox.pool" | xargs docker rm -f >/dev/null 2>&1 || true
+    log_info "Pool drained"
+}
+
+# Main
+if [ $# -lt 1 ]; then
+    show_usage
+    exit 1
+fi
+
+COMMAND="$1"
+shift
+
+case "$COMMAND" in
+    warm)
+        cmd_warm "$@"
+        ;;
+    status)
+        cmd_status
+        ;;
+    evict)
+        pool_evict
+        log_info "Evicted idle containers older than ${SANDBOX_POOL_IDLE_TTL}s"
+        ;;
+    drain)
+        cmd_drain
+        ;;
+    --help|-h)
+        show_usage
+        ;;
+    *)
+        log_error "Unknown command: $COMMAND"
+        show_usage
+        exit 1
+        ;;
+esac
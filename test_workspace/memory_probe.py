@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""Adaptive memory limit probe.
+
+Reads the memory limit of this process's cgroup (v1 or v2, like
+check_cgroup.py) and then binary-searches the largest allocation that
+survives. Each attempt runs in a forked child that maps anonymous memory and
+touches one byte per page, so the whole mapping is charged to the cgroup in
+one pass. Reports the configured and enforced limit, the headroom left for a
+new allocation and how long the OOM killer takes to strike.
+
+Runs in a few seconds for any SANDBOX_MEMORY value:
+
+    SANDBOX_MEMORY=2g ./run-sandbox.sh test_workspace python3 memory_probe.py --expect 2g
+
+Exit status is 0 if the limit is enforced (and matches --expect), else 1.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PAGE = mmap.PAGESIZE
+MB = 1024 * 1024
+
+# cgroup v1 reports "no limit" as a huge page-aligned number
+UNLIMITED = 1 << 60
+
+# Exit status of a child whose allocation was refused (rather than killed)
+REFUSED = 3
+
+
+def parse_size(value: str) -> int:
+    """Parse a size such as '4g', '512m', '512MB' or a byte count."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?", value.strip().lower())
+    if not match:
+        raise ValueError(f"invalid size: {value}")
+    power = " kmgt".index(match.group(2) or " ")
+    return int(float(match.group(1)) * 1024 ** power)
+
+
+def format_size(size: Optional[int]) -> str:
+    """Format a byte count in MB (or 'unlimited')."""
+    if size is None:
+        return "unlimited"
+    return f"{size / MB:.0f}MB ({size / 1024 ** 3:.2f}GB)"
+
+
+def read_value(path: Path) -> Optional[int]:
+    """Read a cgroup number; None for 'max', missing files and v1's no-limit."""
+    try:
+        text = path.read_text().strip()
+    except OSError:
+        return None
+    if not text.isdigit() or int(text) >= UNLIMITED:
+        return None
+    return int(text)
+
+
+def read_keyed(path: Path) -> Dict[str, int]:
+    """Read a flat keyed cgroup file (memory.events, memory.oom_control)."""
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return {}
+    pairs = (line.split() for line in lines)
+    return {p[0]: int(p[1]) for p in pairs if len(p) == 2 and p[1].isdigit()}
+
+
+def meminfo() -> Dict[str, int]:
+    """Return /proc/meminfo in bytes."""
+    info = {}
+    for line in Path("/proc/meminfo").read_text().splitlines():
+        name, _, value = line.partition(":")
+        info[name] = int(value.split()[0]) * 1024
+    return info
+
+
+def own_cgroup_dir(controller: Optional[str]) -> Optional[Path]:
+    """Return the cgroup directory of this process for a v1 controller, or v2.
+
+    Inside a container with its own cgroup namespace this is the mount root;
+    elsewhere /proc/self/cgroup names the subdirectory.
+    """
+    for line in Path("/proc/self/cgroup").read_text().splitlines():
+        _, controllers, path = line.split(":", 2)
+        if (controller is None and controllers == "") or \
+                controller in controllers.split(","):
+            base = Path("/sys/fs/cgroup") / (controller or "")
+            for candidate in (base / path.lstrip("/"), base):
+                if candidate.is_dir():
+                    return candidate
+    return None
+
+
+def cgroup_memory() -> Dict[str, object]:
+    """Read this process's memory limit, swap allowance, usage and OOM kills.
+
+    Returns:
+        Dictionary with version ("v1", "v2" or None), path, limit and swap
+        (bytes or None when unlimited/unknown), usage and oom_kills
+    """
+    v2 = own_cgroup_dir(None)
+    if v2 is not None and (v2 / "memory.max").exists():
+        limit = read_value(v2 / "memory.max")
+        return {
+            "version": "v2",
+            "path": str(v2),
+            "limit": limit,
+            "swap": read_value(v2 / "memory.swap.max"),
+            "usage": read_value(v2 / "memory.current"),
+            "oom_kills": read_keyed(v2 / "memory.events").get("oom_kill"),
+        }
+
+    v1 = own_cgroup_dir("memory")
+    if v1 is not None and (v1 / "memory.limit_in_bytes").exists():
+        limit = read_value(v1 / "memory.limit_in_bytes")
+        memsw = read_value(v1 / "memory.memsw.limit_in_bytes")
+        return {
+            "version": "v1",
+            "path": str(v1),
+            "limit": limit,
+            # memsw is memory plus swap
+            "swap": memsw - limit if memsw is not None and limit is not None else None,
+            "usage": read_value(v1 / "memory.usage_in_bytes"),
+            "oom_kills": read_keyed(v1 / "memory.oom_control").get("oom_kill"),
+        }
+
+    return {"version": None, "path": None, "limit": None, "swap": None,
+            "usage": None, "oom_kills": None}
+
+
+def touch(size: int) -> None:
+    """Map size bytes of anonymous memory and write one byte per page."""
+    region = mmap.mmap(-1, size, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS)
+    if hasattr(mmap, "MADV_HUGEPAGE"):
+        try:
+            # Fewer page faults; the stride still touches every 4K page
+            region.madvise(mmap.MADV_HUGEPAGE)
+        except OSError:
+            pass
+    region[::PAGE] = b"\x01" * len(range(0, size, PAGE))
+
+
+def attempt(size: int, timeout: float) -> Tuple[str, float]:
+    """Allocate size bytes in a child process.
+
+    Returns:
+        (outcome, milliseconds) where outcome is "ok", "oom" (killed),
+        "refused" (mmap failed) or "timeout" (e.g. swapping)
+    """
+    sys.stdout.flush()
+    start = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            touch(size)
+        except (MemoryError, OSError):
+            os._exit(REFUSED)
+        os._exit(0)
+
+    deadline = start + timeout
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            break
+        if time.monotonic() > deadline:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return "timeout", (time.monotonic() - start) * 1000
+        time.sleep(0.002)
+
+    elapsed = (time.monotonic() - start) * 1000
+    if os.WIFSIGNALED(status):
+        return "oom", elapsed
+    return ("ok" if os.WEXITSTATUS(status) == 0 else "refused"), elapsed
+
+
+def search(expected: int, cap: int, resolution: int, timeout: float,
+           verbose: bool) -> Dict[str, object]:
+    """Binary-search the largest allocation that survives.
+
+    Starts from a bracket around the expected ceiling, so a correct limit
+    needs only a handful of attempts; widens the bracket when the guess is off.
+
+    Args:
+        expected: Expected largest allocation (limit minus current usage)
+        cap: Never try to allocate more than this
+        resolution: Stop when the bracket is this narrow
+        timeout: Seconds before an attempt counts as failed
+        verbose: Print each attempt
+
+    Returns:
+        Dictionary with max_ok, min_failed (None if nothing failed below
+        cap), time_to_oom_ms and the list of attempts
+    """
+    attempts: List[Dict[str, object]] = []
+
+    def survives(size: int) -> bool:
+        outcome, ms = attempt(size, timeout)
+        attempts.append({"bytes": size, "outcome": outcome, "ms": round(ms, 1)})
+        if verbose:
+            print(f"  {format_size(size):>22}  {outcome:<8} {ms:8.0f}ms")
+        return outcome == "ok"
+
+    def pages(size: int) -> int:
+        return max(PAGE, size // PAGE * PAGE)
+
+    low, high = 0, None
+    margin = max(resolution, expected // 20)
+
+    # Upper end of the bracket: must fail
+    guess = pages(min(expected + margin, cap))
+    while survives(guess):
+        low = guess
+        if guess >= cap:
+            return {"max_ok": low, "min_failed": None, "time_to_oom_ms": None,
+                    "attempts": attempts}
+        guess = pages(min(guess * 2, cap))
+    high = guess
+    time_to_oom = attempts[-1]["ms"] if attempts[-1]["outcome"] == "oom" else None
+
+    # Lower end: must survive
+    guess = pages(max(low, expected - margin))
+    while guess > low and not survives(guess):
+        high = guess
+        guess = pages(max(low, guess // 2)) if guess > PAGE else low
+    low = max(low, guess)
+
+    while high - low > resolution:
+        middle = pages((low + high) // 2)
+        if survives(middle):
+            low = middle
+        else:
+            high = middle
+
+    return {"max_ok": low, "min_failed": high, "time_to_oom_ms": time_to_oom,
+            "attempts": attempts}
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Find the enforced memory limit quickly.")
+    parser.add_argument("--expect", type=parse_size, default=None, metavar="SIZE",
+                        help="Expected limit, e.g. the SANDBOX_MEMORY value (4g)")
+    parser.add_argument("--resolution", type=parse_size, default=None, metavar="SIZE",
+                        help="Search precision (default: 1/256 of the limit, at least 4m)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Seconds before an attempt counts as failed (default: 30)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    cgroup = cgroup_memory()
+    info = meminfo()
+    # The probe itself is part of the cgroup's usage
+    usage = cgroup["usage"] or 0
+    swap = min(cgroup["swap"] if cgroup["swap"] is not None else info["SwapTotal"],
+               info["SwapTotal"])
+
+    if cgroup["limit"] is not None:
+        effective = cgroup["limit"] + swap
+    else:
+        # No cgroup limit visible (e.g. some gVisor setups): the sandbox's
+        # MemTotal is the best estimate
+        effective = info["MemTotal"] + swap
+    cap = max(effective * 2, effective + 512 * MB) - usage
+    cap = min(cap, info["MemTotal"] + info["SwapTotal"])
+    if args.resolution is None:
+        args.resolution = max(4 * MB, effective // 256 // MB * MB)
+
+    if not args.json:
+        print("Memory Limit Probe")
+        print("=" * 60)
+        print(f"Cgroup version:   {cgroup['version'] or 'not found'}")
+        print(f"Configured limit: {format_size(cgroup['limit'])}")
+        print(f"Swap allowance:   {format_size(swap)}")
+        print(f"Current usage:    {format_size(usage)}")
+        print("=" * 60)
+        print()
+        print("Searching (one child process per attempt):")
+
+    oom_before = cgroup["oom_kills"]
+    result = search(effective - usage, cap, args.resolution, args.timeout, not args.json)
+    oom_after = cgroup_memory()["oom_kills"]
+
+    enforced = result["min_failed"] is not None
+    enforced_limit = usage + result["max_ok"]
+    problems = []
+    if not enforced:
+        problems.append(f"allocated {format_size(result['max_ok'])} without hitting a limit")
+    elif cgroup["limit"] is not None and enforced_limit > effective + 2 * args.resolution:
+        problems.append(f"usage reached {format_size(enforced_limit)}, above the "
+                        f"configured {format_size(effective)}")
+    if args.expect is not None:
+        actual = cgroup["limit"] if cgroup["limit"] is not None else enforced_limit
+        if abs(actual - args.expect) > max(args.resolution, args.expect // 20):
+            problems.append(f"expected a {format_size(args.expect)} limit, "
+                            f"found {format_size(actual)}")
+
+    report = {
+        "cgroup_version": cgroup["version"],
+        "configured_limit_bytes": cgroup["limit"],
+        "swap_bytes": swap,
+        "usage_bytes": usage,
+        "enforced": enforced,
+        "enforced_limit_bytes": enforced_limit if enforced else None,
+        "headroom_bytes": result["max_ok"],
+        "time_to_oom_ms": result["time_to_oom_ms"],
+        "oom_kills": (oom_after - oom_before
+                      if oom_before is not None and oom_after is not None else None),
+        "resolution_bytes": args.resolution,
+        "attempts": result["attempts"],
+        "duration_ms": round((time.monotonic() - started) * 1000),
+        "problems": problems,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print()
+        print("=" * 60)
+        if enforced:
+            print(f"Enforced limit:   ~{format_size(enforced_limit)} "
+                  f"(±{args.resolution // MB}MB)")
+        print(f"Headroom:         {format_size(result['max_ok'])} "
+              "(largest allocation that survived)")
+        if result["time_to_oom_ms"] is not None:
+            print(f"Time to OOM kill: {result['time_to_oom_ms']:.0f}ms")
+        if report["oom_kills"] is not None:
+            print(f"OOM kills:        {report['oom_kills']}")
+        print(f"Probe time:       {report['duration_ms'] / 1000:.1f}s "
+              f"({len(result['attempts'])} attempts)")
+        print("=" * 60)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not problems:
+            print("✅ Memory limit enforced")
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())